@@ -0,0 +1,107 @@
+"""
+Micro-benchmark for title_is_relevant and is_excluded against the per-call implementations they replaced.
+
+python3 benchmarks/bench_matching.py --titles 10000 --terms 50
+"""
+
+import os
+import sys
+import random
+import string
+import argparse
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Company, is_excluded
+from job_scrape import title_is_relevant
+
+
+def uncompiled_title_is_relevant(company, title, search_terms) -> bool:
+    terms_to_use = search_terms
+    if company.relevant_search_terms:
+        terms_to_use = company.relevant_search_terms
+
+    if len(terms_to_use) == 0:
+        return True
+
+    return any(search_term.lower() in title.lower() for search_term in terms_to_use)
+
+
+def uncompiled_is_excluded(config, title) -> bool:
+    if config and "exclude_search_terms" in config:
+        lower_title_words = set(title.lower().split())
+        exclude_terms = {
+            excluded_word.lower() for excluded_word in config["exclude_search_terms"]
+        }
+        if len(lower_title_words.intersection(exclude_terms)) > 0:
+            return True
+    return False
+
+
+def random_words(count):
+    return [
+        "".join(random.choices(string.ascii_lowercase, k=random.randint(2, 10)))
+        for _ in range(count)
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark title matching.")
+    parser.add_argument("--titles", type=int, default=10000)
+    parser.add_argument("--terms", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    vocabulary = random_words(2000)
+    search_terms = [
+        " ".join(random.choices(vocabulary, k=random.randint(1, 2))).title()
+        for _ in range(args.terms)
+    ]
+    exclude_terms = [word.upper() for word in random.choices(vocabulary, k=args.terms)]
+    titles = [
+        " ".join(random.choices(vocabulary, k=random.randint(3, 10))).title()
+        for _ in range(args.titles)
+    ]
+    company = Company(name="Benchmark")
+    config = {"exclude_search_terms": exclude_terms}
+
+    cases = [
+        (
+            "title_is_relevant",
+            lambda title: title_is_relevant(company, title, search_terms),
+            lambda title: uncompiled_title_is_relevant(company, title, search_terms),
+        ),
+        (
+            "is_excluded",
+            lambda title: is_excluded(config, title),
+            lambda title: uncompiled_is_excluded(config, title),
+        ),
+    ]
+
+    print(f"{args.titles} titles x {args.terms} terms, best of {args.repeat}")
+    for name, compiled, uncompiled in cases:
+        compiled_results = [compiled(title) for title in titles]
+        uncompiled_results = [uncompiled(title) for title in titles]
+        assert compiled_results == uncompiled_results, f"{name} results differ"
+
+        compiled_seconds = min(
+            timeit.repeat(
+                lambda: [compiled(title) for title in titles],
+                number=1,
+                repeat=args.repeat,
+            )
+        )
+        uncompiled_seconds = min(
+            timeit.repeat(
+                lambda: [uncompiled(title) for title in titles],
+                number=1,
+                repeat=args.repeat,
+            )
+        )
+        print(
+            f"{name}: {uncompiled_seconds * 1000:.1f}ms -> {compiled_seconds * 1000:.1f}ms "
+            f"({uncompiled_seconds / compiled_seconds:.1f}x faster, {sum(compiled_results)} matched)"
+        )
@@ -0,0 +1,222 @@
+"""
+Benchmark for everything a run does after scraping, on a synthetic run record and synthetic scrape results, without a
+browser: loading the run record, finding the new jobs (record_results), formatting the message and saving the run
+record, each timed separately.
+
+python3 benchmarks/bench_pipeline.py --companies 10000 --historical_ids 1000000 --fresh_postings 50000
+python3 benchmarks/bench_pipeline.py --store sqlite --retention_days 365
+"""
+
+import io
+import os
+import sys
+import json
+import random
+import shutil
+import argparse
+import datetime
+import tempfile
+import statistics
+import contextlib
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import *
+from job_scrape import record_results, format_new_jobs_message, format_errors_message
+from run_record_store import open_run_record, save_run_record
+
+STAGES = ["load", "diff", "format", "save"]
+
+
+def company_name(index):
+    return f"Company {index:05}"
+
+
+def job_link(company_index, job_number):
+    return f"https://boards.example.com/company-{company_index:05}/jobs/{job_number}"
+
+
+def split_across_companies(total, companies):
+    """Splits total into per-company counts, skewed so that a few companies have most of the jobs, like real boards"""
+    weights = [random.paretovariate(1.2) for _ in range(companies)]
+    weight_total = sum(weights)
+    counts = [int(total * weight / weight_total) for weight in weights]
+    for index in random.sample(range(companies), total - sum(counts)):
+        counts[index] += 1
+    return counts
+
+
+def generate_run_record(args) -> RunRecord:
+    today = datetime.date.today()
+    existing_jobs = {}
+    job_history = {}
+    for index, count in enumerate(
+        split_across_companies(args.historical_ids, args.companies)
+    ):
+        job_ids = sorted(job_link(index, job_number) for job_number in range(count))
+        existing_jobs[company_name(index)] = job_ids
+        company_history = {}
+        for job_id in job_ids:
+            first_seen = today - datetime.timedelta(days=random.randint(0, 1000))
+            last_seen = first_seen + datetime.timedelta(
+                days=random.randint(0, (today - first_seen).days)
+            )
+            company_history[job_id] = [first_seen.isoformat(), last_seen.isoformat()]
+        job_history[company_name(index)] = company_history
+    return RunRecord(existing_jobs=existing_jobs, errors=[], job_history=job_history)
+
+
+def generate_results(args, run_record: RunRecord) -> list[CompanyResult]:
+    """Each company relists some of its known jobs, and some companies have fresh ones"""
+    results = []
+    fresh_counts = split_across_companies(args.fresh_postings, args.companies)
+    for index, fresh_count in enumerate(fresh_counts):
+        name = company_name(index)
+        company = Company(
+            name=name, jobs_page=f"https://boards.example.com/company-{index:05}"
+        )
+        metrics = CompanyMetrics(company_name=name)
+        if random.random() < args.error_rate:
+            results.append(
+                CompanyResult(
+                    company=company,
+                    relevant_jobs=[],
+                    error=Exception("Synthetic scrape error"),
+                    metrics=metrics,
+                )
+            )
+            continue
+
+        known_job_ids = run_record.existing_jobs[name]
+        relisted = random.sample(
+            known_job_ids, min(len(known_job_ids), args.relisted_per_company)
+        )
+        fresh = [
+            job_link(index, len(known_job_ids) + job_number)
+            for job_number in range(fresh_count)
+        ]
+        jobs = [
+            JobPosting(title=f"Software Engineer {job_id[-6:]}", id=job_id, link=job_id)
+            for job_id in relisted + fresh
+        ]
+        results.append(
+            CompanyResult(
+                company=company,
+                relevant_jobs=jobs,
+                jobs_page_status=(
+                    JobsPageStatus.SOME_JOB_FOUND
+                    if jobs
+                    else JobsPageStatus.SPECIFIC_NO_JOBS_PHRASE_FOUND
+                ),
+                metrics=metrics,
+            )
+        )
+    return results
+
+
+def run_once(args, baseline_path, results) -> dict[str, float]:
+    """Times each stage on a fresh copy of the baseline run record"""
+    work_path = os.path.join(os.path.dirname(baseline_path), "work" + args.extension)
+    shutil.copy2(baseline_path, work_path)
+    for result in results:
+        result.metrics.jobs_new = 0
+        result.metrics.jobs_duplicate = 0
+
+    timings = {}
+    start = time.perf_counter()
+    run_record = open_run_record(work_path)
+    timings["load"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    # record_results prints a line per company that forgot jobs
+    with contextlib.redirect_stdout(io.StringIO()):
+        new_relevant_jobs, _, errors, _ = record_results(
+            run_record, results, args.retention_days
+        )
+    run_record.errors = [
+        ScrapeError(
+            company_name=company.name,
+            jobs_page=company.jobs_page,
+            message=str(error),
+            is_new_this_run=True,
+        )
+        for company, error in errors
+    ]
+    timings["diff"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    message = format_new_jobs_message(new_relevant_jobs)
+    errors_message = format_errors_message(run_record.errors)
+    timings["format"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    save_run_record(run_record, work_path)
+    timings["save"] = time.perf_counter() - start
+    if hasattr(run_record, "close"):
+        run_record.close()
+
+    timings["new_jobs"] = sum(len(info["jobs"]) for info in new_relevant_jobs.values())
+    timings["message_characters"] = len(message) + len(errors_message)
+    timings["file_bytes"] = os.path.getsize(work_path)
+    return timings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the run record pipeline on synthetic data."
+    )
+    parser.add_argument("--companies", type=int, default=10000)
+    parser.add_argument("--historical_ids", type=int, default=1000000)
+    parser.add_argument("--fresh_postings", type=int, default=50000)
+    parser.add_argument(
+        "--relisted_per_company",
+        type=int,
+        default=20,
+        help="Known jobs each company's page still lists",
+    )
+    parser.add_argument(
+        "--error_rate",
+        type=float,
+        default=0.01,
+        help="Fraction of companies that error",
+    )
+    parser.add_argument("--retention_days", type=int, default=None)
+    parser.add_argument("--store", choices=["json", "sqlite", "both"], default="both")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    start = time.perf_counter()
+    run_record = generate_run_record(args)
+    results = generate_results(args, run_record)
+    print(
+        f"Generated {args.companies} companies, {args.historical_ids} known job ids and"
+        f" {sum(len(result.relevant_jobs) for result in results)} scraped jobs"
+        f" in {time.perf_counter() - start:.1f}s"
+    )
+
+    stores = ["json", "sqlite"] if args.store == "both" else [args.store]
+    with tempfile.TemporaryDirectory() as directory:
+        for store in stores:
+            args.extension = ".json" if store == "json" else ".db"
+            baseline_path = os.path.join(directory, "baseline" + args.extension)
+            save_run_record(
+                RunRecord.from_dict(json.loads(json.dumps(run_record.to_dict()))),
+                baseline_path,
+            )
+
+            runs = [run_once(args, baseline_path, results) for _ in range(args.repeat)]
+            medians = {
+                stage: statistics.median(run[stage] for run in runs) for stage in STAGES
+            }
+            print(
+                f"\n{store}: {runs[0]['new_jobs']} new jobs,"
+                f" {runs[0]['message_characters']} character message,"
+                f" {runs[0]['file_bytes'] / 1_000_000:.1f}MB run record"
+                f" (median of {args.repeat})"
+            )
+            for stage in STAGES:
+                print(f"  {stage:<8} {medians[stage]:>8.3f}s")
+            print(f"  {'total':<8} {sum(medians.values()):>8.3f}s")
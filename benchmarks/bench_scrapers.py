@@ -0,0 +1,528 @@
+"""
+Runs every scraper in common_scrapers.py against saved pages of its job board, served from a local HTTP server, in
+headless Chrome. Reports how long each took and how many WebDriver commands it sent, and checks it found the expected
+jobs. Needs Chrome, but no internet connection.
+
+The scrapers in http_scrapers.py run against the same fixture as the browser scraper they stand in for, reading the
+board's JSON from <fixture folder>/api.json, and have to find the same jobs. tests/test_scraper_fixtures.py runs these
+without Chrome.
+
+python3 benchmarks/bench_scrapers.py
+python3 benchmarks/bench_scrapers.py --only workday --repeat 3
+python3 benchmarks/bench_scrapers.py --output bench_output.json  # to compare between commits
+
+Each benchmarks/fixtures/<name>/fixture.json has
+{
+    "scrapers": ["GreenhousePage", "GreenhouseApiPage"],  # scrapers to run against this fixture
+    "page": "",  # path of the jobs page within the fixture folder
+    "config": {},  # optional company config
+    "source": "",  # how the pages were made
+    "expected_from": "",  # how the expected jobs were made
+    "expected": [JobPosting, ...]  # {{BASE_URL}} is replaced with the local server's address
+}
+Pages are served as is, except that {{BASE_URL}} and {{NOW}} (the current time) are filled in. A path without an
+extension is served from the .html or .json file of that name. POSTs to a path ending in /jobs are answered like
+Workday's jobs endpoint, with the requested offset and limit of the list in <path>.json.
+
+After changing a fixture or a scraper's output on purpose, --update_expected saves what the scrapers found as expected.
+--expected_from <revision> instead saves what each fixture's browser scraper found as it was at that git revision, before
+checking the current scrapers against it. Either way, expected_from records which scraper and commit the jobs came from.
+
+python3 benchmarks/bench_scrapers.py --expected_from $(git rev-list --max-parents=0 HEAD)  # the scrapers as first written
+
+--save_page <name> <url> <scraper> saves a board's page as it looks in Chrome once loaded, without its scripts, as a
+new fixture to run --update_expected on. This suits boards whose jobs are all on the page once it has loaded; ones that
+page through their jobs or load them into an iframe need their fixture writing by hand.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import datetime
+import tempfile
+import threading
+import statistics
+import subprocess
+from dataclasses import asdict
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from selenium import webdriver
+
+import http_scrapers
+from models import *
+from job_scrape import get_company_relevant_jobs, get_company_relevant_jobs_over_http
+from metrics import count_driver_calls
+from scraper_registry import get_scraper
+from waits import wait_until_ready
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+TEMPLATE_EXTENSIONS = {".html", ".json"}
+
+
+class FixtureRequestHandler(SimpleHTTPRequestHandler):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, directory=FIXTURES_DIR, **kwargs)
+
+    def log_message(self, format, *args):
+        pass
+
+    def fixture_path(self):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            return os.path.join(path, "index.html")
+        if not os.path.exists(path):
+            for extension in TEMPLATE_EXTENSIONS:
+                if os.path.exists(path + extension):
+                    return path + extension
+        return path
+
+    def send_body(self, body: bytes, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = self.fixture_path()
+        extension = os.path.splitext(path)[1]
+        if not os.path.isfile(path) or extension not in TEMPLATE_EXTENSIONS:
+            return super().do_GET()
+        with open(path) as f:
+            content = fill_in(f.read(), self.server.base_url)
+        self.send_body(
+            content.encode("utf-8"),
+            (
+                "text/html; charset=utf-8"
+                if extension == ".html"
+                else "application/json"
+            ),
+        )
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        path = self.fixture_path()
+        if not self.path.split("?")[0].endswith("/jobs") or not os.path.isfile(path):
+            self.send_error(404)
+            return
+        with open(path) as f:
+            job_postings = json.loads(fill_in(f.read(), self.server.base_url))
+        offset = request.get("offset", 0)
+        page = job_postings[offset : offset + request.get("limit", 20)]
+        self.send_body(
+            json.dumps({"total": len(job_postings), "jobPostings": page}).encode(
+                "utf-8"
+            ),
+            "application/json",
+        )
+
+
+def fill_in(content, base_url):
+    return content.replace("{{BASE_URL}}", base_url).replace(
+        "{{NOW}}", datetime.datetime.now(datetime.timezone.utc).isoformat()
+    )
+
+
+def start_fixture_server() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureRequestHandler)
+    server.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def serve_board_apis(base_url):
+    """Points the scrapers in http_scrapers.py at each fixture's api.json"""
+    api_url = f"{base_url}/{{board}}/api"
+    http_scrapers.GREENHOUSE_API_URL = api_url
+    http_scrapers.ASHBY_API_URL = api_url
+    http_scrapers.LEVER_API_URLS[base_url.split("://")[1]] = api_url
+
+
+def load_fixtures(only=None) -> dict[str, dict]:
+    fixtures = {}
+    for name in sorted(os.listdir(FIXTURES_DIR)):
+        fixture_file = os.path.join(FIXTURES_DIR, name, "fixture.json")
+        if os.path.exists(fixture_file) and (not only or name in only):
+            with open(fixture_file) as f:
+                fixtures[name] = json.load(f)
+    return fixtures
+
+
+def expected_jobs(fixture, base_url) -> list[JobPosting]:
+    return [
+        JobPosting(**json.loads(fill_in(json.dumps(job), base_url)))
+        for job in fixture["expected"]
+    ]
+
+
+SAVE_PAGE_JS = """
+document.querySelectorAll("script").forEach((script) => script.remove());
+// Links keep going to the board, not the local server
+document.querySelectorAll("a[href]").forEach((a) => a.setAttribute("href", a.href));
+return document.documentElement.outerHTML;
+"""
+
+
+def save_page(driver, name, url, scraper_name, default_sleep):
+    driver.get(url)
+    ready_condition = getattr(get_scraper(scraper_name), "ready_condition", None)
+    if not ready_condition or not wait_until_ready(driver, ready_condition, 30):
+        time.sleep(default_sleep)
+    fixture_dir = os.path.join(FIXTURES_DIR, name)
+    os.makedirs(fixture_dir, exist_ok=True)
+    with open(os.path.join(fixture_dir, "index.html"), "w") as f:
+        f.write("<!DOCTYPE html>\n" + driver.execute_script(SAVE_PAGE_JS) + "\n")
+    fixture = {
+        "scrapers": [scraper_name],
+        "page": "",
+        "config": {},
+        "source": f"Saved from {url} on {datetime.date.today().isoformat()} with --save_page",
+        "expected_from": "",
+        "expected": [],
+    }
+    with open(os.path.join(fixture_dir, "fixture.json"), "w") as f:
+        f.write(json.dumps(fixture, indent=4, ensure_ascii=False) + "\n")
+    print(
+        f"Saved {url} as {name}. Check that {scraper_name} finds its jobs with --only {name} --update_expected"
+    )
+
+
+def browser_scraper(fixture) -> str:
+    return next(
+        scraper_name
+        for scraper_name in fixture["scrapers"]
+        if getattr(get_scraper(scraper_name), "needs_browser", True)
+    )
+
+
+# Run from a checkout of another revision, which has its own models, scrapers and job_scrape
+RUN_AT_REVISION = """
+import sys
+import json
+from dataclasses import asdict
+
+from selenium import webdriver
+
+import common_scrapers
+from models import Company
+from job_scrape import get_company_relevant_jobs
+
+options = webdriver.ChromeOptions()
+options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+options.add_argument("--headless=new")
+driver = webdriver.Chrome(options=options)
+found = {}
+try:
+    for name, run in json.load(sys.stdin).items():
+        company = Company(
+            name=name,
+            jobs_page=run["jobs_page"],
+            jobs_page_class=getattr(common_scrapers, run["scraper"]),
+            jobs_page_class_name=run["scraper"],
+            config=run["config"],
+        )
+        driver.switch_to.default_content()
+        driver.get("about:blank")
+        driver.get_log("performance")
+        jobs, _ = get_company_relevant_jobs(driver, company, [], None, run["default_sleep"])
+        found[name] = [asdict(job) for job in jobs]
+finally:
+    driver.quit()
+with open(sys.argv[1], "w") as f:
+    json.dump(found, f)
+"""
+
+
+def jobs_at_revision(
+    revision, base_url, fixtures, default_sleep
+) -> dict[str, list[JobPosting]]:
+    """
+    Runs each fixture's browser scraper as it was at a git revision, with that revision's job_scrape, in a checkout of
+    it made for the purpose
+    """
+    archive = subprocess.run(
+        ["git", "archive", revision], capture_output=True, check=True, cwd=REPO_DIR
+    ).stdout
+    with tempfile.TemporaryDirectory() as checkout:
+        subprocess.run(["tar", "-x", "-C", checkout], input=archive, check=True)
+        runs = {
+            name: {
+                "jobs_page": f"{base_url}/{name}/{fixture['page']}",
+                "scraper": browser_scraper(fixture),
+                "config": fixture.get("config"),
+                "default_sleep": default_sleep,
+            }
+            for name, fixture in fixtures.items()
+        }
+        output = os.path.join(checkout, "jobs.json")
+        subprocess.run(
+            [sys.executable, "-c", RUN_AT_REVISION, output],
+            input=json.dumps(runs),
+            text=True,
+            check=True,
+            cwd=checkout,
+        )
+        with open(output) as f:
+            found = json.load(f)
+    return {name: [JobPosting(**job) for job in jobs] for name, jobs in found.items()}
+
+
+def save_expected(name, fixture, jobs, base_url, expected_from):
+    fixture["expected_from"] = expected_from
+    fixture["expected"] = [
+        json.loads(json.dumps(asdict(job)).replace(base_url, "{{BASE_URL}}"))
+        for job in jobs
+    ]
+    with open(os.path.join(FIXTURES_DIR, name, "fixture.json"), "w") as f:
+        f.write(json.dumps(fixture, indent=4, ensure_ascii=False) + "\n")
+    print(f"Updated {name}'s expected jobs")
+
+
+def create_driver(headless=True):
+    options = webdriver.ChromeOptions()
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    if headless:
+        options.add_argument("--headless=new")
+    return webdriver.Chrome(options=options)
+
+
+def run_scraper(driver, base_url, name, fixture, scraper_name, default_sleep):
+    """driver can be None for the scrapers that don't need a browser"""
+    company = Company(
+        name=name,
+        jobs_page=f"{base_url}/{name}/{fixture['page']}",
+        jobs_page_class=get_scraper(scraper_name),
+        jobs_page_class_name=scraper_name,
+        config=fixture.get("config"),
+    )
+    metrics = CompanyMetrics(company_name=name)
+    if not needs_browser(company):
+        with metrics.timed("total_seconds"):
+            jobs, _ = get_company_relevant_jobs_over_http(
+                company, [], None, metrics=metrics
+            )
+        return jobs, metrics
+
+    # Don't let the last fixture's page or requests leak into this one
+    driver.switch_to.default_content()
+    driver.get("about:blank")
+    driver.get_log("performance")
+
+    with metrics.timed("total_seconds"), count_driver_calls(driver, metrics):
+        jobs, _ = get_company_relevant_jobs(
+            driver, company, [], None, default_sleep, KnownJobs(frozenset()), metrics
+        )
+    return jobs, metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the scrapers against saved job board pages."
+    )
+    parser.add_argument(
+        "--only", nargs="*", default=None, help="Names of the fixtures to run"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=1, help="Runs per scraper, reporting the median"
+    )
+    parser.add_argument(
+        "--default_sleep",
+        type=int,
+        default=1,
+        help="Seconds to sleep for scrapers without a ready_condition",
+    )
+    parser.add_argument("--headed", action="store_true", help="Show Chrome")
+    parser.add_argument(
+        "--output", type=str, default=None, help="Write the results to this JSON file"
+    )
+    parser.add_argument(
+        "--update_expected",
+        action="store_true",
+        help="Save what each fixture's first scraper found as its expected jobs",
+    )
+    parser.add_argument(
+        "--expected_from",
+        type=str,
+        default=None,
+        metavar="REVISION",
+        help="Save what each fixture's browser scraper found at this git revision as its expected jobs",
+    )
+    parser.add_argument(
+        "--save_page",
+        nargs=3,
+        metavar=("NAME", "URL", "SCRAPER"),
+        default=None,
+        help="Save the board at URL as a new fixture NAME for SCRAPER, instead of running the fixtures",
+    )
+    args = parser.parse_args()
+
+    if args.save_page:
+        driver = create_driver(headless=not args.headed)
+        try:
+            save_page(driver, *args.save_page, args.default_sleep)
+        finally:
+            driver.quit()
+        return
+
+    fixtures = load_fixtures(args.only)
+    server = start_fixture_server()
+    serve_board_apis(server.base_url)
+    if args.expected_from:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", args.expected_from],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=REPO_DIR,
+        ).stdout.strip()
+        today = datetime.date.today().isoformat()
+        found = jobs_at_revision(
+            revision, server.base_url, fixtures, args.default_sleep
+        )
+        for name, jobs in found.items():
+            save_expected(
+                name,
+                fixtures[name],
+                jobs,
+                server.base_url,
+                f"What {browser_scraper(fixtures[name])} found at {revision}, saved with --expected_from on {today}",
+            )
+    driver = create_driver(headless=not args.headed)
+    results = []
+    try:
+        for name, fixture in fixtures.items():
+            expected = expected_jobs(fixture, server.base_url)
+            for scraper_name in fixture["scrapers"]:
+                runs = []
+                for _ in range(args.repeat):
+                    try:
+                        jobs, metrics = run_scraper(
+                            driver,
+                            server.base_url,
+                            name,
+                            fixture,
+                            scraper_name,
+                            args.default_sleep,
+                        )
+                        runs.append((jobs, metrics, None))
+                    except Exception as e:
+                        runs.append(([], None, e))
+                        break
+
+                jobs, _, error = runs[-1]
+                timed_runs = [metrics for _, metrics, _ in runs if metrics]
+                result = {
+                    "fixture": name,
+                    "scraper": scraper_name,
+                    "correct": error is None and jobs == expected,
+                    "error": repr(error) if error else None,
+                    "jobs": len(jobs),
+                    "expected_jobs": len(expected),
+                }
+                for field in [
+                    "total_seconds",
+                    "load_seconds",
+                    "wait_seconds",
+                    "extract_seconds",
+                    "driver_calls",
+                ]:
+                    result[field] = (
+                        statistics.median(getattr(m, field) for m in timed_runs)
+                        if timed_runs
+                        else None
+                    )
+                results.append(result)
+                print_result(result)
+                if not result["correct"] and not error:
+                    print_differences(expected, jobs)
+
+                if (
+                    args.update_expected
+                    and not error
+                    and scraper_name == fixture["scrapers"][0]
+                ):
+                    save_expected(
+                        name,
+                        fixture,
+                        jobs,
+                        server.base_url,
+                        f"What {scraper_name} found at {current_revision()}, saved with --update_expected on"
+                        f" {datetime.date.today().isoformat()}",
+                    )
+    finally:
+        driver.quit()
+        server.shutdown()
+
+    incorrect = [result for result in results if not result["correct"]]
+    print(
+        f"\n{len(results) - len(incorrect)}/{len(results)} correct,",
+        f"{sum(result['total_seconds'] or 0 for result in results):.1f}s",
+        f"and {sum(result['driver_calls'] or 0 for result in results)} WebDriver commands in total",
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"commit": current_commit(), "results": results}, f, indent=4)
+        print(f"Wrote {args.output}")
+    sys.exit(1 if incorrect else 0)
+
+
+def print_result(result):
+    status = "ok" if result["correct"] else "WRONG"
+    if result["error"]:
+        print(
+            f"{result['fixture']:<32} {result['scraper']:<34} ERROR {result['error']}"
+        )
+        return
+    print(
+        f"{result['fixture']:<32} {result['scraper']:<34} {status:<5}"
+        f" {result['total_seconds']:>6.2f}s (load {result['load_seconds']:.2f}, wait {result['wait_seconds']:.2f},"
+        f" extract {result['extract_seconds']:.2f})"
+        f" {result['driver_calls']:>5} calls"
+        f" {result['jobs']:>3}/{result['expected_jobs']} jobs"
+    )
+
+
+def print_differences(expected, jobs):
+    for job in expected:
+        if job not in jobs:
+            print("    missing", repr(job))
+    for job in jobs:
+        if job not in expected:
+            print("    unexpected", repr(job))
+    if sorted(map(repr, expected)) == sorted(map(repr, jobs)):
+        print("    same jobs in a different order")
+
+
+def current_revision():
+    """The commit checked out, with -dirty after it if there are changes on top"""
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            capture_output=True,
+            text=True,
+            cwd=REPO_DIR,
+        ).stdout.strip()
+    except OSError:
+        return None
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except OSError:
+        return None
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Job boards that many users' configs list, like Climate Tech List, can be scraped once for all of them rather than once
+per user: the first run to check a board stores its rows, unfiltered, and the runs after it pick out their own jobs
+from those rows with their own config until the rows are older than max_age_minutes. See SharedBoard.
+
+One JSON object per board, named after a hash of its jobs_page:
+{"jobs_page": "", "fetched_at": "2024-01-01T00:00:00+00:00", "scraped_in_full_at": "...", "stopped_at_limit": false,
+"rows": ...}
+
+stopped_at_limit is whether the scrape stopped at its cap on how many pages it reads. The runs reading those rows then
+don't take the jobs missing from them to be gone (see CompanyResult.read_all_jobs).
+
+Boards that are paged through, like Bits in Bio, are only scraped in full once every FULL_SCRAPE_INTERVAL. In between,
+a scrape stops at the first page of rows the board already had, and keeps the rest of them (see SharedBoard.previous).
+
+Two runs that both find a board missing or stale both scrape it, and the last one to finish is what is stored. A
+read_only store only reads boards, for runs that aren't trusted to write what other users' runs read.
+"""
+
+import os
+import json
+import hashlib
+import datetime
+import tempfile
+
+from models import *
+
+DEFAULT_MAX_AGE_MINUTES = 60
+# So that jobs taken off the board stop being kept from one stored board to the next
+FULL_SCRAPE_INTERVAL = datetime.timedelta(days=1)
+
+
+def board_name(jobs_page) -> str:
+    return hashlib.sha256(jobs_page.encode()).hexdigest()[:16] + ".json"
+
+
+class BoardStore:
+    """Where the boards are stored is up to subclasses, see DirectoryBoardStore"""
+
+    def __init__(self, max_age_minutes=DEFAULT_MAX_AGE_MINUTES, read_only=False):
+        self.max_age = datetime.timedelta(minutes=max_age_minutes)
+        self.read_only = read_only
+
+    def read(self, name) -> str:
+        """The stored board, or "" if there isn't one"""
+        raise NotImplementedError("Unexpected call to base class")
+
+    def write(self, name, content: str):
+        raise NotImplementedError("Unexpected call to base class")
+
+    def get(self, jobs_page) -> SharedBoard:
+        """The rows stored for jobs_page as the cached rows if they're recent enough, or else as the previous ones"""
+        try:
+            content = self.read(board_name(jobs_page))
+        except Exception as e:
+            # The board can still be scraped
+            print(f"Couldn't read the stored rows of {jobs_page}: {repr(e)}")
+            return SharedBoard()
+        if not content:
+            return SharedBoard()
+        board = json.loads(content)
+        if board["jobs_page"] != jobs_page:
+            return SharedBoard()
+        now = datetime.datetime.now(datetime.timezone.utc)
+        age = now - datetime.datetime.fromisoformat(board["fetched_at"])
+        if age <= self.max_age:
+            print(
+                f"Using the rows of {jobs_page} stored {int(age.total_seconds())}s ago"
+            )
+            return SharedBoard(
+                cached=board["rows"],
+                stored_stopped_at_limit=board.get("stopped_at_limit", False),
+            )
+        # Boards stored before scraped_in_full_at was kept were always scraped in full
+        scraped_in_full_at = (
+            board["scraped_in_full_at"]
+            if "scraped_in_full_at" in board
+            else board["fetched_at"]
+        )
+        if (
+            now - datetime.datetime.fromisoformat(scraped_in_full_at)
+            > FULL_SCRAPE_INTERVAL
+        ):
+            return SharedBoard()
+        return SharedBoard(
+            previous=board["rows"],
+            previous_scraped_in_full_at=scraped_in_full_at,
+            stored_stopped_at_limit=board.get("stopped_at_limit", False),
+        )
+
+    def put(self, jobs_page, shared_board: SharedBoard, stopped_at_limit=False):
+        """Stores the rows shared_board was set to. stopped_at_limit: see SharedBoard.stored_stopped_at_limit"""
+        if self.read_only:
+            return
+        fetched_at = datetime.datetime.now(datetime.timezone.utc).isoformat(
+            timespec="seconds"
+        )
+        try:
+            self.write(
+                board_name(jobs_page),
+                json.dumps(
+                    {
+                        "jobs_page": jobs_page,
+                        "fetched_at": fetched_at,
+                        "scraped_in_full_at": (
+                            shared_board.previous_scraped_in_full_at
+                            if shared_board.continues_previous
+                            else fetched_at
+                        ),
+                        "stopped_at_limit": stopped_at_limit,
+                        "rows": shared_board.fetched,
+                    }
+                ),
+            )
+        except Exception as e:
+            # This run's jobs were still read, the next run just scrapes the board again
+            print(f"Couldn't store the rows of {jobs_page}: {repr(e)}")
+
+
+class DirectoryBoardStore(BoardStore):
+    def __init__(self, path, max_age_minutes=DEFAULT_MAX_AGE_MINUTES, read_only=False):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        super().__init__(max_age_minutes, read_only)
+
+    def read(self, name) -> str:
+        board_path = os.path.join(self.path, name)
+        if not os.path.exists(board_path):
+            return ""
+        with open(board_path) as f:
+            return f.read()
+
+    def write(self, name, content: str):
+        # Written aside and moved into place, so that another run never reads half a board
+        fd, tmp_path = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+        os.replace(tmp_path, os.path.join(self.path, name))
@@ -0,0 +1,137 @@
+"""
+Each company's results are recorded as soon as it has been scraped, so that a run that dies partway through (a lambda
+timeout, Chrome crashing) can be rerun with --resume to skip the companies it already got through.
+
+One line per company:
+{"company_name": "", "relevant_jobs": [{"title": "", "id": "", ...}], "jobs_page_status": "SOME_JOB_FOUND", "stopped_early": false, "stopped_at_limit": false, "metrics": {...}, "page_fingerprint": {...}, "saved_request": {...}, "saved_request_failed": false}
+
+Companies that errored aren't recorded, so that resuming tries them again.
+"""
+
+import os
+import json
+import threading
+
+from models import *
+
+
+class Checkpoint:
+    """
+    Where the lines are stored is up to subclasses, see FileCheckpoint.
+    Opened with resume=False, the previous run's results are cleared.
+    """
+
+    def __init__(self, resume=False):
+        self._lock = threading.Lock()
+        self._results = {}  # company name -> result line of a previous run
+        if resume:
+            for line in self.read().splitlines():
+                if line.strip():
+                    result = json.loads(line)
+                    self._results[result["company_name"]] = result
+            if len(self._results) > 0:
+                print(f"Resuming, {len(self._results)} companies already checked")
+        else:
+            self.clear()
+
+    def read(self) -> str:
+        raise NotImplementedError("Unexpected call to base class")
+
+    def append(self, line: str):
+        raise NotImplementedError("Unexpected call to base class")
+
+    def clear(self):
+        raise NotImplementedError("Unexpected call to base class")
+
+    def get_result(self, company: Company) -> CompanyResult:
+        if company.name not in self._results:
+            return None
+        return result_from_dict(company, self._results[company.name])
+
+    def add_result(self, result: CompanyResult):
+        line = json.dumps(result_to_dict(result), default=str)  # crunchbase dates
+        with self._lock:
+            self.append(line)
+
+
+class FileCheckpoint(Checkpoint):
+    def __init__(self, path, resume=False):
+        self.path = path
+        super().__init__(resume)
+
+    def read(self) -> str:
+        if not os.path.exists(self.path):
+            return ""
+        with open(self.path) as f:
+            return f.read()
+
+    def append(self, line: str):
+        with open(self.path, "a") as f:
+            f.write(line + "\n")
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def result_to_dict(result: CompanyResult) -> dict:
+    """A checkpoint line. Shard workers send their results back the same way, errors included."""
+    result_dict = {
+        "company_name": result.company.name,
+        "relevant_jobs": [asdict(job) for job in result.relevant_jobs],
+        "jobs_page_status": (
+            result.jobs_page_status.name if result.jobs_page_status else None
+        ),
+        "stopped_early": result.stopped_early,
+        "stopped_at_limit": result.stopped_at_limit,
+        "metrics": asdict(result.metrics) if result.metrics else None,
+        "page_fingerprint": (
+            asdict(result.page_fingerprint) if result.page_fingerprint else None
+        ),
+        "saved_request": result.saved_request,
+        "saved_request_failed": result.saved_request_failed,
+    }
+    if result.error:
+        result_dict["error"] = {
+            "message": str(result.error),
+            "description": describe_error(result.error),
+        }
+    return result_dict
+
+
+def result_from_dict(company: Company, result_dict) -> CompanyResult:
+    return CompanyResult(
+        company=company,
+        relevant_jobs=[JobPosting(**job) for job in result_dict["relevant_jobs"]],
+        jobs_page_status=(
+            JobsPageStatus[result_dict["jobs_page_status"]]
+            if result_dict["jobs_page_status"]
+            else None
+        ),
+        stopped_early=result_dict["stopped_early"],
+        stopped_at_limit=result_dict.get("stopped_at_limit", False),
+        error=(
+            WorkerError(
+                result_dict["error"]["message"], result_dict["error"]["description"]
+            )
+            if "error" in result_dict
+            else None
+        ),
+        metrics=(
+            CompanyMetrics(**result_dict["metrics"])
+            if result_dict.get("metrics")
+            else CompanyMetrics(company_name=company.name)
+        ),
+        page_fingerprint=(
+            PageFingerprint(**result_dict["page_fingerprint"])
+            if result_dict.get("page_fingerprint")
+            else None
+        ),
+        saved_request=result_dict.get("saved_request"),
+        saved_request_failed=result_dict.get("saved_request_failed", False),
+    )
+
+
+def default_checkpoint_path(run_record_path):
+    path, _ = os.path.splitext(run_record_path)
+    return f"{path}_checkpoint.jsonl"
@@ -1,144 +1,305 @@
 import re
 import requests
 import json
+import importlib.util
 from models import *
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.action_chains import ActionChains
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import NoSuchElementException, WebDriverException
+from http_scrapers import (
+    iter_workday_job_pages,
+    workday_jobs_url,
+    TIMEOUT_SECONDS,
+    WORKDAY_MAX_PAGES,
+)
+from waits import wait_for, element_count_is_greater_than
+
+# New scrapers also need adding to scraper_registry.py, for configs to be able to name them
+
+# WebElement.text as Selenium's getVisibleText atom works it out, so that rows read here have the same text as when they
+# were read one element at a time: text in elements that aren't shown is left out, whitespace collapses as the element's
+# white-space style says, block elements go on their own lines and table cells are separated by a space, not innerText's
+# tab. Unlike the atom, it doesn't check whether an ancestor's overflow clips an element out of view.
+VISIBLE_TEXT_JS = """
+const INLINE_DISPLAYS = ["inline", "inline-block", "inline-table", "none", "table-cell", "table-column", "table-column-group"];
+const isBlank = (text) => /^[\\s\\u00a0]*$/.test(text);
+const hasPositiveSize = (el) => {
+    const rect = el.getBoundingClientRect();
+    if (rect.height > 0 && rect.width > 0) {
+        return true;
+    }
+    return getComputedStyle(el).overflow !== "hidden" && Array.from(el.childNodes).some(
+        (node) => node.nodeType === Node.TEXT_NODE || (node.nodeType === Node.ELEMENT_NODE && hasPositiveSize(node))
+    );
+};
+const isShown = (el, style, displayed, opacity) => {
+    if (el.tagName === "NOSCRIPT" || (el.tagName === "INPUT" && el.type === "hidden")) {
+        return false;
+    }
+    if (style.visibility === "hidden" || style.visibility === "collapse" || !displayed || opacity === 0) {
+        return false;
+    }
+    return hasPositiveSize(el);
+};
+const transformText = (text, textTransform) => {
+    if (textTransform === "uppercase") {
+        return text.toUpperCase();
+    }
+    if (textTransform === "lowercase") {
+        return text.toLowerCase();
+    }
+    if (textTransform === "capitalize") {
+        return text.replace(/(^|\\s)(\\S)/g, (_, space, letter) => space + letter.toUpperCase());
+    }
+    return text;
+};
+const visibleText = (root) => {
+    let displayed = true;
+    let opacity = 1;
+    for (let el = root.parentElement; el; el = el.parentElement) {
+        const style = getComputedStyle(el);
+        displayed = displayed && style.display !== "none";
+        opacity *= Number(style.opacity);
+    }
+    const lines = [""];
+    const appendText = (node, style) => {
+        let text = node.nodeValue.replace(/[\\u200b\\u200e\\u200f]/g, "").replace(/\\r\\n|\\r/g, "\\n");
+        if (style.whiteSpace === "normal" || style.whiteSpace === "nowrap") {
+            text = text.replace(/\\n/g, " ");
+        }
+        if (style.whiteSpace === "pre" || style.whiteSpace === "pre-wrap") {
+            text = text.replace(/[ \\f\\t\\v\\u2028\\u2029]/g, "\\u00a0");
+        } else {
+            text = text.replace(/[ \\f\\t\\v\\u2028\\u2029]+/g, " ");
+        }
+        text = transformText(text, style.textTransform);
+        const line = lines.pop();
+        lines.push(line + (line.endsWith(" ") && text.startsWith(" ") ? text.slice(1) : text));
+    };
+    const appendElement = (el, displayed, opacity) => {
+        if (el.tagName === "BR") {
+            lines.push("");
+            return;
+        }
+        const style = getComputedStyle(el);
+        displayed = displayed && style.display !== "none";
+        opacity *= Number(style.opacity);
+        const isCell = el.tagName === "TD" || style.display === "table-cell";
+        const isBlock = el.tagName !== "TD" && !INLINE_DISPLAYS.includes(style.display);
+        if (isBlock && !isBlank(lines[lines.length - 1])) {
+            lines.push("");
+        }
+        // Children can be shown when their parent isn't, by setting visibility: visible
+        const shown = isShown(el, style, displayed, opacity);
+        for (const node of el.childNodes) {
+            if (node.nodeType === Node.TEXT_NODE && shown) {
+                appendText(node, style);
+            } else if (node.nodeType === Node.ELEMENT_NODE) {
+                appendElement(node, displayed, opacity);
+            }
+        }
+        const line = lines[lines.length - 1];
+        if (isCell && line && !line.endsWith(" ")) {
+            lines[lines.length - 1] += " ";
+        }
+        if (isBlock && !isBlank(line)) {
+            lines.push("");
+        }
+    };
+    appendElement(root, displayed, opacity);
+    return lines
+        .map((line) => line.replace(/^[^\\S\\u00a0]+|[^\\S\\u00a0]+$/g, ""))
+        .join("\\n")
+        .replace(/^[^\\S\\u00a0]+|[^\\S\\u00a0]+$/g, "")
+        .replace(/\\u00a0/g, " ");
+};
+const hrefOf = (el) => (el && el.getAttribute("href") !== null ? el.href : null);
+"""
 
+EXTRACT_ROWS_JS = (
+    VISIBLE_TEXT_JS
+    + """
+const [rowSelector, linkSelector, containerSelector, linkTexts] = arguments;
+const container = containerSelector ? document.querySelector(containerSelector) : document;
+if (!container) {
+    return null;
+}
+return Array.from(container.querySelectorAll(rowSelector)).map((row) => {
+    let link = row;
+    if (linkTexts) {
+        const links = Array.from(row.querySelectorAll(linkSelector));
+        link = linkTexts.map((text) => links.find((a) => a.textContent === text)).find((a) => a);
+    } else if (linkSelector) {
+        link = row.querySelector(linkSelector);
+    }
+    return { text: visibleText(row), href: hrefOf(link) };
+});
+"""
+)
+
+
+def extract_rows(
+    driver, row_selector, link_selector="a", container_selector=None, link_texts=None
+) -> list[dict]:
+    """
+    Gets the text and link of every job row in one round trip to the browser, instead of a few per row.
+
+    row_selector: CSS selector for a job row, within container_selector if given.
+    link_selector: CSS selector for the row's link. None if the row is itself the link.
+    link_texts: If given, the link is the first of the row's links whose textContent is one of these, in order of preference.
+
+    Returns [{"text": <row's text like WebElement.text>, "href": <link's href, or None if there is no link>}]
+    """
+    rows = driver.execute_script(
+        EXTRACT_ROWS_JS, row_selector, link_selector, container_selector, link_texts
+    )
+    if rows is None:
+        raise NoSuchElementException(f"No element found for {container_selector}")
+    return rows
+
+
+def jobs_from_rows(rows, config=None) -> list[JobPosting]:
+    jobs = []
+    for row in rows:
+        title = row["text"]
+        if is_excluded(config, title):
+            continue
+        if row["href"] is None:
+            raise NoSuchElementException(f"No link found for job {title}")
+        jobs.append(
+            JobPosting(
+                title=title,
+                id=row["href"],
+                link=row["href"],
+            )
+        )
+    return jobs
 
-def is_excluded(config, title) -> bool:
-    if config and "exclude_search_terms" in config:
-        lower_title_words = set(title.lower().split())
-        exclude_terms = {excluded_word.lower() for excluded_word in config["exclude_search_terms"]}
-        if len(lower_title_words.intersection(exclude_terms)) > 0:
-            return True
-    return False
+
+def row_key(row) -> tuple[str, str]:
+    return row["text"], row["href"]
+
+
+def rows_are_in(page_rows, row_keys) -> bool:
+    return len(page_rows) > 0 and all(row_key(row) in row_keys for row in page_rows)
+
+
+def stop_reason(known_jobs: KnownJobs, limit) -> str:
+    """For logging why a scraper that pages through results stopped before the last page, if it did"""
+    if known_jobs is None:
+        return ""
+    if known_jobs.stopped_early:
+        return "(stopped at already seen jobs)"
+    if known_jobs.stopped_at_limit:
+        return f"({limit})"
+    return ""
 
 
 # https://job-boards.greenhouse.io/company
+@declare_scraper(
+    ready_condition=ReadyCondition((By.CLASS_NAME, "job-post")),
+    page_cache=True,
+)
 class GreenhousePage:
     @staticmethod
     def get_jobs(driver, config=None):
-        job_elements = driver.find_elements(By.CLASS_NAME, "job-post")
-        jobs = []
-        for job in job_elements:
-            title = job.text
-            if is_excluded(config, title):
-                continue
-            link_url = job.find_element(By.TAG_NAME, "a").get_attribute("href")
-            jobs.append(
-                JobPosting(
-                    title=title,
-                    id=link_url,
-                    link=link_url,
-                )
-            )
-        return jobs
+        rows = extract_rows(driver, ".job-post")
+        return jobs_from_rows(rows, config)
 
 
 # https://boards.greenhouse.io/embed/job_board?for=company
+@declare_scraper(
+    ready_condition=ReadyCondition((By.CLASS_NAME, "opening")),
+    page_cache=True,
+)
 class GreenhouseEmbeddedStandalonePage:
     @staticmethod
     def get_jobs(driver, config=None):
-        job_elements = driver.find_elements(By.CLASS_NAME, "opening")
-        jobs = []
-        for job in job_elements:
-            title = job.text
-            if is_excluded(config, title):
-                continue
-            link_url = job.find_element(By.TAG_NAME, "a").get_attribute("href")
-            jobs.append(
-                JobPosting(
-                    title=title,
-                    id=link_url,
-                    link=link_url,
-                )
-            )
-        return jobs
+        rows = extract_rows(driver, ".opening")
+        return jobs_from_rows(rows, config)
 
 
 # Company career page that contains an iframe to a GreenhouseEmbeddedStandalonePage. Using GreenhouseEmbeddedStandalonePage is likely more stable if you can use it directly.
+@declare_scraper(ready_condition=ReadyCondition((By.ID, "grnhse_iframe")), cost=7)
 class GreenhouseEmbeddedPage:
     @staticmethod
     def get_jobs(driver, config=None):
-        time.sleep(2)
+        wait_for(driver, EC.presence_of_element_located((By.ID, "grnhse_iframe")), 2)
         greenhouse_iframe = driver.find_element(By.ID, "grnhse_iframe")
         assert greenhouse_iframe.tag_name == "iframe"
         driver.switch_to.frame(greenhouse_iframe)
+        wait_for(driver, EC.presence_of_element_located((By.CLASS_NAME, "opening")), 2)
         return GreenhouseEmbeddedStandalonePage.get_jobs(driver)
 
 
+@declare_scraper(
+    ready_condition=ReadyCondition((By.CLASS_NAME, "posting")),
+    page_cache=True,
+)
 class LeverCoPage:
     @staticmethod
     def get_jobs(driver, config=None):
-        job_elements = driver.find_elements(By.CLASS_NAME, "posting")
-        jobs = []
-        for job in job_elements:
-            title = job.text
-            if is_excluded(config, title):
-                continue
-            link_url = job.find_element(By.TAG_NAME, "a").get_attribute("href")
-            jobs.append(
-                JobPosting(
-                    title=title,
-                    id=link_url,
-                    link=link_url,
-                )
-            )
-        return jobs
+        rows = extract_rows(driver, ".posting")
+        return jobs_from_rows(rows, config)
 
 
+@declare_scraper(
+    ready_condition=ReadyCondition((By.CSS_SELECTOR, "main li"), count_stable_ms=500),
+    cost=6,
+    page_cache=True,
+)
 class BambooPage:
     @staticmethod
     def get_jobs(driver, config=None):
-        job_elements = driver.find_element(By.TAG_NAME, "main").find_elements(
-            By.TAG_NAME, "li"
-        )
+        rows = extract_rows(driver, "li", container_selector="main")
         jobs = []
-        for job in job_elements:
-            title = job.text
+        for row in rows:
+            title = row["text"]
             if is_excluded(config, title):
                 continue
+            if row["href"] is None:
+                raise NoSuchElementException(f"No link found for job {title}")
             jobs.append(
                 JobPosting(
                     title=title,
-                    id=job.find_element(By.TAG_NAME, "a").get_attribute("href"),
+                    id=row["href"],
                 )
             )
         return jobs
 
 
+@declare_scraper(
+    ready_condition=ReadyCondition(
+        (By.CSS_SELECTOR, 'li[data-ui="job"]'), count_stable_ms=500
+    ),
+    cost=6,
+    page_cache=True,
+)
 class WorkablePage:
     @staticmethod
     def get_jobs(driver, config=None):
-        container = driver.find_element(By.ID, "jobs")
-        job_elements = container.find_elements(By.XPATH, '//li[@data-ui="job"]')
-        jobs = []
-        for job in job_elements:
-            title = job.text
-            if is_excluded(config, title):
-                continue
-            link_url = job.find_element(By.TAG_NAME, "a").get_attribute("href")
-            jobs.append(
-                JobPosting(
-                    title=title,
-                    id=link_url,
-                    link=link_url
-                )
-            )
-        return jobs
+        rows = extract_rows(driver, 'li[data-ui="job"]', container_selector="#jobs")
+        return jobs_from_rows(rows, config)
 
 
+@declare_scraper(
+    needs_performance_log=True,
+    ready_condition=ReadyCondition(
+        (By.CSS_SELECTOR, '[data-automation-id="jobTitle"]')
+    ),
+    cost=15,
+)
 class WorkdayPage:
     @staticmethod
     def get_jobs(driver, config=None):
-        time.sleep(1)
-
-        PAUSE_TIME = 2
+        # Max seconds to wait for each page of results
+        PAGE_TIMEOUT = 5
+        JOB_TITLE = (By.CSS_SELECTOR, '[data-automation-id="jobTitle"]')
+        wait_for(driver, EC.presence_of_element_located(JOB_TITLE), PAGE_TIMEOUT)
         driver.execute_script(
             "window.scrollTo(0, document.body.scrollHeight);"
         )  # Scroll to bottom
-        time.sleep(PAUSE_TIME)
 
         click_counter = 0
         while (
@@ -152,14 +313,16 @@ class WorkdayPage:
                 By.XPATH, '//button[@data-uxi-widget-type="stepToNextButton"]'
             ).is_displayed()
         ):
+            first_job_title = driver.find_element(*JOB_TITLE)
             driver.find_element(
                 By.XPATH, '//button[@data-uxi-widget-type="stepToNextButton"]'
             ).click()
-            time.sleep(PAUSE_TIME)
+            # The list of jobs is re-rendered once the next page has been fetched
+            wait_for(driver, EC.staleness_of(first_job_title), PAGE_TIMEOUT)
+            wait_for(driver, EC.presence_of_element_located(JOB_TITLE), PAGE_TIMEOUT)
             driver.execute_script(
                 "window.scrollTo(0, document.body.scrollHeight);"
             )  # Scroll to bottom
-            time.sleep(PAUSE_TIME)
             click_counter += 1
 
         print("Workday clicked next", click_counter, "times")
@@ -210,57 +373,121 @@ class WorkdayPage:
         return jobs
 
 
+# Same jobs as WorkdayPage, but instead of clicking through every page of results, pages through the JSON endpoint
+# the page loads its jobs from, stopping once it gets to jobs that are already in the run record.
+@declare_scraper(
+    needs_performance_log=True,
+    ready_condition=WorkdayPage.ready_condition,
+    paginates=True,
+    cost=8,
+)
+class WorkdayDirectPage:
+    @staticmethod
+    def get_jobs(driver, config=None, known_jobs: KnownJobs = None):
+        jobs_url, search = find_workday_jobs_request(driver)
+        cookies = {cookie["name"]: cookie["value"] for cookie in driver.get_cookies()}
+        base_url = driver.current_url.split("?")[0]
+
+        jobs = []
+        page_count = 0
+        for job_postings in iter_workday_job_pages(
+            jobs_url, search, cookies, known_jobs
+        ):
+            page_count += 1
+            page_jobs = []
+            for job in job_postings:
+                if (
+                    "title" in job
+                ):  # there are inconsistently sometimes entries that have no title or externalPath, just the bulletFields field
+                    title = job["title"]
+                    if is_excluded(config, title):
+                        continue
+                    link_url = base_url + job["externalPath"]
+                    page_jobs.append(
+                        JobPosting(
+                            title=title,
+                            id=link_url,
+                            link=link_url,
+                        )
+                    )
+            jobs += page_jobs
+            if known_jobs and known_jobs.page_is_known(page_jobs):
+                known_jobs.stop_early()
+                break
+
+        print(
+            "Workday got",
+            page_count,
+            "pages",
+            stop_reason(known_jobs, f"capped at {WORKDAY_MAX_PAGES}"),
+        )
+        return jobs
+
+
+def find_workday_jobs_request(driver):
+    """The jobs endpoint and search the page requested its first page of jobs with, or the usual ones if it can't be found"""
+    try:
+        logs = driver.get_log("performance")
+    except WebDriverException:
+        logs = []  # performance logging isn't on
+    for log in logs:
+        if "/wday/cxs/" not in log["message"]:
+            continue
+        message = json.loads(log["message"])["message"]
+        if message["method"] != "Network.requestWillBeSent":
+            continue
+        request = message["params"]["request"]
+        if request["method"] == "POST" and request["url"].split("?")[0].endswith(
+            "/jobs"
+        ):
+            search = json.loads(request.get("postData", "{}"))
+            search.pop("limit", None)
+            search.pop("offset", None)
+            return request["url"], search
+    return workday_jobs_url(driver.current_url), None
+
+
+@declare_scraper(
+    ready_condition=ReadyCondition(network_idle_ms=500), cost=6, page_cache=True
+)
 class RipplingPage:
     @staticmethod
     def get_jobs(driver, config=None):
-        all_anchors = driver.find_elements(By.TAG_NAME, "a")
-        job_elements = [
-            el.find_element(By.XPATH, "./../..")
-            for el in all_anchors
-            if "jobs" in el.get_attribute("href") and el.text != "Apply"
-        ]
-        jobs = []
-        for job in job_elements:
-            title = job.text
-            if is_excluded(config, title):
-                continue
-            link_url = job.find_element(By.TAG_NAME, "a").get_attribute("href")
-            jobs.append(
-                JobPosting(
-                    title=title
-                    + " (note this only shows one location but there might be multiple for this same link)",
-                    id=link_url,
-                    link=link_url,
-                )
-            )
+        # Job rows are the grandparents of links to a job, other than the Apply buttons
+        rows = driver.execute_script(
+            VISIBLE_TEXT_JS
+            + """
+            return Array.from(document.querySelectorAll("a"))
+                .filter((a) => (hrefOf(a) || "").includes("jobs") && visibleText(a) !== "Apply")
+                .map((a) => a.parentElement.parentElement)
+                .map((row) => ({ text: visibleText(row), href: hrefOf(row.querySelector("a")) }));
+            """
+        )
+        jobs = jobs_from_rows(rows, config)
+        for job in jobs:
+            job.title += " (note this only shows one location but there might be multiple for this same link)"
         return jobs
 
 
 # https://jobs.ashbyhq.com/company
+@declare_scraper(
+    ready_condition=ReadyCondition((By.CLASS_NAME, "ashby-job-posting-brief-list")),
+    page_cache=True,
+)
 class AshbyPage:
     @staticmethod
     def get_jobs(driver, config=None):
-        root = driver.find_element(By.ID, "root")
-        containers = root.find_elements(By.CLASS_NAME, "ashby-job-posting-brief-list")
-        jobs = []
-        for container in containers:
-            job_elements = container.find_elements(By.TAG_NAME, "a")
-            for job in job_elements:
-                title = job.text
-                if is_excluded(config, title):
-                    continue
-                link_url = job.get_attribute("href")
-                jobs.append(
-                    JobPosting(
-                        title=title,
-                        id=link_url,
-                        link=link_url,
-                    )
-                )
-        return jobs
+        rows = extract_rows(
+            driver,
+            ".ashby-job-posting-brief-list a",
+            link_selector=None,
+            container_selector="#root",
+        )
+        return jobs_from_rows(rows, config)
 
 
 # Company career page that contains an iframe to a AshbyPage. Using AshbyPage is likely more stable if you can use it directly.
+@declare_scraper(ready_condition=ReadyCondition((By.ID, "ashby_embed_iframe")), cost=7)
 class AshbyEmbeddedPage:
     @staticmethod
     def get_jobs(driver, config=None):
@@ -271,177 +498,238 @@ class AshbyEmbeddedPage:
         return AshbyPage.get_jobs(driver, config)
 
 
+@declare_scraper(
+    ready_condition=ReadyCondition((By.CSS_SELECTOR, ".jobs-list li.list-group-item")),
+    page_cache=True,
+)
 class ApplyToJobPage:
     @staticmethod
     def get_jobs(driver, config=None):
-        container = driver.find_element(By.CLASS_NAME, "jobs-list")
-        job_elements = container.find_elements(By.CSS_SELECTOR, "li.list-group-item")
-        jobs = []
-        for job in job_elements:
-            title = job.text
-            if is_excluded(config, title):
-                continue
-            link_url = job.find_element(By.TAG_NAME, "a").get_attribute("href")
-            jobs.append(
-                JobPosting(
-                    title=title,
-                    id=link_url,
-                    link=link_url,
-                )
-            )
-        return jobs
+        rows = extract_rows(
+            driver, "li.list-group-item", container_selector=".jobs-list"
+        )
+        return jobs_from_rows(rows, config)
 
 
+@declare_scraper(
+    ready_condition=ReadyCondition((By.CSS_SELECTOR, ".openings-body li.opening-job")),
+    page_cache=True,
+)
 class SmartRecruitersPage:
     @staticmethod
     def get_jobs(driver, config=None):
-        container = driver.find_element(By.CLASS_NAME, "openings-body")
-        job_elements = container.find_elements(By.CSS_SELECTOR, "li.opening-job")
-        jobs = []
-        for job in job_elements:
-            title = job.text
-            if is_excluded(config, title):
-                continue
-            link_url = job.find_element(By.TAG_NAME, "a").get_attribute("href")
-            jobs.append(
-                JobPosting(
-                    title=title,
-                    id=link_url,
-                    link=link_url,
-                )
-            )
-        return jobs
+        rows = extract_rows(
+            driver, "li.opening-job", container_selector=".openings-body"
+        )
+        return jobs_from_rows(rows, config)
 
 
 """
-Only clicks Next max 20 times.
+Stops clicking Next once a page only has jobs already in the run record.
+Otherwise only clicks Next max 20 times if there are no jobs in the run record yet, or 100 times if there are.
 Chose to cap because long runs can make the scraper bug out with some devtools detached error. 20 might still be too much.
 """
 
 
+@declare_scraper(
+    ready_condition=ReadyCondition((By.CLASS_NAME, "section--search-jobs")),
+    paginates=True,
+    cost=10,
+)
 class AvaturePage:
     @staticmethod
-    def get_jobs(driver, config=None):
-        MAX_LOAD_MORE = 20
-        PAUSE_TIME = 1
+    def get_jobs(driver, config=None, known_jobs: KnownJobs = None):
+        MAX_LOAD_MORE = 100 if known_jobs else 20
+        PAGE_TIMEOUT = 5
         click_counter = 0
         jobs = []
 
-        while (
-            click_counter < MAX_LOAD_MORE
-            and len(driver.find_elements(By.LINK_TEXT, "Next >>")) > 0
-        ):
+        while True:
             container = driver.find_element(By.CLASS_NAME, "section--search-jobs")
-            job_elements = container.find_elements(
-                By.CLASS_NAME, "article__header__text"
+            rows = extract_rows(
+                driver,
+                ".article__header__text",
+                link_selector=".title a",
+                container_selector=".section--search-jobs",
             )
-            for job in job_elements:
-                link_url = (
-                    job.find_element(By.CLASS_NAME, "title")
-                    .find_element(By.TAG_NAME, "a")
-                    .get_attribute("href")
-                )
-                jobs.append(
+            page_jobs = []
+            for row in rows:
+                if row["href"] is None:
+                    raise NoSuchElementException(f"No link found for job {row["text"]}")
+                page_jobs.append(
                     JobPosting(
-                        title=job.text,
-                        id=link_url,
-                        link=link_url,
+                        title=row["text"],
+                        id=row["href"],
+                        link=row["href"],
                     )
                 )
+            jobs += page_jobs
+            if known_jobs and known_jobs.page_is_known(page_jobs):
+                known_jobs.stop_early()
+                break
+            if len(driver.find_elements(By.LINK_TEXT, "Next >>")) == 0:
+                break
+            if click_counter >= MAX_LOAD_MORE:
+                if known_jobs is not None:
+                    known_jobs.stop_at_limit()
+                break
+
             next_button = driver.find_element(By.LINK_TEXT, "Next >>")
             ActionChains(driver).move_to_element(next_button).perform()
             # js click because there's a potential cookies popup
             driver.execute_script("arguments[0].click();", next_button)
 
-            time.sleep(PAUSE_TIME)
+            # Next is a link to the next page of results
+            wait_for(driver, EC.staleness_of(container), PAGE_TIMEOUT)
+            wait_for(
+                driver,
+                EC.presence_of_element_located((By.CLASS_NAME, "section--search-jobs")),
+                PAGE_TIMEOUT,
+            )
             click_counter += 1
         print(
             "Avature clicked next",
             click_counter,
-            f"times (capped at {MAX_LOAD_MORE})",
+            "times",
+            stop_reason(known_jobs, f"capped at {MAX_LOAD_MORE}"),
         )
         return jobs
 
 
 """
-Only clicks Load More max 5 times.
+Stops clicking Load More once the jobs it loaded are all already in the run record.
+Otherwise only clicks Load More max 5 times if there are no jobs in the run record yet, or 50 times if there are.
 Chose to cap because long runs can make the scraper bug out with some devtools detached error.
 And at a weekdays scrape rate, 5 clicks usually goes far back enough for the frequency of new jobs being posted.
 """
 
 
+@declare_scraper(
+    ready_condition=ReadyCondition((By.CLASS_NAME, "job-item"), count_stable_ms=500),
+    paginates=True,
+    cost=10,
+    shares_board=True,
+)
 class BitsInBioPage:
     @staticmethod
-    def get_jobs(driver, config=None):
-        PAUSE_TIME = 1
-        MAX_LOAD_MORE = 5
+    def get_jobs(
+        driver,
+        config=None,
+        known_jobs: KnownJobs = None,
+        shared_board: SharedBoard = None,
+    ):
+        PAGE_TIMEOUT = 3
+        MAX_LOAD_MORE = 50 if known_jobs or shared_board else 5
+        # Rows shared with other runs are paged through up to the rows stored last, not only up to the jobs this run
+        # has seen, or in full if there are none
+        stops_early = known_jobs and not shared_board
+        previous_rows = (
+            {row_key(row) for row in shared_board.previous}
+            if shared_board and shared_board.previous
+            else None
+        )
+        continues_previous = False
+        JOB_ITEM = (By.CLASS_NAME, "job-item")
         driver.execute_script(
             "window.scrollTo(0, document.body.scrollHeight);"
         )  # Scroll to bottom
-        time.sleep(PAUSE_TIME)
 
+        rows = BitsInBioPage.get_loaded_rows(driver)
+        jobs = BitsInBioPage.jobs_from_board(rows, config)
+        page_start = 0  # index of the first job loaded by the last click
+        row_start = 0
         click_counter = 0
         while (
-            click_counter < MAX_LOAD_MORE
-            and len(driver.find_elements(By.XPATH, '//a[@aria-label="Next Page"]')) > 0
+            len(driver.find_elements(By.XPATH, '//a[@aria-label="Next Page"]')) > 0
             and driver.find_element(
                 By.XPATH, '//a[@aria-label="Next Page"]'
             ).is_displayed()
         ):
+            if stops_early and known_jobs.page_is_known(jobs[page_start:]):
+                known_jobs.stop_early()
+                break
+            if previous_rows and rows_are_in(rows[row_start:], previous_rows):
+                continues_previous = True
+                break
+            if click_counter >= MAX_LOAD_MORE:
+                if known_jobs is not None:
+                    known_jobs.stop_at_limit()
+                break
+
             load_more = driver.find_element(By.XPATH, '//a[@aria-label="Next Page"]')
             ActionChains(driver).move_to_element(load_more).perform()
+            job_count = len(driver.find_elements(*JOB_ITEM))
             load_more.click()
 
-            time.sleep(PAUSE_TIME)
+            # The next page of jobs is appended to the list
+            wait_for(
+                driver, element_count_is_greater_than(JOB_ITEM, job_count), PAGE_TIMEOUT
+            )
             driver.execute_script(
                 "window.scrollTo(0, document.body.scrollHeight);"
             )  # Scroll to bottom
-            time.sleep(PAUSE_TIME)
             click_counter += 1
+            page_start = len(jobs)
+            row_start = len(rows)
+            rows = BitsInBioPage.get_loaded_rows(driver)
+            jobs = BitsInBioPage.jobs_from_board(rows, config)
 
         print(
             "Bits in Bio clicked next",
             click_counter,
-            f"times (capped at {MAX_LOAD_MORE})",
+            "times",
+            (
+                "(stopped at the rows stored last)"
+                if continues_previous
+                else stop_reason(known_jobs, f"capped at {MAX_LOAD_MORE}")
+            ),
         )
+        if continues_previous:
+            # The rest of the board is what it was when stored last
+            loaded_rows = {row_key(row) for row in rows}
+            rows = rows + [
+                row for row in shared_board.previous if row_key(row) not in loaded_rows
+            ]
+            jobs = BitsInBioPage.jobs_from_board(rows, config)
+            shared_board.continues_previous = True
+        if shared_board:
+            shared_board.fetched = rows
+        return jobs
 
-        container = driver.find_element(By.CLASS_NAME, "job-list")
-        job_elements = container.find_elements(By.CLASS_NAME, "job-item")
+    @staticmethod
+    def get_loaded_rows(driver):
+        return extract_rows(
+            driver,
+            ".job-item",
+            container_selector=".job-list",
+            link_texts=["Apply Now", "Contact"],
+        )
+
+    @staticmethod
+    def jobs_from_board(rows, config=None):
         jobs = []
-        for job in job_elements:
-            title = job.text
+        for row in rows:
+            title = row["text"]
             if is_excluded(config, title):
                 continue
-            button_row = job.find_element(By.CLASS_NAME, "faq-answer").find_element(
-                By.CLASS_NAME, "button-row"
-            )
-            links = [el for el in job.find_elements(By.TAG_NAME, "a")]
-            link_el = next(
-                (el for el in links if el.get_attribute("textContent") == "Apply Now"),
-                None,
-            )
-            if not link_el:
-                link_el = next(
-                    (
-                        el
-                        for el in links
-                        if el.get_attribute("textContent") == "Contact"
-                    ),
-                    None,
-                )
-                assert link_el, "Error finding Apply or Contact"
-            link_url = link_el.get_attribute("href")
-
+            assert row["href"], "Error finding Apply or Contact"
             jobs.append(
                 JobPosting(
                     title=title,
-                    id=link_url,
-                    link=link_url,
+                    id=row["href"],
+                    link=row["href"],
                 )
             )
         return jobs
 
 
+def contains_any_pattern(terms):
+    """Matches text that contains any of terms (case sensitive), None if there are no terms"""
+    if not terms:
+        return None
+    return re.compile("|".join(re.escape(term) for term in terms))
+
+
 """
 Only gets jobs from the last 10 days
 
@@ -459,203 +747,312 @@ excluded_companies: If specified, will not include if company
 countries: If specified, will only include if the Country column contains any of these terms, or is empty. Locations are CASE SENTITIVE.
 local_locations: If specified, will label with a 🏠 emoji. Locations are CASE SENTITIVE.
 only_include_local_or_remote: If true, will only include if location is in local_locations, or remote allowed
-"""
 
+Job ids are the Airtable record ids. Jobs link to the view's column of links to apply, if it has one, which is how a job
+that a company's own page lists too is only reported once.
 
-class ClimateTechListPage(JobsPage):
-    @staticmethod
-    def get_jobs(driver, config=None):
-        logs = driver.get_log("performance")
-        networks = []
-
-        data = None
-        for log in logs:
-            message = log["message"]
-            if "readSharedViewData" in message:
-                message_dict = json.loads(log["message"])
-                if message_dict["message"]["method"] == "Network.requestWillBeSent":
-                    driver.execute_script("window.stop();")
-                    request_info = message_dict["message"]["params"]["request"]
-                    url = request_info["url"]
-                    if "allowMsgpackOfResult" not in url:
-                        headers = request_info["headers"]
-                        if headers["x-time-zone"] == "undefined":
-                            # It is undefined running on a lambda
-                            headers["x-time-zone"] = "America/New_York"
-                        data = requests.get(url, headers=headers).json()
-                        print("got data")
-
-        print("data", data.keys())
-        columns = data["data"]["table"]["columns"]
-        # order determines title composition
-        relevant_column_names = [
-            "Position Title",
-            "Company",
-            "Country",
-            "Job Location",
-            "Date first listed",
-            "Remote",
-            # "Company Vertical", values are dict {'valuesByForeignRowId': {'rec505JOieCJNncoi': ['selCodWauUmGOavwy']}, 'foreignRowIdOrder': ['rec505JOieCJNncoi']}
-            # "Org Type", values are dict {'valuesByForeignRowId': {'rec505JOieCJNncoi': 'For-profit'}, 'foreignRowIdOrder': ['rec505JOieCJNncoi']}
-        ]
+The Airtable request the page makes is saved in the run record, and later runs make it again without a browser until it
+stops working. If msgpack is installed (pip3 install msgpack), the smaller msgpack response is used when the page asks
+for one.
 
-        column_order_for_other_locations = ["Job Location"] + [
-            x for x in relevant_column_names if x != "Job Location"
-        ]
-
-        relevant_column_ids = {
-            name: next(
-                col["id"] for col in columns if col["name"].lower() == name.lower()
-            )
-            for name in relevant_column_names
-        }
-
-        country_choices = next(
-            col["typeOptions"]["choices"] for col in columns if col["name"] == "Country"
-        )
-        id_to_country = {key: value["name"] for key, value in country_choices.items()}
-
-        rows = data["data"]["table"]["rows"]
-
-        today = datetime.datetime.now(datetime.timezone.utc)
-        delta = datetime.timedelta(days=10)
-        time_cutoff = today - delta
-
-        def has_relevant_title(row):
-            title = row["cellValuesByColumnId"][
-                relevant_column_ids["Position Title"]
-            ]
-            return not is_excluded(config, title)
-
-        def has_relevant_location(row):
-            # Assumes capitalization
-            location = row["cellValuesByColumnId"][relevant_column_ids["Job Location"]]
-
-            if (
-                config
-                and "excluded_locations" in config
-                and any(term in location for term in set(config["excluded_locations"]))
-            ):
-                return False
+The rows can be shared with other users' runs (see board_store.py), each filtering them with its own config.
+"""
 
-            if location.strip() == "":
-                return True
 
-            if (
-                config
-                and "local_locations" in config
-                and any(term in location for term in set(config["local_locations"]))
-            ):
-                return True
+@declare_scraper(needs_performance_log=True, saves_request=True, shares_board=True)
+class ClimateTechListPage(JobsPage):
+    @staticmethod
+    def get_jobs(
+        driver,
+        config=None,
+        saved_request: SavedRequest = None,
+        shared_board: SharedBoard = None,
+    ):
+        error = None
+        for request in find_shared_view_requests(driver):
+            try:
+                data = fetch_shared_view(request)
+            except Exception as e:
+                error = e
+                continue
+            if saved_request:
+                saved_request.found = request
+            if shared_board:
+                shared_board.fetched = shared_view_table(data)
+            return jobs_from_shared_view(data, config)
+        raise error if error else Exception("No readSharedViewData request found")
+
+    # Makes the request get_jobs found last run again, without the browser
+    @staticmethod
+    def fetch_jobs(
+        jobs_page,
+        config=None,
+        saved_request: SavedRequest = None,
+        shared_board: SharedBoard = None,
+    ):
+        data = fetch_shared_view(saved_request.saved)
+        if shared_board:
+            shared_board.fetched = shared_view_table(data)
+        return jobs_from_shared_view(data, config)
 
-            if config and "countries" in config:
-                if relevant_column_ids["Country"] not in row["cellValuesByColumnId"]:
-                    # no Country data
-                    return True
-                if (
-                    not len(row["cellValuesByColumnId"][relevant_column_ids["Country"]])
-                    > 0
-                ):
-                    print(row["cellValuesByColumnId"][relevant_column_ids["Country"]])
-                if (
-                    len(
-                        {
-                            id_to_country[country]
-                            for country in row["cellValuesByColumnId"][
-                                relevant_column_ids["Country"]
-                            ]
-                        }.intersection(set(config["countries"]))
-                    )
-                    > 0
-                ):
-                    return True
+    @staticmethod
+    def jobs_from_board(rows, config=None):
+        return jobs_from_shared_view(rows, config)
+
+
+def find_shared_view_requests(driver) -> list[dict]:
+    """
+    The requests the Airtable view made for its data, from the performance log, in the order to try them: the
+    msgpack variant (a smaller response, quicker to decode) if msgpack is installed, then the JSON one
+    """
+    json_requests = []
+    msgpack_requests = []
+    for log in driver.get_log("performance"):
+        message = log["message"]
+        if "readSharedViewData" in message:
+            message_dict = json.loads(log["message"])
+            if message_dict["message"]["method"] == "Network.requestWillBeSent":
+                driver.execute_script("window.stop();")
+                request_info = message_dict["message"]["params"]["request"]
+                headers = request_info["headers"]
+                if headers.get("x-time-zone") == "undefined":
+                    # It is undefined running on a lambda
+                    headers["x-time-zone"] = "America/New_York"
+                request = {"url": request_info["url"], "headers": headers}
+                if "allowMsgpackOfResult" in request["url"]:
+                    msgpack_requests.append(request)
                 else:
-                    return False
-
+                    json_requests.append(request)
+    # The last request made has the latest data
+    json_requests.reverse()
+    msgpack_requests.reverse()
+    if importlib.util.find_spec("msgpack") is None:
+        return json_requests
+    return msgpack_requests + json_requests
+
+
+def fetch_shared_view(request) -> dict:
+    response = requests.get(
+        request["url"], headers=request["headers"], timeout=TIMEOUT_SECONDS
+    )
+    response.raise_for_status()
+    if "msgpack" in response.headers.get("Content-Type", ""):
+        # Optional, only requested if it's installed
+        import msgpack
+
+        data = msgpack.unpackb(response.content)
+    else:
+        data = response.json()
+    if "table" not in data.get("data", {}):
+        raise Exception(f"Unexpected readSharedViewData response: {list(data.keys())}")
+    print("got data")
+    return data
+
+
+def shared_view_table(data) -> dict:
+    """Only the part of a readSharedViewData response that jobs_from_shared_view reads, to share"""
+    table = data["data"]["table"]
+    return {"data": {"table": {"columns": table["columns"], "rows": table["rows"]}}}
+
+
+APPLY_COLUMN_NAME = re.compile(r"\bapply\b", re.IGNORECASE)
+LINK_COLUMN_NAME = re.compile(r"\b(link|url)\b", re.IGNORECASE)
+# Columns of links that aren't to the job, like the company's website, which would make all its jobs look the same
+OTHER_LINK_COLUMN_NAME = re.compile(
+    r"\b(company|website|homepage|logo|linkedin)\b", re.IGNORECASE
+)
+
+
+def apply_link_column_id(columns) -> str:
+    """
+    The view's column of links to apply for each job, None if it has none. Found by its name (apply, then link or url),
+    or else as the only URL column that isn't named like a link to something else.
+    """
+    for column in columns:
+        if APPLY_COLUMN_NAME.search(column["name"]):
+            return column["id"]
+    for column in columns:
+        if LINK_COLUMN_NAME.search(column["name"]) and not (
+            OTHER_LINK_COLUMN_NAME.search(column["name"])
+        ):
+            return column["id"]
+    url_column_ids = [
+        column["id"]
+        for column in columns
+        if (
+            column["type"] == "url"
+            or column.get("typeOptions", {}).get("validatorName") == "url"
+        )
+        and not OTHER_LINK_COLUMN_NAME.search(column["name"])
+    ]
+    return url_column_ids[0] if len(url_column_ids) == 1 else None
+
+
+def jobs_from_shared_view(data, config=None) -> list[JobPosting]:
+    print("data", data.keys())
+    columns = data["data"]["table"]["columns"]
+    # order determines title composition
+    relevant_column_names = [
+        "Position Title",
+        "Company",
+        "Country",
+        "Job Location",
+        "Date first listed",
+        "Remote",
+        # "Company Vertical", values are dict {'valuesByForeignRowId': {'rec505JOieCJNncoi': ['selCodWauUmGOavwy']}, 'foreignRowIdOrder': ['rec505JOieCJNncoi']}
+        # "Org Type", values are dict {'valuesByForeignRowId': {'rec505JOieCJNncoi': 'For-profit'}, 'foreignRowIdOrder': ['rec505JOieCJNncoi']}
+    ]
+
+    column_order_for_other_locations = ["Job Location"] + [
+        x for x in relevant_column_names if x != "Job Location"
+    ]
+
+    relevant_column_ids = {
+        name: next(col["id"] for col in columns if col["name"].lower() == name.lower())
+        for name in relevant_column_names
+    }
+
+    country_choices = next(
+        col["typeOptions"]["choices"] for col in columns if col["name"] == "Country"
+    )
+    id_to_country = {key: value["name"] for key, value in country_choices.items()}
+
+    rows = data["data"]["table"]["rows"]
+
+    today = datetime.datetime.now(datetime.timezone.utc)
+    delta = datetime.timedelta(days=10)
+    time_cutoff = today - delta
+
+    # Everything from the config is looked up once, rather than for each row
+    config = config if config else {}
+    excluded_locations = contains_any_pattern(config.get("excluded_locations"))
+    local_locations = contains_any_pattern(config.get("local_locations"))
+    relevant_country_ids = None
+    if "countries" in config:
+        countries = set(config["countries"])
+        relevant_country_ids = {
+            country_id
+            for country_id, country in id_to_country.items()
+            if country in countries
+        }
+    excluded_companies = (
+        set(config["excluded_companies"]) if "excluded_companies" in config else None
+    )
+
+    title_id = relevant_column_ids["Position Title"]
+    company_id = relevant_column_ids["Company"]
+    country_column_id = relevant_column_ids["Country"]
+    location_id = relevant_column_ids["Job Location"]
+    remote_id = relevant_column_ids["Remote"]
+    # So that a job the company's own page has too is only reported once, see posting_key
+    link_id = apply_link_column_id(columns)
+
+    # Each filter is applied to the whole column of rows left by the one before: recent, location, title, company.
+    # Only in that order, because the cells a filter reads aren't always there in rows an earlier one rules out.
+    # time created in climatetechlist, not posting time
+    recent_rows = [
+        row
+        for row in rows
+        if datetime.datetime.fromisoformat(row["createdTime"]) >= time_cutoff
+    ]
+    recent_cells = [row["cellValuesByColumnId"] for row in recent_rows]
+    # Assumes capitalization
+    locations = [cells[location_id] for cells in recent_cells]
+    is_local = [
+        local_locations is not None and local_locations.search(location) is not None
+        for location in locations
+    ]
+
+    def has_relevant_location(index):
+        location = locations[index]
+        if excluded_locations and excluded_locations.search(location):
+            return False
+
+        if location.strip() == "" or is_local[index]:
             return True
 
-        def should_exclude_company(row):
-            if config and "excluded_companies" in config:
-                return row["cellValuesByColumnId"][
-                    relevant_column_ids["Company"]
-                ] in set(config["excluded_companies"])
-
-        def is_relevant(row):
-            was_created_recently = (
-                datetime.datetime.fromisoformat(row["createdTime"]) >= time_cutoff
-            )
-
-            # dynamically calls
-            return (
-                was_created_recently
-                and has_relevant_location(row)
-                and has_relevant_title(row)
-                and not should_exclude_company(row)
-            )
-
-        def format_title(row, column_names):
-            cols = []
-            for name in column_names:
-                if (
-                    name == "Country"
-                    and relevant_column_ids["Country"] in row["cellValuesByColumnId"]
-                ):
-                    cols.append(
-                        ", ".join(
-                            [
-                                id_to_country[country_id]
-                                for country_id in row["cellValuesByColumnId"][
-                                    relevant_column_ids["Country"]
-                                ]
-                            ]
-                        )
-                    )
-                else:
-                    cols.append(
-                        row["cellValuesByColumnId"].get(relevant_column_ids[name], "")
-                    )
-            return ". ".join(cols)
+        if relevant_country_ids is not None:
+            cells = recent_cells[index]
+            if country_column_id not in cells:
+                # no Country data
+                return True
+            if not len(cells[country_column_id]) > 0:
+                print(cells[country_column_id])
+            return not relevant_country_ids.isdisjoint(cells[country_column_id])
+
+        return True
+
+    relevant = [
+        index for index in range(len(recent_rows)) if has_relevant_location(index)
+    ]
+    if "exclude_search_terms" in config:
+        excluded_titles = TermMatcher.of(config["exclude_search_terms"])
+        relevant = [
+            index
+            for index in relevant
+            if not excluded_titles.has_any_word(recent_cells[index][title_id].lower())
+        ]
+    if excluded_companies is not None:
+        relevant = [
+            index
+            for index in relevant
+            if recent_cells[index][company_id] not in excluded_companies
+        ]
 
-        local_jobs = []
-        remote_jobs = []
-        _other_jobs = []
-        for row in rows:
-            # time created in climatetechlist, not posting time
-            if is_relevant(row):
-                job = JobPosting(title=None, id=row["id"])
-                if (
-                    config
-                    and "local_locations" in config
-                    and any(
-                        term
-                        in row["cellValuesByColumnId"][
-                            relevant_column_ids["Job Location"]
-                        ]
-                        for term in set(config["local_locations"])
+    title_column_ids = [relevant_column_ids[name] for name in relevant_column_names]
+    other_title_column_ids = [
+        relevant_column_ids[name] for name in column_order_for_other_locations
+    ]
+
+    def format_title(cells, column_ids):
+        return ". ".join(
+            [
+                (
+                    ", ".join(
+                        [id_to_country[country_id] for country_id in cells[column_id]]
                     )
-                ):
-                    title = format_title(row, relevant_column_names)
-                    job.title = f"🏠 {title}"
-                    local_jobs.append(job)
-                elif (
-                    "Remote"
-                    in row["cellValuesByColumnId"][relevant_column_ids["Remote"]]
-                ):
-                    title = format_title(row, relevant_column_names)
-                    job.title = f"💻 {title}"
-                    remote_jobs.append(job)
-                else:
-                    # put job location first
-                    title = format_title(row, column_order_for_other_locations)
-                    job.title = title
-                    _other_jobs.append(job)
+                    if column_id == country_column_id and column_id in cells
+                    else cells.get(column_id, "")
+                )
+                for column_id in column_ids
+            ]
+        )
 
-        # ignore other jobs
-        if (
-            config
-            and "only_include_local_or_remote" in config
-            and config["only_include_local_or_remote"]
-        ):
-            return local_jobs + remote_jobs
+    local_jobs = []
+    remote_jobs = []
+    _other_jobs = []
+    for index in relevant:
+        cells = recent_cells[index]
+        link = cells.get(link_id) if link_id else None
+        job = JobPosting(
+            title=None,
+            id=recent_rows[index]["id"],
+            link=(
+                link
+                if isinstance(link, str) and link.startswith(("http://", "https://"))
+                else None
+            ),
+        )
+        if is_local[index]:
+            title = format_title(cells, title_column_ids)
+            job.title = f"🏠 {title}"
+            local_jobs.append(job)
+        elif "Remote" in cells[remote_id]:
+            title = format_title(cells, title_column_ids)
+            job.title = f"💻 {title}"
+            remote_jobs.append(job)
         else:
-            return local_jobs + remote_jobs + _other_jobs
+            # put job location first
+            title = format_title(cells, other_title_column_ids)
+            job.title = title
+            _other_jobs.append(job)
+
+    # ignore other jobs
+    if (
+        config
+        and "only_include_local_or_remote" in config
+        and config["only_include_local_or_remote"]
+    ):
+        return local_jobs + remote_jobs
+    else:
+        return local_jobs + remote_jobs + _other_jobs
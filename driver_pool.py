@@ -0,0 +1,198 @@
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+
+class DriverPool:
+    """
+    Hands out browser sessions to scrape workers so that each company is scraped by exactly one driver at a time.
+
+    Drivers passed in are used first. If more are needed (more workers than drivers), or a driver's browser has crashed
+    and been thrown away, new ones are launched with driver_factory(performance_log).
+
+    Only browsers launched for a session(performance_log=True) log performance (every network event), which Chrome
+    otherwise spends memory and time on for every page. So a run with companies of both kinds has browsers of both
+    kinds. The performance log is emptied whenever a browser is released, so a company never sees an earlier one's.
+
+    max_browsers: once this many browsers are open, a session that finds no idle browser of its kind quits an idle one
+    of the other kind before launching its own, instead of keeping browsers of both kinds around, unless it's the last
+    of its kind. So there are at most max_browsers + 1 browsers, and companies of alternating kinds don't relaunch
+    Chrome each time (with one worker, there is one browser of each kind). None for no limit.
+
+    keep_open: close() hands back the browsers still running instead of closing them, to be used again (see
+    lambda_function.py, which keeps them between invocations). Each browser remembers the origins it has been to, for
+    reset_browser to clear.
+    """
+
+    def __init__(
+        self, drivers=None, driver_factory=None, keep_open=False, max_browsers=None
+    ):
+        self.driver_factory = driver_factory
+        self.keep_open = keep_open
+        self.max_browsers = max_browsers
+        self._lock = threading.Lock()
+        self._idle = [driver for driver in drivers or [] if driver is not None]
+        self._given = list(self._idle)  # not ours to quit, only close like before
+        self._launched = []
+
+    def acquire(self, performance_log=False):
+        with self._lock:
+            for driver in reversed(self._idle):
+                if has_performance_log(driver) == performance_log:
+                    self._idle.remove(driver)
+                    return driver
+            if not self.driver_factory and len(self._idle) > 0:
+                # Only the browsers passed in, which are used as they were launched
+                return self._idle.pop()
+            replaced = self._replaceable_idle_driver()
+            if replaced:
+                self._idle.remove(replaced)
+        if replaced:
+            print("Replacing an idle browser with one of the other kind")
+            self.discard(replaced)
+        if not self.driver_factory:
+            raise Exception("No browser available, and no way to launch a new one")
+        driver = self.driver_factory(performance_log)
+        driver.performance_log = performance_log
+        with self._lock:
+            self._launched.append(driver)
+        return driver
+
+    def _replaceable_idle_driver(self):
+        """An idle browser to quit to stay within max_browsers, None if there's no need or none can be quit"""
+        if (
+            self.max_browsers is None
+            or len(self._given) + len(self._launched) < self.max_browsers
+        ):
+            return None
+        open_drivers = self._given + self._launched
+        for driver in self._idle:
+            # Browsers passed in are only the caller's to quit, unless they're handed back by close anyway
+            if driver in self._given and not self.keep_open:
+                continue
+            same_kind_count = sum(
+                1
+                for open_driver in open_drivers
+                if has_performance_log(open_driver) == has_performance_log(driver)
+            )
+            if same_kind_count > 1:
+                return driver
+        return None
+
+    def release(self, driver, check_health=False):
+        if check_health and not is_alive(driver):
+            print("Browser is unresponsive, replacing it")
+            self.discard(driver)
+            return
+        try:
+            if has_performance_log(driver):
+                driver.get_log("performance")
+            if self.keep_open:
+                remember_origins(driver)
+        except Exception:
+            print("Browser is unresponsive, replacing it")
+            self.discard(driver)
+            return
+        with self._lock:
+            self._idle.append(driver)
+
+    def discard(self, driver):
+        with self._lock:
+            if driver in self._given:
+                self._given.remove(driver)
+            if driver in self._launched:
+                self._launched.remove(driver)
+        try:
+            driver.quit()
+        except Exception:
+            pass  # already dead
+
+    @contextmanager
+    def session(self, performance_log=False):
+        driver = self.acquire(performance_log)
+        failed = False
+        try:
+            yield driver
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.release(driver, check_health=failed)
+
+    def close(self) -> list:
+        with self._lock:
+            given, launched = self._given, self._launched
+            self._given, self._launched, self._idle = [], [], []
+        if self.keep_open:
+            return given + launched
+        for driver in given:
+            driver.close()  # Close the original browser window
+        for driver in launched:
+            driver.quit()
+        return []
+
+
+def is_alive(driver) -> bool:
+    from selenium.common.exceptions import WebDriverException
+
+    try:
+        driver.window_handles
+        return True
+    except WebDriverException:
+        return False
+
+
+def has_performance_log(driver) -> bool:
+    """Whether the driver was launched with performance logging on, see DriverPool"""
+    return getattr(driver, "performance_log", False)
+
+
+def page_origins(driver) -> set[str]:
+    """The origins in the current tab's history and frames"""
+    history = driver.execute_cdp_cmd("Page.getNavigationHistory", {})
+    origins = set()
+    for entry in history["entries"]:
+        url = urlparse(entry["url"])
+        origins.add(f"{url.scheme}://{url.netloc}")
+    frames = [driver.execute_cdp_cmd("Page.getFrameTree", {})["frameTree"]]
+    while frames:
+        frame = frames.pop()
+        origins.add(frame["frame"]["securityOrigin"])
+        frames.extend(frame.get("childFrames", []))
+    return {origin for origin in origins if origin.startswith(("http://", "https://"))}
+
+
+def remember_origins(driver):
+    """Adds the current tab's origins to the ones reset_browser clears. A tab's history only keeps its last 50 pages."""
+    driver.visited_origins = getattr(driver, "visited_origins", set()) | page_origins(
+        driver
+    )
+
+
+def reset_browser(driver):
+    """
+    Clears what the last scrape left in the browser (other tabs, cookies, storage, cache), so that a browser kept open
+    can be used for another user's companies
+    """
+    origins = set(getattr(driver, "visited_origins", set()))
+    handles = driver.window_handles
+    for handle in reversed(handles):
+        driver.switch_to.window(handle)
+        origins |= page_origins(driver)
+        if handle != handles[0]:
+            driver.close()
+    driver.switch_to.window(handles[0])
+    driver.get("about:blank")
+    driver.execute_cdp_cmd("Page.resetNavigationHistory", {})
+    # Every cookie in the browser, not only the current page's
+    driver.execute_cdp_cmd("Storage.clearCookies", {})
+    driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+    # There's no clearing every origin's storage at once
+    for origin in origins:
+        driver.execute_cdp_cmd(
+            "Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"}
+        )
+    driver.visited_origins = set()
+    # Scrapers that read requests from the performance log expect it to start with their page
+    if has_performance_log(driver):
+        driver.get_log("performance")
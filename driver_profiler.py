@@ -0,0 +1,96 @@
+"""
+Counts and times every WebDriver command a scraper sends, to find the scrapers that are chatty with the browser.
+
+python3 job_scrape.py configs/config.json data/run_record.json --profile_driver
+prints the commands that took the longest, per scraper and per company. With --profile_driver_folded profile.folded, it
+also writes "company;scraper;command microseconds" lines that flamegraph.pl or https://www.speedscope.app can draw.
+
+Commands are counted where they're sent, on driver.execute, so WebElement commands (.text, get_attribute, ...) are
+counted too. Nothing is hooked unless profiling is turned on.
+"""
+
+import threading
+
+from models import *
+from metrics import on_driver_commands
+
+# selenium's Command.W3C_EXECUTE_SCRIPT and W3C_EXECUTE_SCRIPT_ASYNC, without importing selenium.webdriver for them
+SCRIPT_COMMANDS = {"w3cExecuteScript", "w3cExecuteScriptAsync"}
+REPORT_ROWS = 25
+
+
+def command_name(driver_command, params) -> str:
+    """
+    Selenium's name for the command (see selenium's Command), e.g. findElements or getElementText, except that scripts
+    selenium runs on its own behalf (get_attribute, is_displayed) are named by the /* name */ comment they start with.
+    """
+    if driver_command in SCRIPT_COMMANDS and params:
+        script = params.get("script", "")
+        if script.startswith("/* "):
+            return script[3 : script.find(" */")]
+    return driver_command
+
+
+class DriverProfiler:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (company name, scraper name, command) -> [calls, seconds]
+        self.stats = {}
+
+    def profile(self, driver, company: Company):
+        """Records the commands sent with driver in the with block against company"""
+        frames = (company.name, scraper_name(company))
+
+        def record(driver_command, params, seconds):
+            key = (*frames, command_name(driver_command, params))
+            with self._lock:
+                if key not in self.stats:
+                    self.stats[key] = [0, 0.0]
+                self.stats[key][0] += 1
+                self.stats[key][1] += seconds
+
+        return on_driver_commands(driver, record)
+
+    def folded_stacks(self) -> str:
+        return "\n".join(
+            f"{";".join(frame.replace(";", ",") for frame in key)} {round(seconds * 1_000_000)}"
+            for key, (calls, seconds) in sorted(self.stats.items())
+        )
+
+    def format_report(self, rows=REPORT_ROWS) -> str:
+        by_command = {}
+        by_company = {}
+        for (company_name, scraper, command), (calls, seconds) in self.stats.items():
+            for totals, key in [
+                (by_command, (scraper, command)),
+                (by_company, (company_name, scraper)),
+            ]:
+                if key not in totals:
+                    totals[key] = [0, 0.0]
+                totals[key][0] += calls
+                totals[key][1] += seconds
+
+        lines = []
+        for title, totals in [
+            ("By scraper and command", by_command),
+            ("By company", by_company),
+        ]:
+            header = f"{title:<60} {'calls':>7} {'seconds':>8} {'ms/call':>8}"
+            lines += [header, "-" * len(header)]
+            slowest = sorted(totals.items(), key=lambda item: item[1][1], reverse=True)
+            for (first, second), (calls, seconds) in slowest[:rows]:
+                lines.append(
+                    f"{f"{first} / {second}"[:60]:<60} {calls:>7} {seconds:>8.2f} {seconds / calls * 1000:>8.1f}"
+                )
+            if len(slowest) > rows:
+                lines.append(f"... {len(slowest) - rows} more")
+            lines.append("")
+        return "\n".join(lines)
+
+
+def scraper_name(company: Company) -> str:
+    if company.is_crunchbase:
+        return "Crunchbase"
+    if company.jobs_page_class_name:
+        return company.jobs_page_class_name
+    return getattr(company.jobs_page_class, "__name__", str(company.jobs_page_class))
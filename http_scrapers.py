@@ -0,0 +1,263 @@
+"""
+Scrapers that read a job board's public JSON feed instead of loading the page in a browser.
+
+These are drop-in alternatives for the browser scrapers of the same name in common_scrapers.py (see
+scraper_registry.HTTP_ALTERNATIVES): the jobs_page stays the same, and the JobPosting ids and titles are built the same
+as the browser scrapers read them off the page, so switching a company over does not make its existing jobs look new.
+benchmarks/bench_scrapers.py checks both against the same saved board.
+
+New scrapers also need adding to scraper_registry.py.
+"""
+
+import requests
+import threading
+from urllib.parse import urlparse, parse_qs
+
+from models import *
+
+TIMEOUT_SECONDS = 30
+# One requests.Session per thread, as scrape workers fetch concurrently and a Session isn't safe to share between threads
+thread_local = threading.local()
+
+# Where each board's JSON is read from, {board} being the board's name in its jobs_page. Benchmarks and tests point
+# these at saved responses.
+GREENHOUSE_API_URL = "https://boards-api.greenhouse.io/v1/boards/{board}/jobs"
+# By the jobs_page's host: boards on jobs.eu.lever.co are served from api.eu.lever.co
+LEVER_API_URLS = {
+    "jobs.lever.co": "https://api.lever.co/v0/postings/{board}",
+    "jobs.eu.lever.co": "https://api.eu.lever.co/v0/postings/{board}",
+}
+ASHBY_API_URL = "https://api.ashbyhq.com/posting-api/job-board/{board}"
+
+# How the Ashby board shows a posting's employmentType
+ASHBY_EMPLOYMENT_TYPES = {
+    "FullTime": "Full time",
+    "PartTime": "Part time",
+    "Intern": "Intern",
+    "Contract": "Contract",
+    "Temporary": "Temporary",
+}
+
+
+def session() -> requests.Session:
+    """This thread's session, which keeps connections to the same hosts open between requests"""
+    if not hasattr(thread_local, "session"):
+        thread_local.session = requests.Session()
+    return thread_local.session
+
+
+def get_json(url, params=None, page_cache: PageCache = None):
+    """With page_cache, raises PageUnchanged if the response is the same as when the jobs were last read"""
+    response = session().get(
+        url,
+        params=params,
+        headers=page_cache.conditional_headers() if page_cache else None,
+        timeout=TIMEOUT_SECONDS,
+    )
+    if page_cache and response.status_code == 304:
+        page_cache.not_modified()
+    response.raise_for_status()
+    if page_cache:
+        page_cache.check(
+            response.content,
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified"),
+        )
+    return response.json()
+
+
+def first_path_segment(url):
+    return urlparse(url).path.strip("/").split("/")[0]
+
+
+def board_origin(url):
+    """The scheme and host the board's page links its jobs on, which is where jobs_page redirects to if it's an alias"""
+    parsed = urlparse(url)
+    host = parsed.netloc.lower()
+    return f"{parsed.scheme}://{HOST_ALIASES.get(host, host)}"
+
+
+def join_text(*parts):
+    return "\n".join(part for part in parts if part)
+
+
+# https://job-boards.greenhouse.io/company
+# Each row of the board is the title, then the location, linking to the job on the board's own host
+@declare_scraper(page_cache=True)
+class GreenhouseApiPage(HttpJobsPage):
+    @staticmethod
+    def fetch_jobs(jobs_page, config=None, page_cache: PageCache = None):
+        board = first_path_segment(jobs_page)
+        data = get_json(GREENHOUSE_API_URL.format(board=board), page_cache=page_cache)
+        jobs = []
+        for job in data["jobs"]:
+            title = join_text(job["title"], job.get("location", {}).get("name"))
+            if is_excluded(config, title):
+                continue
+            # Not absolute_url, which a company can set to its own careers site
+            link_url = f"{board_origin(jobs_page)}/{board}/jobs/{job['id']}"
+            jobs.append(
+                JobPosting(
+                    title=title,
+                    id=link_url,
+                    link=link_url,
+                )
+            )
+        return jobs
+
+
+# https://boards.greenhouse.io/embed/job_board?for=company
+# Each opening is the title, then the location, linking to absolute_url
+@declare_scraper(page_cache=True)
+class GreenhouseEmbeddedStandaloneApiPage(HttpJobsPage):
+    @staticmethod
+    def fetch_jobs(jobs_page, config=None, page_cache: PageCache = None):
+        board = parse_qs(urlparse(jobs_page).query)["for"][0]
+        data = get_json(GREENHOUSE_API_URL.format(board=board), page_cache=page_cache)
+        jobs = []
+        for job in data["jobs"]:
+            title = join_text(job["title"], job.get("location", {}).get("name"))
+            if is_excluded(config, title):
+                continue
+            link_url = job["absolute_url"]
+            jobs.append(
+                JobPosting(
+                    title=title,
+                    id=link_url,
+                    link=link_url,
+                )
+            )
+        return jobs
+
+
+# https://jobs.lever.co/company
+# Each posting is its Apply button, then its name, location, team and commitment, linking to where the Apply button goes
+@declare_scraper(page_cache=True)
+class LeverCoApiPage(HttpJobsPage):
+    @staticmethod
+    def fetch_jobs(jobs_page, config=None, page_cache: PageCache = None):
+        host = urlparse(jobs_page).netloc.lower()
+        if host not in LEVER_API_URLS:
+            raise Exception(f"No Lever API known for {host}, see LEVER_API_URLS")
+        board = first_path_segment(jobs_page)
+        data = get_json(
+            LEVER_API_URLS[host].format(board=board), {"mode": "json"}, page_cache
+        )
+        jobs = []
+        for job in data:
+            categories = job.get("categories", {})
+            title = join_text(
+                "Apply",
+                job["text"],
+                categories.get("location"),
+                categories.get("team"),
+                categories.get("commitment"),
+            )
+            if is_excluded(config, title):
+                continue
+            link_url = job.get("applyUrl", f"{job['hostedUrl']}/apply")
+            jobs.append(
+                JobPosting(
+                    title=title,
+                    id=link_url,
+                    link=link_url,
+                )
+            )
+        return jobs
+
+
+# https://jobs.ashbyhq.com/company
+# Each posting is its title, then its department, location and employment type on one line, linking to the posting on
+# the board, which keeps the board name as written in the jobs_page
+@declare_scraper(page_cache=True)
+class AshbyApiPage(HttpJobsPage):
+    @staticmethod
+    def fetch_jobs(jobs_page, config=None, page_cache: PageCache = None):
+        board = first_path_segment(jobs_page)
+        data = get_json(ASHBY_API_URL.format(board=board), page_cache=page_cache)
+        jobs = []
+        for job in data["jobs"]:
+            if not job.get("isListed", True):
+                continue
+            employment_type = job.get("employmentType")
+            title = join_text(
+                job["title"],
+                " • ".join(
+                    part
+                    for part in [
+                        job.get("department"),
+                        job.get("location"),
+                        ASHBY_EMPLOYMENT_TYPES.get(employment_type, employment_type),
+                    ]
+                    if part
+                ),
+            )
+            if is_excluded(config, title):
+                continue
+            link_url = f"{board_origin(jobs_page)}/{board}/{job['id']}"
+            jobs.append(
+                JobPosting(
+                    title=title,
+                    id=link_url,
+                    link=link_url,
+                )
+            )
+        return jobs
+
+
+"""
+Workday career sites load their jobs from a JSON endpoint, 20 at a time:
+POST https://<tenant>.<wdN>.myworkdayjobs.com/wday/cxs/<tenant>/<site>/jobs
+{"appliedFacets": {}, "limit": 20, "offset": 0, "searchText": ""}
+"""
+WORKDAY_PAGE_SIZE = 20  # the most Workday will return at a time
+WORKDAY_MAX_PAGES = 100
+
+
+def workday_jobs_url(page_url):
+    parsed = urlparse(page_url)
+    tenant = parsed.netloc.split(".")[0]
+    # e.g. /en-US/External or /External
+    site = [segment for segment in parsed.path.split("/") if segment][-1]
+    return f"{parsed.scheme}://{parsed.netloc}/wday/cxs/{tenant}/{site}/jobs"
+
+
+def iter_workday_job_pages(
+    jobs_url, search=None, cookies=None, known_jobs: KnownJobs = None
+):
+    """
+    Yields each page's jobPostings in order, until there are no more or WORKDAY_MAX_PAGES have been read. If the first
+    page doesn't say how many jobs there are, pages until one comes back short.
+    """
+    search = search if search else {"appliedFacets": {}, "searchText": ""}
+    headers = {"Accept": "application/json"}
+    if cookies and "CALYPSO_CSRF_TOKEN" in cookies:
+        headers["X-CALYPSO-CSRF-TOKEN"] = cookies["CALYPSO_CSRF_TOKEN"]
+
+    offset = 0
+    total = None
+    for page_index in range(WORKDAY_MAX_PAGES):
+        response = session().post(
+            jobs_url,
+            json={**search, "limit": WORKDAY_PAGE_SIZE, "offset": offset},
+            headers=headers,
+            cookies=cookies,
+            timeout=TIMEOUT_SECONDS,
+        )
+        response.raise_for_status()
+        data = response.json()
+        if page_index == 0:
+            # Only the first page has the real total
+            total = data.get("total")
+        job_postings = data.get("jobPostings", [])
+        if len(job_postings) == 0:
+            return
+        yield job_postings
+        offset += len(job_postings)
+        if total is not None and offset >= total:
+            return
+        if total is None and len(job_postings) < WORKDAY_PAGE_SIZE:
+            # The last page, as far as can be told without a total
+            return
+    if known_jobs is not None:
+        known_jobs.stop_at_limit()
@@ -3,24 +3,31 @@
 
 import argparse
 import datetime
-import traceback
 import json
 import os
 import sys
 import shutil
 import importlib
 import time
-from collections import defaultdict
-from dataclasses import asdict
-from tempfile import mkdtemp
-
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import WebDriverException
+import contextlib
+import dataclasses
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
 
+# selenium, and the scraper modules (see scraper_registry.py), are only imported once a company needs them, so that a
+# run where no company needs a browser doesn't load selenium at all
 from models import *
+from driver_pool import DriverPool
+from request_blocking import block_requests
+from scraper_registry import get_scraper, get_http_alternative, SCRAPER_MODULES
+from run_record_store import open_run_record, save_run_record
+from checkpoint import Checkpoint, FileCheckpoint, default_checkpoint_path
+from board_store import BoardStore, DirectoryBoardStore, DEFAULT_MAX_AGE_MINUTES
+from metrics import count_driver_calls, write_metrics_report, format_metrics_table
+from driver_profiler import DriverProfiler
+
+# Seconds to wait for a page to be ready, for scrapers that declare a ready_condition
+DEFAULT_WAIT_TIMEOUT = 10
 
 
 # Common entrypoint
@@ -33,13 +40,32 @@ def get_new_relevant_jobs(
     limit_company=None,
     add_search_term=None,
     default_sleep=1,
+    workers=1,
+    driver_factory=None,
+    retention_days=None,
+    checkpoint: Checkpoint = None,
+    driver_profiler: DriverProfiler = None,
+    driver_pool: DriverPool = None,
+    use_page_cache=True,
+    board_store: BoardStore = None,
+    use_http_alternatives=False,
 ):
-
-    existing_jobs = defaultdict(
-        set, {key: set(value) for key, value in run_record.existing_jobs.items()}
-    )
-
-    relevant_jobs, skipped_companies, verify_no_jobs, errors = get_relevant_jobs(
+    """
+    Updates run_record (a RunRecord or SqliteRunRecord) in place with the new jobs and this run's errors, and returns it.
+    Also returns a CompanyMetrics for each company checked.
+
+    retention_days: if set (or set on the company), forgets jobs that haven't been seen for that many days, for the
+    companies whose jobs were all read this run. Companies that errored, stopped paging early or found no jobs without
+    their no_jobs_phrase keep their jobs, in case the scrape missed them.
+
+    checkpoint: records each company's results as they come in, and if it was opened to resume, has the results of the
+    companies the previous run got through.
+
+    use_page_cache: if False, reads the jobs of companies whose page hasn't changed since it was last read too
+    board_store: where to share the rows of job boards many users list with other runs, see SharedBoard
+    use_http_alternatives: see select_companies
+    """
+    results = get_relevant_jobs(
         driver,
         limit_company,
         add_search_term,
@@ -47,23 +73,118 @@ def get_new_relevant_jobs(
         companies,
         search_terms,
         default_company_config,
+        workers,
+        driver_factory,
+        run_record,
+        checkpoint,
+        driver_profiler,
+        driver_pool,
+        use_page_cache,
+        board_store,
+        use_http_alternatives,
     )
+    new_relevant_jobs, verify_no_jobs, errors, company_metrics = record_results(
+        run_record, results, retention_days
+    )
+
+    errors_message = record_errors(run_record, errors)
+
+    return (
+        new_relevant_jobs,
+        run_record,
+        verify_no_jobs,
+        errors_message,
+        company_metrics,
+    )
+
 
+def record_results(
+    run_record: RunRecord, results: Iterable[CompanyResult], retention_days=None
+):
+    """
+    Adds the new jobs in results to run_record, and returns them grouped by company, along with the companies to
+    verify have no jobs, the companies that errored with their errors, and each company's metrics.
+
+    A new job that another company in the run record already has (the same posting on a board listing many companies'
+    jobs and on the company's own page, see posting_key) is recorded, but not returned.
+    """
     new_relevant_jobs = {}
+    verify_no_jobs = []
+    errors: list[tuple[Company, Exception]] = []
+    company_metrics: list[CompanyMetrics] = []
+    today = datetime.date.today()
+
+    for result in results:
+        company = result.company
+        company_metrics.append(result.metrics)
+        if result.saved_request_failed and not result.saved_request:
+            # Found to no longer work, and the page wasn't read to find a new one
+            run_record.clear_saved_request(company.name)
+        if result.error:
+            errors.append((company, result.error))
+            continue
 
-    # Group jobs by company, and update existing
-    for company, job in relevant_jobs:
-        if job.id not in existing_jobs[company.name]:
-            if company.name in new_relevant_jobs:
-                new_relevant_jobs[company.name]["jobs"].append(job)
-            else:
-                new_relevant_jobs[company.name] = {"company": company, "jobs": [job]}
+        # Group jobs by company, and update existing
+        for job in result.relevant_jobs:
+            key = posting_key(company, job)
+            if not run_record.has_job(company.name, job.id):
+                duplicate_of = key and run_record.duplicate_of(company.name, key)
+                if duplicate_of:
+                    # Already reported under the other company, e.g. a board listing many companies' jobs
+                    print(
+                        f"{company.name} job {job.id} is already listed by {duplicate_of[0]} ({duplicate_of[1]})"
+                    )
+                    result.metrics.jobs_duplicate += 1
+                else:
+                    if company.name in new_relevant_jobs:
+                        new_relevant_jobs[company.name]["jobs"].append(job)
+                    else:
+                        new_relevant_jobs[company.name] = {
+                            "company": company,
+                            "jobs": [job],
+                        }
+                    result.metrics.jobs_new += 1
+
+                run_record.add_job(company.name, job.id)
+            run_record.mark_seen(company.name, job.id, today.isoformat())
+            if key:
+                run_record.add_posting_key(company.name, job.id, key)
+
+        if result.page_fingerprint and (
+            result.read_all_jobs()
+            or result.jobs_page_status == JobsPageStatus.UNCHANGED
+        ):
+            run_record.set_page_fingerprint(company.name, result.page_fingerprint)
+        if result.saved_request:
+            run_record.set_saved_request(company.name, result.saved_request)
+
+        if len(result.relevant_jobs) == 0 and result.jobs_page_status in {
+            JobsPageStatus.GENERIC_NO_JOBS_PHRASE_FOUND,
+            JobsPageStatus.NO_JOBS_PHRASE_NOT_FOUND_BUT_NO_JOBS,
+        }:
+            verify_no_jobs.append(company)
+
+        company_retention_days = (
+            company.retention_days if company.retention_days else retention_days
+        )
+        if company_retention_days and result.read_all_jobs():
+            seen_before = today - datetime.timedelta(days=company_retention_days)
+            removed_count = run_record.compact(
+                company.name, seen_before.isoformat(), today.isoformat()
+            )
+            if removed_count > 0:
+                print(
+                    f"Forgot {removed_count} {company.name} job(s) not seen since {seen_before}"
+                )
 
-            existing_jobs[company.name].add(job.id)
+    return new_relevant_jobs, verify_no_jobs, errors, company_metrics
 
-    existing_jobs = {key: sorted(list(value)) for key, value in existing_jobs.items()}
 
-    # Annotate if errors are new, and create new run record
+def record_errors(run_record: RunRecord, errors: list[tuple[Company, Exception]]):
+    """
+    Replaces run_record's errors with this run's, noting which companies didn't error last run, and returns the errors
+    message (None if there were no errors)
+    """
     prior_run_errors_company_names = {error.company_name for error in run_record.errors}
 
     errors_message = None
@@ -82,14 +203,14 @@ def get_new_relevant_jobs(
             )
             scrape_errors.append(scrape_error)
             messages.append(
-                f"{"NEW ERROR " if is_new_this_run else ""}{company.name}{f" ({company.name}, {company.jobs_page})" if {company.name} else ""}: {getattr(error, 'msg', repr(error))}\n{''.join(traceback.format_exception(error))}"
+                f"{"NEW ERROR " if is_new_this_run else ""}{company.name}{f" ({company.name}, {company.jobs_page})" if {company.name} else ""}: {describe_error(error)}"
             )
 
         errors_message = "Errors:\n" + "\n".join(messages)
 
-    run_record = RunRecord(existing_jobs, scrape_errors)
+    run_record.errors = scrape_errors
 
-    return new_relevant_jobs, run_record, verify_no_jobs, errors_message
+    return errors_message
 
 
 def get_relevant_jobs(
@@ -100,52 +221,292 @@ def get_relevant_jobs(
     companies,
     search_terms,
     default_company_config,
+    workers=1,
+    driver_factory=None,
+    run_record=None,
+    checkpoint: Checkpoint = None,
+    driver_profiler: DriverProfiler = None,
+    driver_pool: DriverPool = None,
+    use_page_cache=True,
+    board_store: BoardStore = None,
+    use_http_alternatives=False,
 ):
-    relevant_jobs: list[tuple[Company, JobPosting]] = []
-    skipped_companies = []
-    verify_no_jobs = []
-    errors: list[tuple[Company, Exception]] = []
-
+    """
+    Yields a CompanyResult for each active company as soon as it (and the companies before it) have been scraped.
+
+    With workers > 1, companies are scraped concurrently, each worker with its own browser from driver_factory, starting
+    with the companies whose scrapers declare the highest cost. Results come back in the same order as companies
+    regardless.
+
+    run_record: to look up known jobs in, for scrapers that can stop paging early
+    checkpoint: each company's result is added to it once scraped without an error, and companies it already has a
+    result for aren't scraped again
+    driver_profiler: if given, records every WebDriver command sent for each company
+    driver_pool: browsers to use instead of driver and driver_factory, left open for the caller to close
+    use_page_cache: skip reading the jobs of companies whose page is the same as when they were last read (see
+    PageCache), which needs run_record
+    board_store: for scrapers declared with shares_board, the board's rows are read from here if another run stored
+    them recently, instead of scraping it, and stored here otherwise
+    use_http_alternatives: see select_companies
+    """
     if add_search_term:
         search_terms.append(add_search_term)
 
-    for company in companies:
-        if limit_company and limit_company.lower() not in company.name.lower():
-            continue
-
-        if company.active:
-            print("Checking", company.name)
-            try:
-                if company.is_crunchbase:
-                    company_relevant_jobs, jobs_page_status = get_crunchbase_companies(
-                        driver, company, default_sleep
+    companies_to_check = select_companies(
+        companies, limit_company, use_http_alternatives
+    )
+    owns_driver_pool = driver_pool is None
+    if owns_driver_pool:
+        driver_pool = DriverPool([driver], driver_factory)
+
+    def check_company(company) -> CompanyResult:
+        if checkpoint:
+            checkpoint_result = checkpoint.get_result(company)
+            if checkpoint_result:
+                print("Already checked", company.name)
+                return checkpoint_result
+
+        print("Checking", company.name)
+        metrics = CompanyMetrics(
+            company_name=company.name,
+            started_at=datetime.datetime.now().isoformat(timespec="seconds"),
+        )
+        saved_request = None
+        try:
+            with metrics.timed("total_seconds"):
+                # Looked up in here so that failing to read the run record or the board store (e.g. from S3) is this
+                # company's error, rather than stopping the run
+                page_cache = (
+                    PageCache(
+                        page_config_key(company, search_terms, default_company_config),
+                        (
+                            run_record.page_fingerprint(company.name)
+                            if run_record and use_page_cache
+                            else None
+                        ),
                     )
-                else:
-                    assert company.jobs_page
-                    company_relevant_jobs, jobs_page_status = get_company_relevant_jobs(
-                        driver,
+                    if getattr(company.jobs_page_class, "page_cache", False)
+                    else None
+                )
+                saved_request = (
+                    SavedRequest(
+                        run_record.saved_request(company.name) if run_record else None
+                    )
+                    if getattr(company.jobs_page_class, "saves_request", False)
+                    else None
+                )
+                shared_board = (
+                    board_store.get(company.jobs_page)
+                    if board_store
+                    and getattr(company.jobs_page_class, "shares_board", False)
+                    else None
+                )
+                known_jobs = KnownJobs(
+                    run_record.job_ids(company.name) if run_record else frozenset(),
+                    lambda job: title_is_relevant(company, job.title, search_terms),
+                )
+
+                scraped = None
+                if shared_board and shared_board.cached is not None:
+                    scraped = get_company_relevant_jobs_from_board(
                         company,
                         search_terms,
                         default_company_config,
-                        default_sleep,
+                        metrics,
+                        shared_board,
                     )
-                if len(company_relevant_jobs) > 0:
-                    for job in company_relevant_jobs:
-                        relevant_jobs.append((company, job))
-                elif jobs_page_status in {
-                    JobsPageStatus.GENERIC_NO_JOBS_PHRASE_FOUND,
-                    JobsPageStatus.NO_JOBS_PHRASE_NOT_FOUND_BUT_NO_JOBS,
-                }:
-                    verify_no_jobs.append(company)
-            except Exception as e:
-                errors.append((company, e))
+                if not scraped and saved_request and saved_request.saved:
+                    try:
+                        scraped = get_company_relevant_jobs_over_http(
+                            company,
+                            search_terms,
+                            default_company_config,
+                            metrics,
+                            saved_request=saved_request,
+                            shared_board=shared_board,
+                        )
+                        saved_request.found = saved_request.saved
+                    except Exception as e:
+                        # e.g. it has expired, so the page is loaded to find the request it makes now
+                        saved_request.failed = True
+                        print(
+                            f"{company.name}'s saved request failed, loading the page instead: {repr(e)}"
+                        )
+                if scraped:
+                    company_relevant_jobs, jobs_page_status = scraped
+                elif needs_browser(company):
+                    with driver_pool.session(
+                        needs_performance_log(company)
+                    ) as company_driver, count_driver_calls(company_driver, metrics), (
+                        driver_profiler.profile(company_driver, company)
+                        if driver_profiler
+                        else contextlib.nullcontext()
+                    ):
+                        company_relevant_jobs, jobs_page_status = scrape_company(
+                            company_driver,
+                            company,
+                            search_terms,
+                            default_company_config,
+                            default_sleep,
+                            known_jobs,
+                            metrics,
+                            page_cache,
+                            saved_request,
+                            shared_board,
+                        )
+                else:
+                    company_relevant_jobs, jobs_page_status = (
+                        get_company_relevant_jobs_over_http(
+                            company,
+                            search_terms,
+                            default_company_config,
+                            metrics,
+                            page_cache,
+                            shared_board=shared_board,
+                        )
+                    )
+        except Exception as e:
+            metrics.error = True
+            return CompanyResult(
+                company=company,
+                relevant_jobs=[],
+                error=e,
+                metrics=metrics,
+                saved_request_failed=saved_request.failed if saved_request else False,
+            )
 
+        if (
+            shared_board
+            and shared_board.stored_stopped_at_limit
+            and (shared_board.cached is not None or shared_board.continues_previous)
+        ):
+            # Some of the jobs are from rows a scrape stored without reading the whole board
+            known_jobs.stop_at_limit()
+        if shared_board and shared_board.fetched is not None:
+            board_store.put(
+                company.jobs_page, shared_board, known_jobs.stopped_at_limit
+            )
+        metrics.jobs_page_status = jobs_page_status.name if jobs_page_status else None
+        metrics.jobs_relevant = len(company_relevant_jobs)
+        result = CompanyResult(
+            company=company,
+            relevant_jobs=company_relevant_jobs,
+            jobs_page_status=jobs_page_status,
+            stopped_early=known_jobs.stopped_early,
+            stopped_at_limit=known_jobs.stopped_at_limit,
+            metrics=metrics,
+            page_fingerprint=page_cache.current if page_cache else None,
+            saved_request=saved_request.found if saved_request else None,
+            saved_request_failed=saved_request.failed if saved_request else False,
+        )
+        if checkpoint:
+            checkpoint.add_result(result)
+        return result
+
+    try:
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                # Start the slowest companies first, so that they aren't left running on their own at the end
+                futures = [None] * len(companies_to_check)
+                for index in sorted(
+                    range(len(companies_to_check)),
+                    key=lambda index: scrape_cost(companies_to_check[index]),
+                    reverse=True,
+                ):
+                    futures[index] = executor.submit(
+                        check_company, companies_to_check[index]
+                    )
+                try:
+                    for future in futures:
+                        yield future.result()
+                finally:
+                    # If the run is stopped, don't start the rest
+                    for future in futures:
+                        future.cancel()
         else:
-            skipped_companies.append(company.name)
+            for company in companies_to_check:
+                yield check_company(company)
+    finally:
+        if owns_driver_pool:
+            driver_pool.close()
+
+
+def select_companies(
+    companies, limit_company=None, use_http_alternatives=False
+) -> list[Company]:
+    """
+    The active companies, limited to those with limit_company in their name.
+
+    Companies that set use_http, or with use_http_alternatives all companies that don't set use_browser, are switched
+    to their scraper's HTTP alternative where it has one (see scraper_registry.HTTP_ALTERNATIVES). Opt-in, as the
+    alternatives read a different source (the board's JSON) than the page the browser scrapers read. get_companies
+    already does this for the companies it makes, before importing their scrapers.
+    """
+    companies_to_check = []
+    for company in companies:
+        if limit_company and limit_company.lower() not in company.name.lower():
+            continue
+
+        if company.active:
+            companies_to_check.append(
+                with_cheapest_scraper(company, use_http_alternatives)
+            )
+    return companies_to_check
 
-    driver.close()  # Close the original browser window
 
-    return relevant_jobs, skipped_companies, verify_no_jobs, errors
+def uses_http_alternative(company, use_http_alternatives=False) -> bool:
+    return not company.is_crunchbase and (
+        company.use_http or (use_http_alternatives and not company.use_browser)
+    )
+
+
+def with_cheapest_scraper(company, use_http_alternatives=False) -> Company:
+    if company.jobs_page_class is None or not uses_http_alternative(
+        company, use_http_alternatives
+    ):
+        return company
+    name = company.jobs_page_class.__name__
+    if company.jobs_page_class.__module__ != SCRAPER_MODULES.get(name):
+        # The config's own scraper of that name
+        return company
+    http_alternative = get_http_alternative(name)
+    if not http_alternative:
+        return company
+    return dataclasses.replace(
+        company,
+        jobs_page_class=get_scraper(http_alternative),
+        jobs_page_class_name=http_alternative,
+    )
+
+
+def scrape_company(
+    driver,
+    company,
+    search_terms,
+    default_company_config,
+    default_sleep,
+    known_jobs: KnownJobs = None,
+    metrics: CompanyMetrics = None,
+    page_cache: PageCache = None,
+    saved_request: SavedRequest = None,
+    shared_board: SharedBoard = None,
+) -> (list[JobPosting], JobsPageStatus):
+    if company.is_crunchbase:
+        return get_crunchbase_companies(driver, company, default_sleep)
+
+    assert company.jobs_page
+    return get_company_relevant_jobs(
+        driver,
+        company,
+        search_terms,
+        default_company_config,
+        default_sleep,
+        known_jobs,
+        metrics,
+        page_cache,
+        saved_request,
+        shared_board,
+    )
 
 
 def get_crunchbase_companies(
@@ -177,15 +538,58 @@ def get_crunchbase_companies(
     return jobs, jobs_page_status
 
 
+# What a page declared with page_cache=True is fingerprinted by: its text, and where its links go
+PAGE_CONTENT_JS = """
+return document.body.innerText + "\\n" + Array.from(document.querySelectorAll("a[href]"), (a) => a.href).join("\\n");
+"""
+
+
 def get_company_relevant_jobs(
-    driver, company, search_terms, default_company_config, default_sleep
+    driver,
+    company,
+    search_terms,
+    default_company_config,
+    default_sleep,
+    known_jobs: KnownJobs = None,
+    metrics: CompanyMetrics = None,
+    page_cache: PageCache = None,
+    saved_request: SavedRequest = None,
+    shared_board: SharedBoard = None,
 ) -> (list[JobPosting], JobsPageStatus):
-    driver.get(company.jobs_page)
-    time.sleep(company.load_sleep if company.load_sleep else default_sleep)
-    driver.execute_script(
-        "window.scrollTo(0, document.body.scrollHeight);"
-    )  # Scroll to bottom to lazy load everything
-    time.sleep(company.scroll_sleep if company.scroll_sleep else default_sleep)
+    from selenium.webdriver.common.by import By
+    from waits import wait_until_ready
+
+    metrics = metrics if metrics else CompanyMetrics(company_name=company.name)
+    with metrics.timed("load_seconds"):
+        block_requests(driver, company)
+        driver.get(company.jobs_page)
+    ready_condition = getattr(company.jobs_page_class, "ready_condition", None)
+    with metrics.timed("wait_seconds"):
+        if ready_condition and not company.fixed_sleep:
+            wait_timeout = (
+                company.wait_timeout if company.wait_timeout else DEFAULT_WAIT_TIMEOUT
+            )
+            if not wait_until_ready(driver, ready_condition, wait_timeout):
+                print(
+                    f"{company.name} not ready after {wait_timeout}s, scraping anyway"
+                )
+            driver.execute_script(
+                "window.scrollTo(0, document.body.scrollHeight);"
+            )  # Scroll to bottom to lazy load everything
+            wait_until_ready(driver, ready_condition, wait_timeout)
+        else:
+            time.sleep(company.load_sleep if company.load_sleep else default_sleep)
+            driver.execute_script(
+                "window.scrollTo(0, document.body.scrollHeight);"
+            )  # Scroll to bottom to lazy load everything
+            time.sleep(company.scroll_sleep if company.scroll_sleep else default_sleep)
+
+    if page_cache:
+        try:
+            page_cache.check(driver.execute_script(PAGE_CONTENT_JS))
+        except PageUnchanged:
+            print(f"{company.name} is unchanged since its jobs were last read")
+            return [], JobsPageStatus.UNCHANGED
 
     company_has_jobs, jobs_page_status = has_jobs(driver, company)
     if company_has_jobs:
@@ -194,16 +598,31 @@ def get_company_relevant_jobs(
                 f"Human verification hit. There are probably ways to bypass but I haven't figured/built that out yet. Text: {driver.find_element(By.TAG_NAME, 'body').text.replace("\n", " ")}"
             )
         if company.jobs_page_class:
-            jobs = company.jobs_page_class.get_jobs(
-                driver, company.config if company.config else default_company_config
+            company_config = (
+                company.config if company.config else default_company_config
             )
+            # Only passed to the scrapers that declare they take them
+            helpers = {}
+            if saved_request:
+                helpers["saved_request"] = saved_request
+            if shared_board:
+                helpers["shared_board"] = shared_board
+            with metrics.timed("extract_seconds"):
+                if getattr(company.jobs_page_class, "paginates", False):
+                    jobs = company.jobs_page_class.get_jobs(
+                        driver,
+                        company_config,
+                        known_jobs if known_jobs else KnownJobs(frozenset()),
+                        **helpers,
+                    )
+                else:
+                    jobs = company.jobs_page_class.get_jobs(
+                        driver, company_config, **helpers
+                    )
+            metrics.jobs_scraped = len(jobs)
             if len(jobs) > 0:
                 jobs_page_status = JobsPageStatus.SOME_JOB_FOUND
-            relevant_jobs = [
-                job
-                for job in jobs
-                if title_is_relevant(company, job.title, search_terms)
-            ]
+            relevant_jobs = get_relevant_titles(company, jobs, search_terms)
         else:
             raise Exception(
                 f"Scrape not implemented. Body text: {driver.find_element(By.TAG_NAME, 'body').text.replace("\n", " ")}"
@@ -214,7 +633,75 @@ def get_company_relevant_jobs(
     return relevant_jobs, jobs_page_status
 
 
+def get_company_relevant_jobs_over_http(
+    company,
+    search_terms,
+    default_company_config,
+    metrics: CompanyMetrics = None,
+    page_cache: PageCache = None,
+    saved_request: SavedRequest = None,
+    shared_board: SharedBoard = None,
+) -> (list[JobPosting], JobsPageStatus):
+    assert company.jobs_page
+    metrics = metrics if metrics else CompanyMetrics(company_name=company.name)
+    company_config = company.config if company.config else default_company_config
+    with metrics.timed("load_seconds"):
+        if page_cache:
+            try:
+                jobs = company.jobs_page_class.fetch_jobs(
+                    company.jobs_page, company_config, page_cache
+                )
+            except PageUnchanged:
+                print(f"{company.name} is unchanged since its jobs were last read")
+                return [], JobsPageStatus.UNCHANGED
+        else:
+            # Only passed to the scrapers that declare they take them
+            helpers = {}
+            if saved_request:
+                helpers["saved_request"] = saved_request
+            if shared_board:
+                helpers["shared_board"] = shared_board
+            jobs = company.jobs_page_class.fetch_jobs(
+                company.jobs_page, company_config, **helpers
+            )
+    metrics.jobs_scraped = len(jobs)
+    if len(jobs) == 0:
+        return [], JobsPageStatus.NO_JOBS_FOUND
+    return (
+        get_relevant_titles(company, jobs, search_terms),
+        JobsPageStatus.SOME_JOB_FOUND,
+    )
+
+
+def get_company_relevant_jobs_from_board(
+    company,
+    search_terms,
+    default_company_config,
+    metrics: CompanyMetrics,
+    shared_board: SharedBoard,
+) -> (list[JobPosting], JobsPageStatus):
+    """From the rows another run stored for the company's board, without scraping it"""
+    company_config = company.config if company.config else default_company_config
+    with metrics.timed("extract_seconds"):
+        jobs = company.jobs_page_class.jobs_from_board(
+            shared_board.cached, company_config
+        )
+    metrics.jobs_scraped = len(jobs)
+    if len(jobs) == 0:
+        return [], JobsPageStatus.NO_JOBS_FOUND
+    return (
+        get_relevant_titles(company, jobs, search_terms),
+        JobsPageStatus.SOME_JOB_FOUND,
+    )
+
+
+def get_relevant_titles(company, jobs, search_terms) -> list[JobPosting]:
+    return [job for job in jobs if title_is_relevant(company, job.title, search_terms)]
+
+
 def has_jobs(driver, company) -> (bool, JobsPageStatus):
+    from selenium.webdriver.common.by import By
+
     all_text_lower = driver.find_element(By.TAG_NAME, "body").text.lower()
     if all_text_lower is None or all_text_lower == "":
         raise Exception(company.name + ": Error retrieving text")
@@ -234,7 +721,7 @@ def title_is_relevant(company, title, search_terms) -> bool:
     if len(terms_to_use) == 0:
         return True
 
-    return any(search_term.lower() in title.lower() for search_term in terms_to_use)
+    return TermMatcher.of(terms_to_use).contains_any(title.lower())
 
 
 def format_new_jobs_message(new_jobs: dict[str, dict[str, any]]) -> str:
@@ -268,23 +755,22 @@ def import_from_path(module_name, file_path):
     return module
 
 
-def get_companies(config_companies, additional_scrapers_module=None):
-    import common_scrapers
-    import inspect
-
-    all_scrapers = {}
-    for name, obj in inspect.getmembers(common_scrapers):
-        if inspect.isclass(obj):
-            all_scrapers[name] = obj
-    if additional_scrapers_module:
-        for name, obj in inspect.getmembers(additional_scrapers_module):
-            if inspect.isclass(obj):
-                all_scrapers[name] = obj
-
+def get_companies(
+    config_companies, additional_scrapers_module=None, use_http_alternatives=False
+):
+    """
+    The companies of a JSON config, with their scrapers. A company that uses its scraper's HTTP alternative (see
+    select_companies) gets that instead, without importing the browser scraper.
+    """
     companies = []
-    for company in config_companies:
-        company["jobs_page_class"] = all_scrapers[company["jobs_page_class_name"]]
-        companies.append(Company(**company))
+    for company_fields in config_companies:
+        company = Company(**company_fields)
+        name = company.jobs_page_class_name
+        if uses_http_alternative(company, use_http_alternatives):
+            name = get_http_alternative(name, additional_scrapers_module) or name
+        company.jobs_page_class = get_scraper(name, additional_scrapers_module)
+        company.jobs_page_class_name = name
+        companies.append(company)
     return companies
 
 
@@ -294,7 +780,9 @@ if __name__ == "__main__":
         "config_file", type=str, help="Path to config.json or config.py file"
     )
     parser.add_argument(
-        "run_record_json", type=str, help="Path to file storing history of prior run(s)"
+        "run_record_json",
+        type=str,
+        help="Path to file storing history of prior run(s). JSON, or SQLite if it ends in .db, .sqlite or .sqlite3",
     )
     parser.add_argument(
         "--add_scrapers_file",
@@ -336,16 +824,92 @@ if __name__ == "__main__":
         default=1,
         help="Seconds to sleep on load and after scroll",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of browsers to scrape companies with concurrently",
+    )
+    parser.add_argument(
+        "--retention_days",
+        type=int,
+        default=None,
+        help="Forget jobs not seen for this many days, overriding the config's retention_days",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip the companies the last run already checked, if it didn't finish",
+    )
+    parser.add_argument(
+        "--checkpoint_file",
+        type=str,
+        default=None,
+        help="Where to record each company's results as the run goes, for --resume. Defaults to <run record file name>_checkpoint.jsonl",
+    )
+    parser.add_argument(
+        "--metrics_file",
+        type=str,
+        default=None,
+        help="Append how long each company took etc. to this JSON lines file",
+    )
+    parser.add_argument(
+        "--profile_driver",
+        action="store_true",
+        help="Count and time every WebDriver command, and print which scrapers and companies sent the most",
+    )
+    parser.add_argument(
+        "--profile_driver_folded",
+        type=str,
+        default=None,
+        help="With --profile_driver, also write the commands as folded stacks for a flame graph to this file",
+    )
+    parser.add_argument(
+        "--ignore_page_cache",
+        action="store_true",
+        help="Read the jobs of companies whose page hasn't changed since they were last read too",
+    )
+    parser.add_argument(
+        "--use_http_alternatives",
+        action="store_true",
+        help="Read Greenhouse, Lever and Ashby boards from their JSON instead of in the browser, except for companies that set use_browser",
+    )
+    parser.add_argument(
+        "--board_cache_dir",
+        type=str,
+        default=None,
+        help="Share the rows of job boards like Climate Tech List with other runs through this folder, scraping each at most once per --board_cache_minutes",
+    )
+    parser.add_argument(
+        "--board_cache_minutes",
+        type=int,
+        default=DEFAULT_MAX_AGE_MINUTES,
+        help="How long rows in --board_cache_dir are used for before the board is scraped again",
+    )
     args = parser.parse_args()
 
-    with open(args.run_record_json) as f:
-        run_record = RunRecord.from_dict(json.load(f))
+    run_record = open_run_record(args.run_record_json)
+    driver_profiler = (
+        DriverProfiler() if args.profile_driver or args.profile_driver_folded else None
+    )
+    checkpoint = FileCheckpoint(
+        (
+            args.checkpoint_file
+            if args.checkpoint_file
+            else default_checkpoint_path(args.run_record_json)
+        ),
+        args.resume,
+    )
 
-    options = webdriver.ChromeOptions()
-    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
-    if args.headless:
-        options.add_argument("--headless=new")
-    driver = webdriver.Chrome(options=options)
+    def create_driver(performance_log=False):
+        from selenium import webdriver
+
+        options = webdriver.ChromeOptions()
+        if performance_log:
+            options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        if args.headless:
+            options.add_argument("--headless=new")
+        return webdriver.Chrome(options=options)
 
     if args.add_scrapers_file:
         additional_scrapers_module = import_from_path(
@@ -357,13 +921,20 @@ if __name__ == "__main__":
     if args.config_file.endswith(".json"):
         with open(args.config_file) as f:
             config = json.load(f)
-            companies = get_companies(config["companies"], additional_scrapers_module)
+            companies = get_companies(
+                config["companies"],
+                additional_scrapers_module,
+                args.use_http_alternatives,
+            )
             search_terms = config["search_terms"]
             default_company_config = (
                 config["default_company_config"]
                 if "default_company_config" in config
                 else None
             )
+            retention_days = (
+                config["retention_days"] if "retention_days" in config else None
+            )
     else:
         config_module = import_from_path("config", args.config_file)
         companies = [
@@ -376,10 +947,17 @@ if __name__ == "__main__":
             if hasattr(config_module, "default_company_config")
             else None
         )
+        retention_days = (
+            config_module.retention_days
+            if hasattr(config_module, "retention_days")
+            else None
+        )
+    if args.retention_days is not None:
+        retention_days = args.retention_days
 
-    new_relevant_jobs, run_record, verify_no_jobs, errors_message = (
+    new_relevant_jobs, run_record, verify_no_jobs, errors_message, company_metrics = (
         get_new_relevant_jobs(
-            driver,
+            None,  # only launched if a company needs a browser
             run_record,
             companies,
             search_terms,
@@ -387,9 +965,32 @@ if __name__ == "__main__":
             args.limit_company,
             args.add_search_term,
             args.default_sleep,
+            args.workers,
+            create_driver,
+            retention_days,
+            checkpoint,
+            driver_profiler,
+            use_page_cache=not args.ignore_page_cache,
+            use_http_alternatives=args.use_http_alternatives,
+            board_store=(
+                DirectoryBoardStore(args.board_cache_dir, args.board_cache_minutes)
+                if args.board_cache_dir
+                else None
+            ),
         )
     )
 
+    print(format_metrics_table(company_metrics))
+    if driver_profiler:
+        print(driver_profiler.format_report())
+        if args.profile_driver_folded:
+            with open(args.profile_driver_folded, "w") as f:
+                f.write(driver_profiler.folded_stacks())
+            print(f"Wrote folded stacks to {args.profile_driver_folded}")
+    if args.metrics_file:
+        write_metrics_report(company_metrics, args.metrics_file)
+        print(f"Wrote metrics to {args.metrics_file}")
+
     if len(verify_no_jobs) > 0:
         print(
             bcolors.OKBLUE
@@ -406,19 +1007,23 @@ if __name__ == "__main__":
     if len(new_relevant_jobs) == 0:
         print("No new jobs")
 
-    if len(new_relevant_jobs) > 0:
-        filename = args.run_record_json
+    # Saved even without new jobs, as when jobs were last seen, page fingerprints and saved requests change every run
+    filename = args.run_record_json
+
+    if args.backup_run_record:
+        path, extension = os.path.splitext(filename)
+        backup_dest = f"{path}_backup{extension}"
+        shutil.copy2(filename, backup_dest)
+        print(f"Backed up {filename} to {backup_dest}")
 
-        if args.backup_run_record:
+    if not args.dont_write_run_record:
+        if args.dont_replace_run_record:
             path, extension = os.path.splitext(filename)
-            backup_dest = f"{path}_backup{extension}"
-            shutil.copy2(filename, backup_dest)
-            print(f"Backed up {filename} to {backup_dest}")
-
-        if not args.dont_write_run_record:
-            if args.dont_replace_run_record:
-                path, extension = os.path.splitext(filename)
-                filename = f"{path}_{str(datetime.datetime.now()).replace(" ", "_")}{extension}"
-            with open(filename, "w") as f:
-                json.dump(asdict(run_record), f, indent=4)
-            print(f"Wrote new existing jobs to {filename}")
+            filename = (
+                f"{path}_{str(datetime.datetime.now()).replace(" ", "_")}{extension}"
+            )
+        save_run_record(run_record, filename)
+        print(f"Wrote the run record to {filename}")
+
+    # The run finished, so there's nothing to resume
+    checkpoint.clear()
@@ -4,20 +4,31 @@ import json
 import datetime
 import boto3
 import argparse
+import itertools
 import tempfile
+import threading
 from tempfile import mkdtemp
-from dataclasses import asdict
-
-from selenium import webdriver
 
 from models import *
 from job_scrape import (
     get_new_relevant_jobs,
+    get_relevant_jobs,
+    select_companies,
     format_new_jobs_message,
     format_errors_message,
     get_companies,
     import_from_path,
 )
+from checkpoint import Checkpoint, default_checkpoint_path
+from board_store import BoardStore, DEFAULT_MAX_AGE_MINUTES
+from shards import get_new_relevant_jobs_in_shards, shard_result_dicts
+from driver_pool import DriverPool, reset_browser
+from metrics import format_metrics_table
+from driver_profiler import DriverProfiler
+
+# Browsers left running between invocations while the lambda stays warm, as launching Chrome takes seconds
+warm_drivers = []
+warm_drivers_lock = threading.Lock()
 
 
 def lambda_handler(event, context, local=False):
@@ -33,31 +44,39 @@ def lambda_handler(event, context, local=False):
         event["dont_write_existing"] if "dont_write_existing" in event else False
     )
 
-    options = webdriver.ChromeOptions()
-    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
-
-    if not local:
-        service = webdriver.ChromeService("/opt/chromedriver")
-        options.binary_location = "/opt/chrome/chrome"
-
-    options.add_argument("--headless=new")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--window-size=1280x1696")
-    options.add_argument("--single-process")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--disable-dev-tools")
-    options.add_argument("--no-zygote")
-    options.add_argument(f"--user-data-dir={mkdtemp()}")
-    options.add_argument(f"--data-path={mkdtemp()}")
-    options.add_argument(f"--disk-cache-dir={mkdtemp()}")
-    options.add_argument("--remote-debugging-port=9222")
-    options.add_argument("--disable-features=OptimizationGuideModelDownloading")
-
-    if local:
-        driver = webdriver.Chrome(options=options)
-    else:
-        driver = webdriver.Chrome(options=options, service=service)
+    workers = event["workers"] if "workers" in event else 1
+    resume = event["resume"] if "resume" in event else False
+    profile_driver = event["profile_driver"] if "profile_driver" in event else False
+    # Read the jobs of companies whose page hasn't changed since they were last read too
+    ignore_page_cache = (
+        event["ignore_page_cache"] if "ignore_page_cache" in event else False
+    )
+    # Read Greenhouse, Lever and Ashby boards from their JSON, except for companies that set use_browser
+    use_http_alternatives = (
+        event["use_http_alternatives"] if "use_http_alternatives" in event else False
+    )
+    # Split the companies across this many concurrent invocations of the lambda
+    shards = event["shards"] if "shards" in event else 1
+    # Set by the coordinating invocation on the invocations it starts
+    shard = event["shard"] if "shard" in event else None
+    # How long the rows of job boards shared between users (see board_store.py) are used for before scraping again
+    board_cache_minutes = (
+        event["board_cache_minutes"]
+        if "board_cache_minutes" in event
+        else DEFAULT_MAX_AGE_MINUTES
+    )
+    # Folder of the bucket, outside the users' folders, to share the rows in. Not shared if not given
+    board_cache_prefix = (
+        event["aws_config"]["board_cache_prefix"]
+        if "board_cache_prefix" in event["aws_config"]
+        else None
+    )
+    # Only one user's runs store the boards that every user's runs read
+    board_cache_writer = (
+        event["aws_config"]["board_cache_writer"]
+        if "board_cache_writer" in event["aws_config"]
+        else False
+    )
 
     # Assume role with permissions access user resources, and only user resources
     username = event["aws_config"]["username"]
@@ -69,6 +88,8 @@ def lambda_handler(event, context, local=False):
             event["aws_config"]["bucket_name"],
             username,
             event["aws_config"]["sns_topic_arn"],
+            board_cache_prefix,
+            board_cache_writer,
         ),
         DurationSeconds=1000,
     )
@@ -81,6 +102,17 @@ def lambda_handler(event, context, local=False):
 
     s3 = session.resource("s3")
     bucket = s3.Bucket(event["aws_config"]["bucket_name"])
+    board_store = (
+        S3BoardStore(
+            s3,
+            event["aws_config"]["bucket_name"],
+            board_cache_prefix,
+            board_cache_minutes,
+            read_only=not board_cache_writer,
+        )
+        if board_cache_prefix
+        else None
+    )
 
     with tempfile.TemporaryDirectory() as tmp_config_scrapers_folder:
         if "scrapers_file" in event["aws_config"]:
@@ -97,13 +129,18 @@ def lambda_handler(event, context, local=False):
             )
             config_file_content = config_object.get()["Body"].read().decode("utf-8")
             config = json.loads(config_file_content)
-            companies = get_companies(config["companies"], additional_scrapers_module)
+            companies = get_companies(
+                config["companies"], additional_scrapers_module, use_http_alternatives
+            )
             search_terms = config["search_terms"]
             default_company_config = (
                 config["default_company_config"]
                 if "default_company_config" in config
                 else None
             )
+            retention_days = (
+                config["retention_days"] if "retention_days" in config else None
+            )
         else:
             assert "config_file" in event["aws_config"]
             config_path = os.path.join(tmp_config_scrapers_folder, "config.py")
@@ -122,6 +159,11 @@ def lambda_handler(event, context, local=False):
                 if hasattr(config_module, "default_company_config")
                 else None
             )
+            retention_days = (
+                config_module.retention_days
+                if hasattr(config_module, "retention_days")
+                else None
+            )
 
     run_record_object = s3.Object(
         event["aws_config"]["bucket_name"], event["aws_config"]["run_record_json"]
@@ -129,20 +171,109 @@ def lambda_handler(event, context, local=False):
     file_content = run_record_object.get()["Body"].read().decode("utf-8")
     run_record = RunRecord.from_dict(json.loads(file_content))
 
-    new_relevant_jobs, run_record, verify_no_jobs, errors_message = (
-        get_new_relevant_jobs(
-            driver,
-            run_record,
-            companies,
-            search_terms,
-            default_company_config,
-            limit_company,
-            temp_term,
-            default_sleep,
-        )
-    )
+    driver_profiler = DriverProfiler() if profile_driver else None
+    run_record_json = event["aws_config"]["run_record_json"]
+
+    driver_pool = open_driver_pool(local, workers)
+    try:
+        if shard:
+            # Only scrape, and send the results back to the coordinating invocation to record and notify about
+            shard_company_names = set(shard["company_names"])
+            checkpoint = S3Checkpoint(
+                s3.Object(
+                    event["aws_config"]["bucket_name"],
+                    shard_checkpoint_path(run_record_json, shard["index"]),
+                ),
+                resume,
+            )
+            results = get_relevant_jobs(
+                None,
+                None,
+                temp_term,
+                default_sleep,
+                [
+                    company
+                    for company in companies
+                    if company.name in shard_company_names
+                ],
+                search_terms,
+                default_company_config,
+                workers,
+                None,
+                run_record,
+                checkpoint,
+                driver_profiler,
+                driver_pool,
+                not ignore_page_cache,
+                board_store,
+                use_http_alternatives,
+            )
+            result_dicts = shard_result_dicts(results)
+            if driver_profiler:
+                print(driver_profiler.format_report())
+            print("finished shard", shard["index"])
+            return {"statusCode": 200, "body": {"results": result_dicts}}
+
+        if shards > 1:
+            companies_to_check = select_companies(
+                companies, limit_company, use_http_alternatives
+            )
+            shard_count = min(shards, len(companies_to_check))
+            new_relevant_jobs, verify_no_jobs, errors_message, company_metrics = (
+                get_new_relevant_jobs_in_shards(
+                    run_record,
+                    companies_to_check,
+                    shard_count,
+                    lambda shard_index, company_names: invoke_shard(
+                        event, context, local, shard_index, company_names
+                    ),
+                    retention_days,
+                )
+            )
+        else:
+            checkpoint = S3Checkpoint(
+                s3.Object(
+                    event["aws_config"]["bucket_name"],
+                    default_checkpoint_path(run_record_json),
+                ),
+                resume,
+            )
+            (
+                new_relevant_jobs,
+                run_record,
+                verify_no_jobs,
+                errors_message,
+                company_metrics,
+            ) = get_new_relevant_jobs(
+                None,  # browsers come from driver_pool, only launched if a company needs one
+                run_record,
+                companies,
+                search_terms,
+                default_company_config,
+                limit_company,
+                temp_term,
+                default_sleep,
+                workers,
+                None,
+                retention_days,
+                checkpoint,
+                driver_profiler,
+                driver_pool,
+                not ignore_page_cache,
+                board_store,
+                use_http_alternatives,
+            )
+    finally:
+        with warm_drivers_lock:
+            warm_drivers.extend(driver_pool.close())
+
     return_message = {}
 
+    print(format_metrics_table(company_metrics))
+    if driver_profiler:
+        print(driver_profiler.format_report())
+    return_message["metrics"] = [asdict(metrics) for metrics in company_metrics]
+
     sns = session.client("sns")
 
     if len(new_relevant_jobs) > 0:
@@ -176,18 +307,191 @@ def lambda_handler(event, context, local=False):
             f"{path}_{str(datetime.datetime.now()).replace(" ", "_")}{extension}",
         )
     if not dont_write_existing:
-        run_record_object.put(Body=json.dumps(asdict(run_record), indent=4))
+        run_record_object.put(Body=json.dumps(run_record.to_dict(), indent=4))
+    if shards > 1:
+        for shard_index in range(shard_count):
+            # Opening a checkpoint without resuming clears it
+            S3Checkpoint(
+                s3.Object(
+                    event["aws_config"]["bucket_name"],
+                    shard_checkpoint_path(run_record_json, shard_index),
+                )
+            )
+    else:
+        checkpoint.clear()
 
     print("finished")
     return {"statusCode": 200, "body": return_message}
 
 
+class S3Checkpoint(Checkpoint):
+    """S3 objects can't be appended to, so each result rewrites the whole checkpoint"""
+
+    def __init__(self, s3_object, resume=False):
+        self.s3_object = s3_object
+        self.lines = []
+        super().__init__(resume)
+
+    def read(self) -> str:
+        try:
+            content = self.s3_object.get()["Body"].read().decode("utf-8")
+        except self.s3_object.meta.client.exceptions.NoSuchKey:
+            return ""
+        self.lines = content.splitlines()
+        return content
+
+    def append(self, line: str):
+        self.lines.append(line)
+        self.s3_object.put(Body="\n".join(self.lines))
+
+    def clear(self):
+        self.lines = []
+        self.s3_object.put(Body="")
+
+
+class S3BoardStore(BoardStore):
+    def __init__(
+        self,
+        s3,
+        bucket_name,
+        prefix,
+        max_age_minutes=DEFAULT_MAX_AGE_MINUTES,
+        read_only=False,
+    ):
+        self.s3 = s3
+        self.bucket_name = bucket_name
+        self.prefix = prefix
+        super().__init__(max_age_minutes, read_only)
+
+    def read(self, name) -> str:
+        s3_object = self.s3.Object(self.bucket_name, self.prefix + name)
+        try:
+            return s3_object.get()["Body"].read().decode("utf-8")
+        except s3_object.meta.client.exceptions.NoSuchKey:
+            return ""
+
+    def write(self, name, content: str):
+        self.s3.Object(self.bucket_name, self.prefix + name).put(Body=content)
+
+
+def shard_checkpoint_path(run_record_json, shard_index):
+    path, extension = os.path.splitext(run_record_json)
+    return default_checkpoint_path(f"{path}_shard{shard_index}{extension}")
+
+
+def invoke_shard(event, context, local, shard_index, company_names) -> list[dict]:
+    """Runs this lambda again on a shard of the companies, and returns its results"""
+    shard_event = {key: value for key, value in event.items() if key != "shards"}
+    shard_event["shard"] = {"index": shard_index, "company_names": company_names}
+    if local:
+        # Stands in for another invocation when running locally
+        return lambda_handler(shard_event, context, local)["body"]["results"]
+
+    from botocore.config import Config
+
+    # With the lambda's own role, as users' roles can't invoke it. Shards can take as long as the lambda's timeout.
+    lambda_client = boto3.client(
+        "lambda", config=Config(read_timeout=900, retries={"max_attempts": 0})
+    )
+    response = lambda_client.invoke(
+        FunctionName=context.invoked_function_arn,
+        InvocationType="RequestResponse",
+        Payload=json.dumps(shard_event),
+    )
+    payload = json.loads(response["Payload"].read())
+    if "FunctionError" in response:
+        raise Exception(
+            f"Shard {shard_index} lambda error {payload.get('errorType')}: {payload.get('errorMessage')}"
+        )
+    return payload["body"]["results"]
+
+
+def open_driver_pool(local, workers=1) -> DriverPool:
+    """
+    Starts with the browsers kept from the last invocation that still work, cleared of its cookies, tabs etc. Keeps to
+    one browser per worker, and one more so that there can be one of each kind, so that a warm lambda doesn't hold on
+    to idle browsers of both kinds for every worker, nor relaunch one whenever the kind of company changes (see
+    DriverPool).
+    """
+    with warm_drivers_lock:
+        drivers = list(warm_drivers)
+        warm_drivers.clear()
+    usable_drivers = []
+    for driver in drivers:
+        try:
+            reset_browser(driver)
+            usable_drivers.append(driver)
+        except Exception as e:
+            print(f"Kept browser is unusable, a new one will be launched: {repr(e)}")
+            try:
+                driver.quit()
+            except Exception:
+                pass  # already dead
+    if len(usable_drivers) > 0:
+        print(f"Reusing {len(usable_drivers)} browser(s) from the last invocation")
+    return DriverPool(
+        usable_drivers,
+        lambda performance_log: create_driver(local, performance_log),
+        keep_open=True,
+        max_browsers=workers,
+    )
+
+
+def quit_warm_drivers():
+    with warm_drivers_lock:
+        drivers = list(warm_drivers)
+        warm_drivers.clear()
+    for driver in drivers:
+        driver.quit()
+
+
+# Each concurrent browser needs its own debugging port
+debugging_ports = itertools.count(9222)
+
+
+def create_driver(local=False, performance_log=False):
+    # Only imported once a company needs a browser, which a sharded run's coordinating invocation never does
+    from selenium import webdriver
+
+    options = webdriver.ChromeOptions()
+    if performance_log:
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+    if not local:
+        service = webdriver.ChromeService("/opt/chromedriver")
+        options.binary_location = "/opt/chrome/chrome"
+
+    options.add_argument("--headless=new")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--window-size=1280x1696")
+    options.add_argument("--single-process")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-dev-tools")
+    options.add_argument("--no-zygote")
+    options.add_argument(f"--user-data-dir={mkdtemp()}")
+    options.add_argument(f"--data-path={mkdtemp()}")
+    options.add_argument(f"--disk-cache-dir={mkdtemp()}")
+    options.add_argument(f"--remote-debugging-port={next(debugging_ports)}")
+    options.add_argument("--disable-features=OptimizationGuideModelDownloading")
+
+    if local:
+        return webdriver.Chrome(options=options)
+    return webdriver.Chrome(options=options, service=service)
+
+
 def assert_no_boto(file_path):
     with open(file_path) as f:
         assert "boto" not in f.read()
 
 
-def get_inline_session_policy(bucket_name, username, sns_topic_arn):
+def get_inline_session_policy(
+    bucket_name,
+    username,
+    sns_topic_arn,
+    board_cache_prefix=None,
+    board_cache_writer=False,
+):
     policy = {
         "Version": "2012-10-17",
         "Statement": [
@@ -209,6 +513,26 @@ def get_inline_session_policy(bucket_name, username, sns_topic_arn):
             },
         ],
     }
+    if board_cache_prefix:
+        # Every user's run reads the shared boards, but only the writer's stores them, so that one user can't change
+        # what the others' runs find
+        policy["Statement"] += [
+            {
+                "Action": ["s3:ListBucket"],
+                "Effect": "Allow",
+                "Resource": [f"arn:aws:s3:::{bucket_name}"],
+                "Condition": {"StringLike": {"s3:prefix": [f"{board_cache_prefix}*"]}},
+            },
+            {
+                "Action": (
+                    ["s3:GetObject", "s3:PutObject"]
+                    if board_cache_writer
+                    else ["s3:GetObject"]
+                ),
+                "Effect": "Allow",
+                "Resource": [f"arn:aws:s3:::{bucket_name}/{board_cache_prefix}*"],
+            },
+        ]
     policy_json = json.dumps(policy)
     return policy_json
 
@@ -228,9 +552,18 @@ if __name__ == "__main__":
         "scrapers_file": "",
         "run_record_json": "",
         "sns_topic_arn": "",
+        "board_cache_prefix": "shared_boards/",
+        "board_cache_writer": true/false,
     }
     "limit_company": "",
     "default_sleep": 2,
+    "workers": 1,
+    "shards": 1,
+    "resume": true/false,
+    "profile_driver": true/false,
+    "ignore_page_cache": true/false,
+    "use_http_alternatives": true/false,
+    "board_cache_minutes": 60,
     "dont_replace_existing": true/false,
     "dont_write_existing": true/false
 }
@@ -241,4 +574,7 @@ if __name__ == "__main__":
 
     with open(args.event_json) as f:
         lambda_event = json.load(f)
-        lambda_handler(lambda_event, context=None, local=True)
+        try:
+            lambda_handler(lambda_event, context=None, local=True)
+        finally:
+            quit_warm_drivers()
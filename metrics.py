@@ -0,0 +1,94 @@
+"""
+Reports of where a run spent its time, from the CompanyMetrics collected for each company.
+"""
+
+import json
+import time
+import contextlib
+
+from models import *
+
+SUMMARY_TABLE_ROWS = 15
+
+
+@contextlib.contextmanager
+def on_driver_commands(driver, callback):
+    """
+    Calls callback(driver_command, params, seconds) after each WebDriver command sent in the with block. Every command,
+    including those from WebElements, goes through driver.execute.
+    """
+    if not hasattr(driver, "execute"):
+        yield
+        return
+
+    previous_execute = driver.__dict__.get("execute")
+    execute = driver.execute
+
+    def hooked_execute(driver_command, params=None):
+        start = time.perf_counter()
+        try:
+            return execute(driver_command, params)
+        finally:
+            callback(driver_command, params, time.perf_counter() - start)
+
+    driver.execute = hooked_execute
+    try:
+        yield
+    finally:
+        if previous_execute:
+            driver.execute = previous_execute
+        else:
+            del driver.execute
+
+
+def count_driver_calls(driver, metrics: CompanyMetrics):
+    """Counts the WebDriver commands sent in the with block into metrics.driver_calls"""
+
+    def count(driver_command, params, seconds):
+        metrics.driver_calls += 1
+
+    return on_driver_commands(driver, count)
+
+
+def write_metrics_report(company_metrics: list[CompanyMetrics], path):
+    """Appends a line per company, so that runs can be compared over time"""
+    with open(path, "a") as f:
+        for metrics in company_metrics:
+            f.write(json.dumps(asdict(metrics)) + "\n")
+
+
+def format_metrics_table(
+    company_metrics: list[CompanyMetrics], rows=SUMMARY_TABLE_ROWS
+) -> str:
+    """The slowest companies, then the totals"""
+    header = f"{'company':<30} {'status':<36} {'total':>7} {'load':>7} {'wait':>7} {'extract':>7} {'calls':>6} {'jobs':>5} {'relevant':>8} {'new':>4} {'dup':>4}"
+    lines = [header, "-" * len(header)]
+
+    def line(name, status, metrics_list):
+        return (
+            f"{name[:30]:<30} {status[:36]:<36}"
+            f" {sum(m.total_seconds for m in metrics_list):>7.1f}"
+            f" {sum(m.load_seconds for m in metrics_list):>7.1f}"
+            f" {sum(m.wait_seconds for m in metrics_list):>7.1f}"
+            f" {sum(m.extract_seconds for m in metrics_list):>7.1f}"
+            f" {sum(m.driver_calls for m in metrics_list):>6}"
+            f" {sum(m.jobs_scraped for m in metrics_list):>5}"
+            f" {sum(m.jobs_relevant for m in metrics_list):>8}"
+            f" {sum(m.jobs_new for m in metrics_list):>4}"
+            f" {sum(m.jobs_duplicate for m in metrics_list):>4}"
+        )
+
+    slowest = sorted(company_metrics, key=lambda m: m.total_seconds, reverse=True)
+    for metrics in slowest[:rows]:
+        lines.append(
+            line(
+                metrics.company_name,
+                "ERROR" if metrics.error else str(metrics.jobs_page_status),
+                [metrics],
+            )
+        )
+    if len(slowest) > rows:
+        lines.append(f"... {len(slowest) - rows} more")
+    lines.append("-" * len(header))
+    lines.append(line(f"{len(company_metrics)} companies", "", company_metrics))
+    return "\n".join(lines)
@@ -1,8 +1,15 @@
+import re
+import json
 import time
+import hashlib
 import datetime
+import traceback
+import functools
+import contextlib
+import urllib.parse
 
 from typing import TypedDict
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
 from enum import Enum
 
 
@@ -44,6 +51,21 @@ class JobPosting:
             ), f"JobPosting link must be string, got type {type(self.link)} instead"
 
 
+@dataclass
+class ReadyCondition:
+    """
+    What a scraper's page looks like once it has loaded, so the page can be scraped as soon as it is ready instead of after a fixed sleep.
+
+    locator: (By, value) of a job row. Waits until one is present.
+    count_stable_ms: With locator, instead waits until the number of rows stops changing for this long. For pages that load rows in gradually.
+    network_idle_ms: Waits until no requests have finished for this long.
+    """
+
+    locator: tuple[str, str] = None
+    count_stable_ms: int = None
+    network_idle_ms: int = None
+
+
 @dataclass
 class Company:
     name: str
@@ -55,11 +77,22 @@ class Company:
     config: dict = None
     load_sleep: int = None
     scroll_sleep: int = None
+    wait_timeout: int = None  # max seconds to wait for the page to be ready
+    # sleep load_sleep/scroll_sleep instead of waiting for the page to be ready
+    fixed_sleep: bool = False
     diff_page: bool = False
     location: str = None
     no_jobs_phrase: str = None
     notes: str = None
     relevant_search_terms: list[str] = None
+    # scrape with jobs_page_class's HTTP alternative if it has one, see select_companies
+    use_http: bool = False
+    # scrape with jobs_page_class even if the run uses HTTP alternatives
+    use_browser: bool = False
+    # URL patterns not to download while the page loads, instead of request_blocking.DEFAULT_BLOCKED_URLS. [] blocks nothing
+    blocked_urls: list[str] = None
+    # forget jobs not seen for this many days, instead of the config's retention_days
+    retention_days: int = None
     tags: list[str] = None
     what: str = None
     referral: str = None
@@ -69,18 +102,410 @@ class Company:
     scrape_pages: [(str, CrunchbasePageType)] = None
 
 
+class KnownJobs:
+    """
+    Read-only view of a company's job ids in the run record, for scrapers that page through results (newest first)
+    to stop once they're only finding jobs that have been seen before.
+
+    Scrapers also say here when they stopped before the last page, so that the jobs they didn't get to aren't taken to
+    be gone: stop_early at jobs that have been seen before, stop_at_limit at their cap on how many pages they read.
+    """
+
+    def __init__(self, job_ids, is_relevant=lambda job: True):
+        self._job_ids = job_ids
+        self._is_relevant = is_relevant
+        self.stopped_early = False
+        self.stopped_at_limit = False
+
+    def __contains__(self, job_id):
+        return job_id in self._job_ids
+
+    def __len__(self):
+        return len(self._job_ids)
+
+    def page_is_known(self, page_jobs) -> bool:
+        # Only relevant jobs are kept in the run record, so irrelevant ones can't tell us anything
+        relevant_ids = [job.id for job in page_jobs if self._is_relevant(job)]
+        return len(relevant_ids) > 0 and all(
+            job_id in self._job_ids for job_id in relevant_ids
+        )
+
+    def stop_early(self):
+        self.stopped_early = True
+
+    def stop_at_limit(self):
+        self.stopped_at_limit = True
+
+
+@dataclass
+class PageFingerprint:  # serializable
+    """What a company's jobs page was the last time all its jobs were read, see PageCache"""
+
+    fingerprint: str  # sha256 of the page's text and links, or of the response body
+    config_key: str  # see page_config_key
+    etag: str = None
+    last_modified: str = None
+
+
+class PageUnchanged(Exception):
+    pass
+
+
+class PageCache:
+    """
+    Tells whether a company's jobs page is the same as the last time all its jobs were read, in which case there can't
+    be a new job on it and reading them can be skipped. For scrapers declared with page_cache=True.
+
+    previous: the page's PageFingerprint from the run record. Ignored if the company's config or the search terms have
+    changed since, so that the jobs are read again with them.
+    current: what the page is now, to store in the run record once its jobs have been recorded
+    """
+
+    def __init__(self, config_key, previous: PageFingerprint = None):
+        self.config_key = config_key
+        self.previous = (
+            previous if previous and previous.config_key == config_key else None
+        )
+        self.current: PageFingerprint = None
+
+    def conditional_headers(self) -> dict:
+        """For a request to answer 304 Not Modified if the response hasn't changed"""
+        headers = {}
+        if self.previous and self.previous.etag:
+            headers["If-None-Match"] = self.previous.etag
+        if self.previous and self.previous.last_modified:
+            headers["If-Modified-Since"] = self.previous.last_modified
+        return headers
+
+    def not_modified(self):
+        """The server answered 304 Not Modified. Raises PageUnchanged."""
+        self.current = self.previous
+        raise PageUnchanged()
+
+    def check(self, content, etag=None, last_modified=None):
+        """Records what the page is now, and raises PageUnchanged if it's the same as last time"""
+        if isinstance(content, str):
+            content = content.encode()
+        self.current = PageFingerprint(
+            fingerprint=hashlib.sha256(content).hexdigest(),
+            config_key=self.config_key,
+            etag=etag,
+            last_modified=last_modified,
+        )
+        if self.previous and self.previous.fingerprint == self.current.fingerprint:
+            raise PageUnchanged()
+
+
+def page_config_key(company, search_terms, default_company_config) -> str:
+    """Changes whenever anything that decides which of a company's jobs are recorded does"""
+    return hashlib.sha256(
+        json.dumps(
+            {
+                "jobs_page": company.jobs_page,
+                "jobs_page_class_name": company.jobs_page_class_name,
+                "config": company.config if company.config else default_company_config,
+                "search_terms": (
+                    company.relevant_search_terms
+                    if company.relevant_search_terms
+                    else search_terms
+                ),
+                "no_jobs_phrase": company.no_jobs_phrase,
+            },
+            sort_keys=True,
+            default=str,
+        ).encode()
+    ).hexdigest()
+
+
+class SavedRequest:
+    """
+    The request a company's page gets its jobs with, saved in the run record so that the next run can make it straight
+    away over HTTP, without loading the page in a browser. For scrapers declared with saves_request=True.
+
+    saved: the request from the run record, {"url": "", "headers": {}}, None if there isn't one yet
+    found: set by get_jobs to the request it found the page making
+    failed: if making the saved request again failed (e.g. it expired, or the response changed shape), so that it is
+    removed from the run record unless a new one was found
+    """
+
+    def __init__(self, saved: dict = None):
+        self.saved = saved
+        self.found: dict = None
+        self.failed = False
+
+
+class SharedBoard:
+    """
+    The rows of a job board that many users' configs list (like Climate Tech List), before any config has filtered
+    them, shared between users' runs through a BoardStore (see board_store.py) so that the board is only scraped once
+    in a while, each run picking out its own jobs from the rows. For scrapers declared with shares_board=True.
+
+    cached: the rows a run stored recently, None if there aren't any
+    previous: the rows stored last, however old, if the board was scraped in full not long before (see
+        board_store.FULL_SCRAPE_INTERVAL). A scraper paging through the board, newest first, can stop at the first page
+        it finds in them and keep the rest of them, instead of paging through the whole board. None if there aren't any
+    stored_stopped_at_limit: if the scrape that stored the rows (cached or previous) stopped at its cap on how many
+        pages it reads, so that they may not have all the board's jobs
+    fetched: set by get_jobs (or fetch_jobs) to the rows it scraped, to store for the runs after
+    continues_previous: set by get_jobs when fetched ends with rows kept from previous
+    """
+
+    def __init__(
+        self,
+        cached=None,
+        previous=None,
+        previous_scraped_in_full_at=None,
+        stored_stopped_at_limit=False,
+    ):
+        self.cached = cached
+        self.previous = previous
+        self.previous_scraped_in_full_at = previous_scraped_in_full_at
+        self.stored_stopped_at_limit = stored_stopped_at_limit
+        self.fetched = None
+        self.continues_previous = False
+
+
+# Rough relative cost of scraping a company, 1 being a single request over HTTP
+BROWSER_SCRAPER_COST = 5
+HTTP_SCRAPER_COST = 1
+
+
 class JobsPage:
+    """What the engine needs to know about a scraper. See declare_scraper for what each means."""
+
+    needs_browser = True
+    # None until declared, as a scraper that doesn't say may read it
+    needs_performance_log: bool = None
+    ready_condition: ReadyCondition = None
+    # If True, get_jobs is also passed a KnownJobs to be able to stop paging early
+    paginates = False
+    cost = BROWSER_SCRAPER_COST
+    page_cache = False
+    saves_request = False
+    shares_board = False
+
     @staticmethod
     def get_jobs(driver):
         raise NotImplementedError("Unexpected call to base class")
 
 
+# Gets jobs straight from the job board's data over HTTP, without launching a browser
+class HttpJobsPage(JobsPage):
+    needs_browser = False
+    cost = HTTP_SCRAPER_COST
+
+    @staticmethod
+    def fetch_jobs(jobs_page, config=None, page_cache: PageCache = None):
+        raise NotImplementedError("Unexpected call to base class")
+
+
+def declare_scraper(
+    needs_performance_log=False,
+    ready_condition: ReadyCondition = None,
+    paginates=False,
+    cost=None,
+    page_cache=False,
+    saves_request=False,
+    shares_board=False,
+):
+    """
+    Class decorator declaring what the engine needs to know about a scraper, as class attributes. Whether it needs a
+    browser comes from the class: HttpJobsPage scrapers don't.
+
+    needs_performance_log: get_jobs reads the requests the page made from driver.get_log("performance")
+    ready_condition: what the page looks like once it can be scraped, see ReadyCondition
+    paginates: get_jobs also takes a KnownJobs, to stop paging once it only finds known jobs
+    cost: rough time to scrape a company relative to the others (see BROWSER_SCRAPER_COST), so that the slowest can
+    be started first
+    page_cache: whether the page has changed since its jobs were last read can be told before reading them (see
+    PageCache). For a browser scraper, all the jobs it reads are in the page's text and links once it has loaded, not in
+    an iframe or behind a Next button. An HttpJobsPage's fetch_jobs is passed a PageCache to make its request with.
+    saves_request: get_jobs is also passed a SavedRequest to set the request it found the page making on, and the class
+    has a fetch_jobs(jobs_page, config, saved_request) that makes it again over HTTP. The browser is only used when
+    there is no saved request yet, or it fails.
+    shares_board: get_jobs (and fetch_jobs, with saves_request) is also passed a SharedBoard to set the board's rows on,
+    as JSON-serializable data that doesn't depend on the config, and the class has a jobs_from_board(rows, config) that
+    gets the config's jobs from them. With a BoardStore, the board is only scraped when it has no recent rows.
+    """
+
+    def declare(cls):
+        cls.needs_browser = getattr(cls, "needs_browser", True)
+        cls.needs_performance_log = needs_performance_log
+        cls.ready_condition = ready_condition
+        cls.paginates = paginates
+        cls.cost = (
+            cost
+            if cost
+            else (BROWSER_SCRAPER_COST if cls.needs_browser else HTTP_SCRAPER_COST)
+        )
+        cls.page_cache = page_cache
+        cls.saves_request = saves_request
+        cls.shares_board = shares_board
+        return cls
+
+    return declare
+
+
+def needs_browser(company) -> bool:
+    return company.is_crunchbase or getattr(
+        company.jobs_page_class, "needs_browser", True
+    )
+
+
+def needs_performance_log(company) -> bool:
+    # Scrapers that don't say, like ones written before declare_scraper, may read it
+    declared = getattr(company.jobs_page_class, "needs_performance_log", None)
+    return not company.is_crunchbase and declared is not False
+
+
+def scrape_cost(company) -> int:
+    if company.is_crunchbase:
+        return BROWSER_SCRAPER_COST * len(company.scrape_pages)
+    return getattr(
+        company.jobs_page_class,
+        "cost",
+        BROWSER_SCRAPER_COST if needs_browser(company) else HTTP_SCRAPER_COST,
+    )
+
+
 class JobsPageStatus(Enum):
     SPECIFIC_NO_JOBS_PHRASE_FOUND = 1
     GENERIC_NO_JOBS_PHRASE_FOUND = 2
     NO_JOBS_PHRASE_NOT_FOUND_BUT_NO_JOBS = 3
     SOME_JOB_FOUND = 4
     NO_JOBS_FOUND = 5
+    UNCHANGED = 6  # since its jobs were last read, see PageCache
+
+
+@dataclass
+class CompanyMetrics:  # serializable
+    """
+    Where a company's scrape spent its time, in seconds. Over HTTP, load_seconds is the whole fetch.
+    wait_seconds includes sleeps as well as waiting for the page to be ready.
+    """
+
+    company_name: str
+    started_at: str = None
+    jobs_page_status: str = None
+    error: bool = False
+    total_seconds: float = 0
+    load_seconds: float = 0
+    wait_seconds: float = 0
+    extract_seconds: float = 0
+    driver_calls: int = 0
+    jobs_scraped: int = 0
+    jobs_relevant: int = 0
+    jobs_new: int = 0
+    jobs_duplicate: int = (
+        0  # new to the company, but another company already has it, see posting_key
+    )
+
+    @contextlib.contextmanager
+    def timed(self, field_name):
+        """Adds the time spent in the with block to field_name"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            setattr(
+                self,
+                field_name,
+                getattr(self, field_name) + time.perf_counter() - start,
+            )
+
+
+@dataclass
+class CompanyResult:
+    company: Company
+    relevant_jobs: list[JobPosting]
+    jobs_page_status: JobsPageStatus = None
+    stopped_early: bool = False
+    stopped_at_limit: bool = False
+    error: Exception = None
+    metrics: CompanyMetrics = None
+    page_fingerprint: PageFingerprint = None
+    saved_request: dict = None  # see SavedRequest
+    saved_request_failed: bool = False
+
+    def read_all_jobs(self) -> bool:
+        """If every job the company has was read, so a job that wasn't found is no longer posted"""
+        return (
+            self.error is None
+            and not self.stopped_early
+            and not self.stopped_at_limit
+            and self.jobs_page_status
+            in {
+                JobsPageStatus.SOME_JOB_FOUND,
+                JobsPageStatus.SPECIFIC_NO_JOBS_PHRASE_FOUND,
+            }
+        )
+
+
+class TermMatcher:
+    """
+    A list of search terms, lower cased and compiled once so that checking each title is cheap.
+    Get one with TermMatcher.of(terms), which reuses the matcher for the same terms.
+    """
+
+    def __init__(self, terms):
+        lower_terms = [term.lower() for term in terms]
+        self.words = frozenset(lower_terms)
+        self.pattern = re.compile(trie_pattern(lower_terms))
+
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _of(terms: tuple[str]):
+        return TermMatcher(terms)
+
+    @staticmethod
+    def of(terms):
+        return TermMatcher._of(tuple(terms))
+
+    def contains_any(self, lower_title) -> bool:
+        """If any term is a substring of the (lower cased) title"""
+        return self.pattern.search(lower_title) is not None
+
+    def has_any_word(self, lower_title) -> bool:
+        """If any term is a whole whitespace separated word of the (lower cased) title"""
+        return not self.words.isdisjoint(lower_title.split())
+
+
+def trie_pattern(terms) -> str:
+    """
+    A regex matching any of terms, shaped as a trie so that the regex engine tries each character once per position
+    instead of once per term.
+    """
+    if not terms:
+        # Matches nothing, like any() of no terms
+        return "(?!)"
+    trie = {}
+    for term in terms:
+        node = trie
+        for character in term:
+            node = node.setdefault(character, {})
+        node[""] = True
+
+    def node_pattern(node):
+        if "" in node:
+            # A term ends here, so anything longer matching too doesn't matter
+            return ""
+        alternatives = [
+            re.escape(character) + node_pattern(child)
+            for character, child in node.items()
+        ]
+        if len(alternatives) == 1:
+            return alternatives[0]
+        return "(?:" + "|".join(alternatives) + ")"
+
+    return node_pattern(trie)
+
+
+def is_excluded(config, title) -> bool:
+    if config and "exclude_search_terms" in config:
+        return TermMatcher.of(config["exclude_search_terms"]).has_any_word(
+            title.lower()
+        )
+    return False
 
 
 @dataclass
@@ -91,17 +516,228 @@ class ScrapeError:  # serializable
     is_new_this_run: bool = False
 
 
+class WorkerError(Exception):
+    """An error a company hit in another process (a shard's lambda), which only sent back its text"""
+
+    def __init__(self, message, description):
+        super().__init__(message)
+        # The message and traceback, as the errors message shows them
+        self.description = description
+
+
+def describe_error(error: Exception) -> str:
+    """The error's message and traceback, for the errors message"""
+    if isinstance(error, WorkerError):
+        return error.description
+    return f"{getattr(error, 'msg', repr(error))}\n{''.join(traceback.format_exception(error))}"
+
+
+# Query parameters that only say where the visitor came from, besides utm_*. Not generic ones like ref or source, which
+# some job sites use for which job it is
+TRACKING_PARAMETERS = {"gh_src", "lever-source"}
+# Hosts that serve the same postings at the same paths
+HOST_ALIASES = {"boards.greenhouse.io": "job-boards.greenhouse.io"}
+
+
+def canonical_url(url) -> str:
+    """
+    The posting's URL without what varies between links to it: scheme, www., tracking parameters, /apply, and a
+    fragment that is only a place on the page. A fragment that is a route (#/ or #!), which single page job boards show
+    each posting at, is kept.
+    """
+    parts = urllib.parse.urlsplit(url.strip())
+    host = parts.netloc.lower().removeprefix("www.")
+    host = HOST_ALIASES.get(host, host)
+    path = parts.path.rstrip("/").removesuffix("/apply")
+    fragment = f"#{parts.fragment}" if parts.fragment.startswith(("/", "!")) else ""
+    if not parts.query:
+        return host + path + fragment
+    query = urllib.parse.urlencode(
+        sorted(
+            (key, value)
+            for key, value in urllib.parse.parse_qsl(
+                parts.query, keep_blank_values=True
+            )
+            if not key.lower().startswith("utm_")
+            and key.lower() not in TRACKING_PARAMETERS
+        )
+    )
+    return host + path + (f"?{query}" if query else "") + fragment
+
+
+def posting_key(company, job: JobPosting) -> str:
+    """
+    What the same posting has in common wherever it's scraped from, e.g. a company's own page and a board listing many
+    companies' jobs: the page its link goes to. None if the job has no link to a page.
+
+    Titles aren't compared, as a company can have several different postings with the same title.
+    """
+    if company.is_crunchbase:
+        return None
+    url = job.link if job.link else job.id
+    if not url.startswith(("http://", "https://")):
+        return None
+    return canonical_url(url)
+
+
 @dataclass
 class RunRecord:
+    """
+    The run record as one JSON object. See run_record_store.py for the SQLite run record, which has the same methods.
+
+    A company's job ids are only turned into a set when that company is looked at, and only the companies with new
+    jobs are re-sorted when writing.
+
+    job_history: company name -> job id -> [first seen, last seen] as ISO dates. Ids from before this was kept start
+    out with no history, and get one the first time they're seen or compacted.
+
+    posting_keys: posting key -> [company name, job id] of the first job seen with it, to tell when a company's new job
+    is another company's too (see posting_key). A key whose job has since been forgotten is free for the next job.
+    """
+
     existing_jobs: dict[str, list[str]]
     errors: list[ScrapeError]
+    job_history: dict[str, dict[str, list[str]]] = None
+    # company name -> PageFingerprint as a dict
+    page_fingerprints: dict[str, dict] = None
+    # company name -> SavedRequest.request
+    saved_requests: dict[str, dict] = None
+    posting_keys: dict[str, list[str]] = None
+
+    def __post_init__(self):
+        if self.job_history is None:
+            self.job_history = {}
+        if self.page_fingerprints is None:
+            self.page_fingerprints = {}
+        if self.saved_requests is None:
+            self.saved_requests = {}
+        if self.posting_keys is None:
+            self.posting_keys = {}
+        self._job_id_sets = {}
+        self._changed_company_names = set()
 
     @staticmethod
     def from_dict(run_record_dict):
         return RunRecord(
             existing_jobs=run_record_dict["existing_jobs"],
             errors=[ScrapeError(**error) for error in run_record_dict["errors"]],
+            job_history=(
+                run_record_dict["job_history"]
+                if "job_history" in run_record_dict
+                else None
+            ),
+            page_fingerprints=(
+                run_record_dict["page_fingerprints"]
+                if "page_fingerprints" in run_record_dict
+                else None
+            ),
+            saved_requests=(
+                run_record_dict["saved_requests"]
+                if "saved_requests" in run_record_dict
+                else None
+            ),
+            posting_keys=(
+                run_record_dict["posting_keys"]
+                if "posting_keys" in run_record_dict
+                else None
+            ),
         )
 
+    def to_dict(self):
+        return {
+            "existing_jobs": {
+                company_name: (
+                    sorted(self._job_id_sets[company_name])
+                    if company_name in self._changed_company_names
+                    else job_ids
+                )
+                for company_name, job_ids in self.existing_jobs.items()
+            },
+            "errors": [asdict(error) for error in self.errors],
+            "job_history": self.job_history,
+            "page_fingerprints": self.page_fingerprints,
+            "saved_requests": self.saved_requests,
+            "posting_keys": self.posting_keys,
+        }
+
+    def job_ids(self, company_name) -> set[str]:
+        if company_name not in self._job_id_sets:
+            self._job_id_sets[company_name] = set(
+                self.existing_jobs.get(company_name, [])
+            )
+        return self._job_id_sets[company_name]
+
+    def has_job(self, company_name, job_id) -> bool:
+        return job_id in self.job_ids(company_name)
+
+    def add_job(self, company_name, job_id):
+        self.job_ids(company_name).add(job_id)
+        self.existing_jobs.setdefault(company_name, [])
+        self._changed_company_names.add(company_name)
+
+    def mark_seen(self, company_name, job_id, seen_date: str):
+        company_history = self.job_history.setdefault(company_name, {})
+        if job_id in company_history:
+            company_history[job_id][1] = seen_date
+        else:
+            company_history[job_id] = [seen_date, seen_date]
+
+    def compact(self, company_name, seen_before: str, today: str) -> int:
+        """Removes the company's job ids last seen before seen_before, and returns how many were removed"""
+        company_history = self.job_history.setdefault(company_name, {})
+        job_ids = self.job_ids(company_name)
+        for job_id in job_ids:
+            if job_id not in company_history:
+                # Not seen since before history was kept, so start counting from today
+                company_history[job_id] = [today, today]
+
+        stale_job_ids = [
+            job_id for job_id in job_ids if company_history[job_id][1] < seen_before
+        ]
+        for job_id in stale_job_ids:
+            job_ids.remove(job_id)
+            del company_history[job_id]
+        if len(stale_job_ids) > 0:
+            self._changed_company_names.add(company_name)
+            stale_job_id_set = set(stale_job_ids)
+            self.posting_keys = {
+                key: job
+                for key, job in self.posting_keys.items()
+                if not (job[0] == company_name and job[1] in stale_job_id_set)
+            }
+        return len(stale_job_ids)
+
+    def page_fingerprint(self, company_name) -> PageFingerprint:
+        page_fingerprint = self.page_fingerprints.get(company_name)
+        return PageFingerprint(**page_fingerprint) if page_fingerprint else None
+
+    def set_page_fingerprint(self, company_name, page_fingerprint: PageFingerprint):
+        self.page_fingerprints[company_name] = asdict(page_fingerprint)
+
+    def saved_request(self, company_name) -> dict:
+        return self.saved_requests.get(company_name)
+
+    def set_saved_request(self, company_name, request: dict):
+        self.saved_requests[company_name] = request
+
+    def clear_saved_request(self, company_name):
+        self.saved_requests.pop(company_name, None)
+
+    def duplicate_of(self, company_name, key) -> tuple[str, str]:
+        """The (company name, job id) of another company's job with the posting key, None if there isn't one"""
+        job = self.posting_keys.get(key)
+        if job and job[0] != company_name and self.has_job(job[0], job[1]):
+            return job[0], job[1]
+        return None
+
+    def add_posting_key(self, company_name, job_id, key):
+        """Indexes the job by the posting key, unless it already belongs to another job in the record"""
+        job = self.posting_keys.get(key)
+        if not job or (
+            (job[0] != company_name or job[1] != job_id)
+            and not self.has_job(job[0], job[1])
+        ):
+            self.posting_keys[key] = [company_name, job_id]
+
     def has_new_error(self) -> bool:
         return any(error.is_new_this_run for error in self.errors)
@@ -0,0 +1,455 @@
+"""
+Run records can be stored as JSON (models.RunRecord) or in a SQLite file, picked by the run record file's extension.
+
+The SQLite run record looks job ids up with an index and appends new ones, so a run only reads the ids it checks and
+only writes the new ones, however long the history gets.
+
+Convert between the two with
+python3 run_record_store.py data/run_record.json data/run_record.db
+python3 run_record_store.py data/run_record.db data/run_record.json
+"""
+
+import os
+import json
+import shutil
+import sqlite3
+import argparse
+import threading
+
+from models import *
+
+SQLITE_EXTENSIONS = {".db", ".sqlite", ".sqlite3"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    company_name TEXT NOT NULL,
+    job_id TEXT NOT NULL,
+    first_seen TEXT,
+    last_seen TEXT,
+    PRIMARY KEY (company_name, job_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS errors (
+    company_name TEXT,
+    jobs_page TEXT,
+    message TEXT,
+    is_new_this_run INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS page_fingerprints (
+    company_name TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    config_key TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT
+);
+CREATE TABLE IF NOT EXISTS saved_requests (
+    company_name TEXT PRIMARY KEY,
+    request TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS posting_keys (
+    key TEXT PRIMARY KEY,
+    company_name TEXT NOT NULL,
+    job_id TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS posting_keys_job ON posting_keys (company_name, job_id);
+"""
+
+
+def is_sqlite_path(path) -> bool:
+    return os.path.splitext(path)[1].lower() in SQLITE_EXTENSIONS
+
+
+def open_run_record(path):
+    if is_sqlite_path(path):
+        return SqliteRunRecord(path)
+    with open(path) as f:
+        return RunRecord.from_dict(json.load(f))
+
+
+def save_run_record(run_record, path):
+    if not is_sqlite_path(path):
+        with open(path, "w") as f:
+            json.dump(run_record.to_dict(), f, indent=4)
+    elif isinstance(run_record, SqliteRunRecord):
+        run_record.save(path)
+    else:
+        SqliteRunRecord.from_run_record(run_record, path).close()
+
+
+class SqliteRunRecord:
+    """
+    Nothing is written to the file until save(), so that like the JSON run record, a run that isn't saved changes nothing.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        # Scrape workers look up known jobs from their own threads
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.executescript(SCHEMA)
+        self._add_seen_columns()
+        self._new_jobs = {}  # company name -> set of job ids added this run
+        self._seen_jobs = {}  # company name -> job id -> date seen this run
+        self._removed_jobs = {}  # company name -> set of job ids compacted this run
+        self._page_fingerprints = {}  # company name -> PageFingerprint set this run
+        # company name -> SavedRequest.request set this run, None if cleared
+        self._saved_requests = {}
+        self._posting_keys = {}  # posting key -> (company name, job id) set this run
+        self.errors = [
+            ScrapeError(
+                company_name=company_name,
+                jobs_page=jobs_page,
+                message=message,
+                is_new_this_run=bool(is_new_this_run),
+            )
+            for company_name, jobs_page, message, is_new_this_run in self._query(
+                "SELECT company_name, jobs_page, message, is_new_this_run FROM errors ORDER BY rowid"
+            )
+        ]
+
+    def _add_seen_columns(self):
+        # Files from before job history was kept
+        columns = {row[1] for row in self._query("PRAGMA table_info(jobs)")}
+        with self._lock, self._connection:
+            for column in ["first_seen", "last_seen"]:
+                if column not in columns:
+                    self._connection.execute(
+                        f"ALTER TABLE jobs ADD COLUMN {column} TEXT"
+                    )
+
+    @staticmethod
+    def from_run_record(run_record: RunRecord, path):
+        if os.path.exists(path):
+            raise Exception(f"{path} already exists")
+        sqlite_run_record = SqliteRunRecord(path)
+        run_record_dict = run_record.to_dict()
+        rows = []
+        for company_name, job_ids in run_record_dict["existing_jobs"].items():
+            company_history = run_record_dict["job_history"].get(company_name, {})
+            for job_id in job_ids:
+                first_seen, last_seen = company_history.get(job_id, (None, None))
+                rows.append((company_name, job_id, first_seen, last_seen))
+        with sqlite_run_record._connection as connection:
+            connection.executemany(
+                "INSERT INTO jobs (company_name, job_id, first_seen, last_seen) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+        for company_name, page_fingerprint in run_record_dict[
+            "page_fingerprints"
+        ].items():
+            sqlite_run_record.set_page_fingerprint(
+                company_name, PageFingerprint(**page_fingerprint)
+            )
+        for company_name, request in run_record_dict["saved_requests"].items():
+            sqlite_run_record.set_saved_request(company_name, request)
+        sqlite_run_record._posting_keys = {
+            key: tuple(job) for key, job in run_record_dict["posting_keys"].items()
+        }
+        sqlite_run_record.errors = run_record.errors
+        sqlite_run_record.save()
+        return sqlite_run_record
+
+    def _query(self, sql, parameters=()):
+        with self._lock:
+            return self._connection.execute(sql, parameters).fetchall()
+
+    def to_dict(self):
+        existing_jobs = {}
+        job_history = {}
+        for company_name, job_id, first_seen, last_seen in self._query(
+            "SELECT company_name, job_id, first_seen, last_seen FROM jobs ORDER BY company_name, job_id"
+        ):
+            if job_id in self._removed_jobs.get(company_name, ()):
+                continue
+            existing_jobs.setdefault(company_name, []).append(job_id)
+            if last_seen:
+                job_history.setdefault(company_name, {})[job_id] = [
+                    first_seen,
+                    last_seen,
+                ]
+        for company_name, job_ids in self._new_jobs.items():
+            existing_jobs[company_name] = sorted(
+                set(existing_jobs.get(company_name, [])) | job_ids
+            )
+        for company_name, seen_jobs in self._seen_jobs.items():
+            company_history = job_history.setdefault(company_name, {})
+            for job_id, seen_date in seen_jobs.items():
+                if job_id in company_history:
+                    company_history[job_id][1] = seen_date
+                else:
+                    company_history[job_id] = [seen_date, seen_date]
+        page_fingerprints = {
+            company_name: asdict(PageFingerprint(*row))
+            for company_name, *row in self._query(
+                "SELECT company_name, fingerprint, config_key, etag, last_modified FROM page_fingerprints ORDER BY company_name"
+            )
+        }
+        for company_name, page_fingerprint in self._page_fingerprints.items():
+            page_fingerprints[company_name] = asdict(page_fingerprint)
+        saved_requests = {
+            company_name: json.loads(request)
+            for company_name, request in self._query(
+                "SELECT company_name, request FROM saved_requests ORDER BY company_name"
+            )
+        }
+        saved_requests.update(self._saved_requests)
+        saved_requests = {
+            company_name: request
+            for company_name, request in saved_requests.items()
+            if request is not None
+        }
+        posting_keys = {
+            key: [company_name, job_id]
+            for key, company_name, job_id in self._query(
+                "SELECT key, company_name, job_id FROM posting_keys ORDER BY key"
+            )
+        }
+        posting_keys.update({key: list(job) for key, job in self._posting_keys.items()})
+        posting_keys = {
+            key: job
+            for key, job in posting_keys.items()
+            if job[1] not in self._removed_jobs.get(job[0], ())
+        }
+        return {
+            "existing_jobs": existing_jobs,
+            "errors": [asdict(error) for error in self.errors],
+            "job_history": job_history,
+            "page_fingerprints": page_fingerprints,
+            "saved_requests": saved_requests,
+            "posting_keys": posting_keys,
+        }
+
+    def job_ids(self, company_name):
+        return SqliteCompanyJobIds(self, company_name)
+
+    def has_job(self, company_name, job_id) -> bool:
+        if job_id in self._new_jobs.get(company_name, ()):
+            return True
+        if job_id in self._removed_jobs.get(company_name, ()):
+            return False
+        return (
+            len(
+                self._query(
+                    "SELECT 1 FROM jobs WHERE company_name = ? AND job_id = ?",
+                    (company_name, job_id),
+                )
+            )
+            > 0
+        )
+
+    def add_job(self, company_name, job_id):
+        self._new_jobs.setdefault(company_name, set()).add(job_id)
+
+    def mark_seen(self, company_name, job_id, seen_date: str):
+        self._seen_jobs.setdefault(company_name, {})[job_id] = seen_date
+
+    def compact(self, company_name, seen_before: str, today: str) -> int:
+        """Removes the company's job ids last seen before seen_before, and returns how many were removed"""
+        seen_jobs = self._seen_jobs.setdefault(company_name, {})
+        for (job_id,) in self._query(
+            "SELECT job_id FROM jobs WHERE company_name = ? AND last_seen IS NULL",
+            (company_name,),
+        ):
+            # Not seen since before history was kept, so start counting from today
+            seen_jobs.setdefault(job_id, today)
+
+        stale_job_ids = {
+            job_id
+            for (job_id,) in self._query(
+                "SELECT job_id FROM jobs WHERE company_name = ? AND last_seen < ?",
+                (company_name, seen_before),
+            )
+            if job_id not in seen_jobs
+        }
+        self._removed_jobs.setdefault(company_name, set()).update(stale_job_ids)
+        return len(stale_job_ids)
+
+    def page_fingerprint(self, company_name) -> PageFingerprint:
+        if company_name in self._page_fingerprints:
+            return self._page_fingerprints[company_name]
+        rows = self._query(
+            "SELECT fingerprint, config_key, etag, last_modified FROM page_fingerprints WHERE company_name = ?",
+            (company_name,),
+        )
+        return PageFingerprint(*rows[0]) if len(rows) > 0 else None
+
+    def set_page_fingerprint(self, company_name, page_fingerprint: PageFingerprint):
+        self._page_fingerprints[company_name] = page_fingerprint
+
+    def saved_request(self, company_name) -> dict:
+        if company_name in self._saved_requests:
+            return self._saved_requests[company_name]
+        rows = self._query(
+            "SELECT request FROM saved_requests WHERE company_name = ?",
+            (company_name,),
+        )
+        return json.loads(rows[0][0]) if len(rows) > 0 else None
+
+    def set_saved_request(self, company_name, request: dict):
+        self._saved_requests[company_name] = request
+
+    def clear_saved_request(self, company_name):
+        self._saved_requests[company_name] = None
+
+    def _posting_key_job(self, key) -> tuple[str, str]:
+        if key in self._posting_keys:
+            return self._posting_keys[key]
+        rows = self._query(
+            "SELECT company_name, job_id FROM posting_keys WHERE key = ?", (key,)
+        )
+        return rows[0] if len(rows) > 0 else None
+
+    def duplicate_of(self, company_name, key) -> tuple[str, str]:
+        """The (company name, job id) of another company's job with the posting key, None if there isn't one"""
+        job = self._posting_key_job(key)
+        if job and job[0] != company_name and self.has_job(job[0], job[1]):
+            return job[0], job[1]
+        return None
+
+    def add_posting_key(self, company_name, job_id, key):
+        """Indexes the job by the posting key, unless it already belongs to another job in the record"""
+        job = self._posting_key_job(key)
+        if not job or (
+            tuple(job) != (company_name, job_id) and not self.has_job(job[0], job[1])
+        ):
+            self._posting_keys[key] = (company_name, job_id)
+
+    def has_new_error(self) -> bool:
+        return any(error.is_new_this_run for error in self.errors)
+
+    def save(self, path=None):
+        """Writes this run's changes to path, by default the file it was opened from"""
+        if path is None or os.path.abspath(path) == os.path.abspath(self.path):
+            self._write_changes(self._connection)
+            self._new_jobs = {}
+            self._seen_jobs = {}
+            self._removed_jobs = {}
+            self._page_fingerprints = {}
+            self._saved_requests = {}
+            self._posting_keys = {}
+            return
+
+        with self._lock:
+            shutil.copy2(self.path, path)
+        connection = sqlite3.connect(path)
+        try:
+            self._write_changes(connection)
+        finally:
+            connection.close()
+
+    def _write_changes(self, connection):
+        with self._lock, connection:
+            connection.executemany(
+                "INSERT OR IGNORE INTO jobs (company_name, job_id) VALUES (?, ?)",
+                [
+                    (company_name, job_id)
+                    for company_name, job_ids in self._new_jobs.items()
+                    for job_id in job_ids
+                ],
+            )
+            connection.executemany(
+                "UPDATE jobs SET first_seen = COALESCE(first_seen, ?), last_seen = ? WHERE company_name = ? AND job_id = ?",
+                [
+                    (seen_date, seen_date, company_name, job_id)
+                    for company_name, seen_jobs in self._seen_jobs.items()
+                    for job_id, seen_date in seen_jobs.items()
+                ],
+            )
+            connection.executemany(
+                "INSERT OR REPLACE INTO posting_keys (key, company_name, job_id) VALUES (?, ?, ?)",
+                [
+                    (key, company_name, job_id)
+                    for key, (company_name, job_id) in self._posting_keys.items()
+                ],
+            )
+            for table in ["jobs", "posting_keys"]:
+                connection.executemany(
+                    f"DELETE FROM {table} WHERE company_name = ? AND job_id = ?",
+                    [
+                        (company_name, job_id)
+                        for company_name, job_ids in self._removed_jobs.items()
+                        for job_id in job_ids
+                    ],
+                )
+            connection.executemany(
+                "INSERT OR REPLACE INTO page_fingerprints (company_name, fingerprint, config_key, etag, last_modified) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        company_name,
+                        page_fingerprint.fingerprint,
+                        page_fingerprint.config_key,
+                        page_fingerprint.etag,
+                        page_fingerprint.last_modified,
+                    )
+                    for company_name, page_fingerprint in self._page_fingerprints.items()
+                ],
+            )
+            connection.executemany(
+                "INSERT OR REPLACE INTO saved_requests (company_name, request) VALUES (?, ?)",
+                [
+                    (company_name, json.dumps(request))
+                    for company_name, request in self._saved_requests.items()
+                    if request is not None
+                ],
+            )
+            connection.executemany(
+                "DELETE FROM saved_requests WHERE company_name = ?",
+                [
+                    (company_name,)
+                    for company_name, request in self._saved_requests.items()
+                    if request is None
+                ],
+            )
+            connection.execute("DELETE FROM errors")
+            connection.executemany(
+                "INSERT INTO errors (company_name, jobs_page, message, is_new_this_run) VALUES (?, ?, ?, ?)",
+                [
+                    (
+                        error.company_name,
+                        error.jobs_page,
+                        error.message,
+                        int(error.is_new_this_run),
+                    )
+                    for error in self.errors
+                ],
+            )
+
+    def close(self):
+        self._connection.close()
+
+
+class SqliteCompanyJobIds:
+    """Read-only set-like view of a company's job ids, that looks each id up instead of loading them all"""
+
+    def __init__(self, run_record: SqliteRunRecord, company_name):
+        self.run_record = run_record
+        self.company_name = company_name
+
+    def __contains__(self, job_id):
+        return self.run_record.has_job(self.company_name, job_id)
+
+    def __len__(self):
+        return (
+            self.run_record._query(
+                "SELECT COUNT(*) FROM jobs WHERE company_name = ?", (self.company_name,)
+            )[0][0]
+            + len(self.run_record._new_jobs.get(self.company_name, ()))
+            - len(self.run_record._removed_jobs.get(self.company_name, ()))
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Convert a run record between JSON and SQLite, by file extension."
+    )
+    parser.add_argument("source", type=str, help="Run record to convert")
+    parser.add_argument(
+        "destination",
+        type=str,
+        help=f"File to write, JSON unless the extension is one of {', '.join(sorted(SQLITE_EXTENSIONS))}",
+    )
+    args = parser.parse_args()
+
+    if os.path.exists(args.destination):
+        raise Exception(f"{args.destination} already exists")
+    save_run_record(open_run_record(args.source), args.destination)
+    print(f"Wrote {args.source} to {args.destination}")
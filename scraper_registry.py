@@ -0,0 +1,78 @@
+"""
+Which module each scraper a config can name (jobs_page_class_name) is defined in, so that a run only imports the
+scraper modules its companies use: common_scrapers.py brings in selenium, and http_scrapers.py brings in requests.
+Which browser scrapers have an HTTP alternative is also kept here, so that a company switched to it doesn't import the
+browser scraper's module.
+
+New scrapers in common_scrapers.py or http_scrapers.py need adding here, and declaring with models.declare_scraper.
+Scrapers in an additional scrapers file are found by name among the classes defined in that file (not ones it imports),
+and take precedence over these.
+"""
+
+import importlib
+
+SCRAPER_MODULES = {
+    # Read in a browser
+    "GreenhousePage": "common_scrapers",
+    "GreenhouseEmbeddedStandalonePage": "common_scrapers",
+    "GreenhouseEmbeddedPage": "common_scrapers",
+    "LeverCoPage": "common_scrapers",
+    "BambooPage": "common_scrapers",
+    "WorkablePage": "common_scrapers",
+    "WorkdayPage": "common_scrapers",
+    "WorkdayDirectPage": "common_scrapers",
+    "RipplingPage": "common_scrapers",
+    "AshbyPage": "common_scrapers",
+    "AshbyEmbeddedPage": "common_scrapers",
+    "ApplyToJobPage": "common_scrapers",
+    "SmartRecruitersPage": "common_scrapers",
+    "AvaturePage": "common_scrapers",
+    "BitsInBioPage": "common_scrapers",
+    "ClimateTechListPage": "common_scrapers",
+    # Read over HTTP
+    "GreenhouseApiPage": "http_scrapers",
+    "GreenhouseEmbeddedStandaloneApiPage": "http_scrapers",
+    "LeverCoApiPage": "http_scrapers",
+    "AshbyApiPage": "http_scrapers",
+}
+
+# Browser scraper -> scraper that gets the same jobs, with the same ids and titles, from the same jobs_page over HTTP.
+# Used instead for companies that set use_http, or for every company (unless it sets use_browser) in runs with
+# use_http_alternatives, see job_scrape.select_companies.
+HTTP_ALTERNATIVES = {
+    "GreenhousePage": "GreenhouseApiPage",
+    "GreenhouseEmbeddedStandalonePage": "GreenhouseEmbeddedStandaloneApiPage",
+    "LeverCoPage": "LeverCoApiPage",
+    "AshbyPage": "AshbyApiPage",
+}
+
+
+def get_additional_scraper(name, additional_scrapers_module):
+    """The scraper of that name defined in the additional scrapers file, None if there isn't one"""
+    if not additional_scrapers_module:
+        return None
+    additional_scraper = getattr(additional_scrapers_module, name, None)
+    if (
+        isinstance(additional_scraper, type)
+        and additional_scraper.__module__ == additional_scrapers_module.__name__
+    ):
+        return additional_scraper
+    return None
+
+
+def get_http_alternative(name, additional_scrapers_module=None) -> str:
+    """The name of the HTTP alternative to the scraper of that name, None if it has none. Imports neither."""
+    if get_additional_scraper(name, additional_scrapers_module):
+        return None
+    return HTTP_ALTERNATIVES.get(name)
+
+
+def get_scraper(name, additional_scrapers_module=None):
+    additional_scraper = get_additional_scraper(name, additional_scrapers_module)
+    if additional_scraper:
+        return additional_scraper
+    if name not in SCRAPER_MODULES:
+        raise Exception(
+            f"Unknown jobs_page_class_name {name}. Scrapers in common_scrapers.py or http_scrapers.py need adding to scraper_registry.py"
+        )
+    return getattr(importlib.import_module(SCRAPER_MODULES[name]), name)
@@ -0,0 +1,112 @@
+"""
+Splits one run's companies into shards that are scraped concurrently by separate workers (lambda invocations, see
+lambda_function.py), then puts their results back together so that the run record is written once and one notification
+is sent, exactly as if one worker had scraped every company.
+
+Workers are given the names of the companies in their shard, and send back a result dict per company (see
+checkpoint.result_to_dict), including the ones that errored. New jobs and new errors are only worked out once all the
+results are back, by the same record_results and record_errors as an unsharded run.
+"""
+
+import json
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+
+from models import *
+from checkpoint import result_to_dict, result_from_dict
+from job_scrape import record_results, record_errors
+
+
+def split_into_shards(companies: list[Company], shard_count) -> list[list[Company]]:
+    """
+    Splits the companies so that each shard's total scrape_cost is about the same: the most costly companies go first,
+    each to the shard with the least cost so far. Each shard keeps the companies in config order.
+    """
+    shard_count = min(shard_count, len(companies))
+    shard_indexes = [[] for _ in range(shard_count)]
+    shard_costs = [0] * shard_count
+    for index in sorted(
+        range(len(companies)),
+        key=lambda index: scrape_cost(companies[index]),
+        reverse=True,
+    ):
+        cheapest_shard = shard_costs.index(min(shard_costs))
+        shard_indexes[cheapest_shard].append(index)
+        shard_costs[cheapest_shard] += scrape_cost(companies[index])
+    return [
+        [companies[index] for index in sorted(indexes)] for indexes in shard_indexes
+    ]
+
+
+def run_shards(companies: list[Company], shard_count, invoke_shard):
+    """
+    Scrapes companies in shard_count concurrent shards, and yields a CompanyResult for each company in the order of
+    companies, like get_relevant_jobs.
+
+    invoke_shard(shard_index, company_names) runs a worker on the shard and returns its list of result dicts. If it
+    raises, every company in that shard is given the error, so the other shards' results are still recorded.
+    """
+    shards = split_into_shards(companies, shard_count)
+    print(
+        f"Scraping {len(companies)} companies in {len(shards)} shards of up to {max((len(shard) for shard in shards), default=0)}"
+    )
+
+    def run_shard(shard_index):
+        shard = shards[shard_index]
+        try:
+            return invoke_shard(shard_index, [company.name for company in shard])
+        except Exception as e:
+            print(f"Shard {shard_index} failed: {repr(e)}")
+            error = WorkerError(
+                str(e), f"Shard {shard_index} failed: {describe_error(e)}"
+            )
+            return [result_to_dict(failed_result(company, error)) for company in shard]
+
+    result_dicts = {}
+    with ThreadPoolExecutor(max_workers=len(shards) or 1) as executor:
+        for shard_results in executor.map(run_shard, range(len(shards))):
+            for result_dict in shard_results:
+                result_dicts[result_dict["company_name"]] = result_dict
+
+    for company in companies:
+        if company.name in result_dicts:
+            yield result_from_dict(company, result_dicts[company.name])
+        else:
+            # The worker didn't find the company in its config, e.g. it was renamed mid-run
+            message = f"No result from its shard for {company.name}"
+            yield failed_result(company, WorkerError(message, message))
+
+
+def get_new_relevant_jobs_in_shards(
+    run_record: RunRecord,
+    companies: list[Company],
+    shard_count,
+    invoke_shard,
+    retention_days=None,
+):
+    """
+    Like job_scrape.get_new_relevant_jobs on companies already selected, with the scraping done by run_shards.
+    Returns the new jobs, the companies to verify have no jobs, the errors message and each company's metrics.
+    """
+    results = run_shards(companies, shard_count, invoke_shard)
+    new_relevant_jobs, verify_no_jobs, errors, company_metrics = record_results(
+        run_record, results, retention_days
+    )
+    errors_message = record_errors(run_record, errors)
+    return new_relevant_jobs, verify_no_jobs, errors_message, company_metrics
+
+
+def shard_result_dicts(results: Iterable[CompanyResult]) -> list[dict]:
+    """What a worker sends back for its shard: a result dict per company, that survives being sent as JSON"""
+    return json.loads(
+        json.dumps([result_to_dict(result) for result in results], default=str)
+    )
+
+
+def failed_result(company: Company, error: WorkerError) -> CompanyResult:
+    return CompanyResult(
+        company=company,
+        relevant_jobs=[],
+        error=error,
+        metrics=CompanyMetrics(company_name=company.name, error=True),
+    )
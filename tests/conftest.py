@@ -0,0 +1,67 @@
+import os
+import sys
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# The modules are imported by name, as when running job_scrape.py from the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from run_record_store import open_run_record, save_run_record
+
+
+@pytest.fixture(params=["json", "db"])
+def run_record_path(request, tmp_path):
+    """An empty run record, as JSON and as SQLite"""
+    path = tmp_path / "run_record.json"
+    path.write_text(json.dumps({"existing_jobs": {}, "errors": []}))
+    if request.param == "db":
+        db_path = tmp_path / "run_record.db"
+        save_run_record(open_run_record(str(path)), str(db_path))
+        return str(db_path)
+    return str(path)
+
+
+class WorkdayHandler(BaseHTTPRequestHandler):
+    """Pages through server.total jobs like a Workday tenant's jobs endpoint, noting the offset of each request"""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        offset, limit = body["offset"], body["limit"]
+        self.server.offsets.append(offset)
+        postings = [
+            {"title": f"Job {i}", "externalPath": f"/job/{i}"}
+            for i in range(offset, min(offset + limit, self.server.total))
+        ]
+        data = {"jobPostings": postings}
+        if not self.server.omits_total:
+            data["total"] = self.server.total
+        content = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def workday_server():
+    """
+    A local stand-in for a Workday tenant, with jobs_url its jobs endpoint. Set total to how many jobs it has, and
+    omits_total to leave total out of its responses.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), WorkdayHandler)
+    server.total = 0
+    server.omits_total = False
+    server.offsets = []
+    server.jobs_url = (
+        f"http://127.0.0.1:{server.server_port}/wday/cxs/tenant/External/jobs"
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
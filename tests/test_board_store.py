@@ -0,0 +1,176 @@
+import os
+import sys
+import json
+import datetime
+
+import pytest
+
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"
+    ),
+)
+
+from models import *
+from board_store import DirectoryBoardStore, FULL_SCRAPE_INTERVAL, board_name
+from job_scrape import get_relevant_jobs
+from lambda_function import get_inline_session_policy
+
+JOBS_PAGE = "https://bitsinbio.org/jobs"
+ROWS = [{"text": "Engineer\nAcme", "href": "https://acme.com/jobs/1"}]
+
+
+def store_board(path, fetched_ago, scraped_in_full_ago, stopped_at_limit=False):
+    now = datetime.datetime.now(datetime.timezone.utc)
+    with open(os.path.join(path, board_name(JOBS_PAGE)), "w") as f:
+        json.dump(
+            {
+                "jobs_page": JOBS_PAGE,
+                "fetched_at": (now - fetched_ago).isoformat(),
+                "scraped_in_full_at": (now - scraped_in_full_ago).isoformat(),
+                "stopped_at_limit": stopped_at_limit,
+                "rows": ROWS,
+            },
+            f,
+        )
+
+
+def test_stale_board_is_kept_to_stop_paging_at_until_scraped_in_full_again(tmp_path):
+    store = DirectoryBoardStore(str(tmp_path), max_age_minutes=60)
+
+    store_board(tmp_path, datetime.timedelta(minutes=5), datetime.timedelta(hours=5))
+    shared_board = store.get(JOBS_PAGE)
+    assert (shared_board.cached, shared_board.previous) == (ROWS, None)
+
+    store_board(tmp_path, datetime.timedelta(hours=2), datetime.timedelta(hours=5))
+    shared_board = store.get(JOBS_PAGE)
+    assert (shared_board.cached, shared_board.previous) == (None, ROWS)
+
+    # Stored again from a scrape that stopped at those rows, so it still has to be scraped in full when they're old
+    shared_board.fetched = ROWS
+    shared_board.continues_previous = True
+    store.put(JOBS_PAGE, shared_board)
+    assert store.get(JOBS_PAGE).cached == ROWS
+    with open(os.path.join(tmp_path, board_name(JOBS_PAGE))) as f:
+        assert (
+            json.load(f)["scraped_in_full_at"]
+            == shared_board.previous_scraped_in_full_at
+        )
+
+    store_board(
+        tmp_path,
+        datetime.timedelta(hours=2),
+        FULL_SCRAPE_INTERVAL + datetime.timedelta(hours=1),
+    )
+    shared_board = store.get(JOBS_PAGE)
+    assert (shared_board.cached, shared_board.previous) == (None, None)
+
+
+@declare_scraper(paginates=True, shares_board=True)
+class StoredBoardPage(HttpJobsPage):
+    @staticmethod
+    def fetch_jobs(jobs_page, config=None, known_jobs=None, shared_board=None):
+        raise AssertionError("The board should be read from the store")
+
+    @staticmethod
+    def jobs_from_board(rows, config=None):
+        return [JobPosting(title=row["text"], id=row["href"]) for row in rows]
+
+
+@pytest.mark.parametrize("stopped_at_limit", [False, True])
+def test_jobs_from_a_board_stored_at_its_page_cap_are_not_all_the_jobs(
+    tmp_path, stopped_at_limit
+):
+    store = DirectoryBoardStore(str(tmp_path))
+    store_board(tmp_path, datetime.timedelta(minutes=5), datetime.timedelta(hours=5))
+    shared_board = store.get(JOBS_PAGE)
+    shared_board.fetched = ROWS
+    store.put(JOBS_PAGE, shared_board, stopped_at_limit)
+    assert store.get(JOBS_PAGE).stored_stopped_at_limit == stopped_at_limit
+
+    company = Company(
+        name="Bits in Bio",
+        jobs_page=JOBS_PAGE,
+        jobs_page_class=StoredBoardPage,
+        jobs_page_class_name="StoredBoardPage",
+    )
+    [result] = get_relevant_jobs(
+        None, None, None, 1, [company], [], None, board_store=store
+    )
+    assert [job.id for job in result.relevant_jobs] == [ROWS[0]["href"]]
+    # So retention doesn't forget the jobs the capped scrape didn't get to
+    assert result.read_all_jobs() == (not stopped_at_limit)
+
+
+def test_read_only_store_does_not_write(tmp_path):
+    shared_board = SharedBoard()
+    shared_board.fetched = ROWS
+    DirectoryBoardStore(str(tmp_path), read_only=True).put(JOBS_PAGE, shared_board)
+    assert os.listdir(tmp_path) == []
+
+
+def board_actions(policy_json):
+    return [
+        statement["Action"]
+        for statement in json.loads(policy_json)["Statement"]
+        if statement["Resource"] == ["arn:aws:s3:::bucket/shared_boards/*"]
+    ]
+
+
+def test_only_the_board_writer_can_store_boards():
+    assert board_actions(
+        get_inline_session_policy("bucket", "user", "arn:sns", "shared_boards/")
+    ) == [["s3:GetObject"]]
+    assert board_actions(
+        get_inline_session_policy("bucket", "user", "arn:sns", "shared_boards/", True)
+    ) == [["s3:GetObject", "s3:PutObject"]]
+
+
+def test_bits_in_bio_stops_paging_at_the_rows_stored_last():
+    from bench_scrapers import create_driver, expected_jobs, load_fixtures
+    from bench_scrapers import start_fixture_server
+    from common_scrapers import BitsInBioPage
+    from selenium.webdriver.common.by import By
+    from waits import wait_until_ready
+
+    try:
+        driver = create_driver()
+    except Exception as e:
+        pytest.skip(f"Chrome isn't available: {repr(e)}")
+    server = start_fixture_server()
+    fixture = load_fixtures(["bitsinbio"])["bitsinbio"]
+    config = fixture["config"]
+
+    def scrape(shared_board):
+        driver.get(f"{server.base_url}/bitsinbio/{fixture['page']}")
+        wait_until_ready(driver, BitsInBioPage.ready_condition, 10)
+        return BitsInBioPage.get_jobs(
+            driver, config, KnownJobs(frozenset()), shared_board
+        )
+
+    try:
+        shared_board = SharedBoard()
+        assert scrape(shared_board) == expected_jobs(fixture, server.base_url)
+        page_size = 3
+        # Since stored, the first page's jobs were posted and a job further down was taken off the board
+        gone_row = {
+            "text": "Chemist\nExample Bio\nRemote\nDetails Apply Now",
+            "href": f"{server.base_url}/bitsinbio/jobs/100/apply",
+        }
+        previous = shared_board.fetched[page_size:] + [gone_row]
+
+        shared_board = SharedBoard(previous=previous)
+        jobs = scrape(shared_board)
+
+        # Only the first two pages were loaded, the rest being the stored rows
+        assert len(driver.find_elements(By.CLASS_NAME, "job-item")) == 2 * page_size
+        assert shared_board.continues_previous
+        assert jobs == expected_jobs(fixture, server.base_url) + [
+            JobPosting(
+                title=gone_row["text"], id=gone_row["href"], link=gone_row["href"]
+            )
+        ]
+    finally:
+        driver.quit()
+        server.shutdown()
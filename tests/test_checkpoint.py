@@ -0,0 +1,109 @@
+import io
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from models import *
+from job_scrape import get_new_relevant_jobs
+from lambda_function import S3Checkpoint
+from run_record_store import open_run_record
+
+COMPANY_NAMES = ["Acme", "Globex", "Initech", "Umbrella"]
+fetched = []  # the jobs pages read, in order
+stop_at = {"jobs_page": None}
+
+
+class RunStopped(BaseException):
+    """Like the lambda timing out: nothing after it runs"""
+
+
+@declare_scraper()
+class CountedPage(HttpJobsPage):
+    @staticmethod
+    def fetch_jobs(jobs_page, config=None, page_cache: PageCache = None):
+        if jobs_page == stop_at["jobs_page"]:
+            raise RunStopped()
+        fetched.append(jobs_page)
+        return [JobPosting(title="Engineer", id=f"{jobs_page}/1")]
+
+
+class NoSuchKey(Exception):
+    pass
+
+
+class FakeS3Object:
+    """Just enough of a boto3 S3 Object for S3Checkpoint, kept in memory"""
+
+    meta = SimpleNamespace(
+        client=SimpleNamespace(exceptions=SimpleNamespace(NoSuchKey=NoSuchKey))
+    )
+
+    def __init__(self):
+        self.body = None
+
+    def get(self):
+        if self.body is None:
+            raise NoSuchKey()
+        return {"Body": io.BytesIO(self.body)}
+
+    def put(self, Body):
+        self.body = Body.encode("utf-8")
+
+
+def jobs_page(company_name):
+    return f"https://{company_name.lower()}.com/careers"
+
+
+def run(run_record, checkpoint):
+    companies = [
+        Company(
+            name=company_name,
+            jobs_page=jobs_page(company_name),
+            jobs_page_class=CountedPage,
+            jobs_page_class_name="CountedPage",
+        )
+        for company_name in COMPANY_NAMES
+    ]
+    new_relevant_jobs, _, _, errors_message, _ = get_new_relevant_jobs(
+        None,
+        run_record,
+        companies,
+        ["Engineer"],
+        None,
+        default_sleep=0,
+        checkpoint=checkpoint,
+    )
+    return new_relevant_jobs, errors_message
+
+
+def test_resumed_run_skips_the_companies_already_checked(tmp_path):
+    path = tmp_path / "run_record.json"
+    path.write_text(json.dumps({"existing_jobs": {}, "errors": []}))
+    s3_object = FakeS3Object()
+    fetched.clear()
+
+    stop_at["jobs_page"] = jobs_page("Initech")
+    with pytest.raises(RunStopped):
+        run(open_run_record(str(path)), S3Checkpoint(s3_object))
+    assert fetched == [jobs_page("Acme"), jobs_page("Globex")]
+
+    # Rerun with the run record as it was, since the stopped run never saved it
+    fetched.clear()
+    stop_at["jobs_page"] = None
+    new_relevant_jobs, errors_message = run(
+        open_run_record(str(path)), S3Checkpoint(s3_object, resume=True)
+    )
+
+    assert fetched == [jobs_page("Initech"), jobs_page("Umbrella")]
+    assert errors_message is None
+    assert {
+        company_name: [job.id for job in info["jobs"]]
+        for company_name, info in new_relevant_jobs.items()
+    } == {
+        company_name: [f"{jobs_page(company_name)}/1"] for company_name in COMPANY_NAMES
+    }
+    checkpoint_lines = s3_object.body.decode("utf-8").splitlines()
+    assert sorted(json.loads(line)["company_name"] for line in checkpoint_lines) == (
+        sorted(COMPANY_NAMES)
+    )
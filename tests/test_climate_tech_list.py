@@ -0,0 +1,240 @@
+import random
+import datetime
+
+import pytest
+
+from models import *
+from common_scrapers import jobs_from_shared_view
+
+COUNTRIES = {
+    "selUS": "United States",
+    "selRemote": "Remote",
+    "selUK": "United Kingdom",
+    "selDE": "Germany",
+}
+COLUMNS = [
+    {"id": "fldTitle", "name": "Position Title", "type": "text"},
+    {"id": "fldCompany", "name": "Company", "type": "text"},
+    {
+        "id": "fldCountry",
+        "name": "Country",
+        "type": "multiSelect",
+        "typeOptions": {
+            "choices": {key: {"name": name} for key, name in COUNTRIES.items()}
+        },
+    },
+    {"id": "fldLocation", "name": "Job Location", "type": "text"},
+    {"id": "fldDate", "name": "Date first listed", "type": "date"},
+    {"id": "fldRemote", "name": "Remote", "type": "text"},
+]
+
+
+def shared_view(row_count, seed=0) -> dict:
+    """
+    A readSharedViewData response with every kind of row the filters tell apart, and many rows that are the same but for
+    their id, created at the same time
+    """
+    rng = random.Random(seed)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    created_times = [
+        (now - datetime.timedelta(days=days)).isoformat() for days in [0, 1, 9, 11, 30]
+    ]
+    rows = []
+    for index in range(row_count):
+        cells = {
+            "fldTitle": rng.choice(
+                [
+                    "Software Engineer",
+                    "Software Engineering Intern",
+                    "Senior Engineer (m/f/d)",
+                    "Data Scientist",
+                ]
+            ),
+            "fldCompany": rng.choice(["Acme", "Tesla", "Globex"]),
+            "fldLocation": rng.choice(
+                ["", "  ", "NYC", "New York, NY", "Berlin", "London", "Austin, TX"]
+            ),
+            "fldDate": "2024-01-01",
+            "fldRemote": rng.choice(["Remote", "Remote (US)", "Onsite", ""]),
+        }
+        country_ids = rng.choice(
+            [None, [], ["selUS"], ["selRemote"], ["selUK", "selDE"], ["selDE"]]
+        )
+        if country_ids is not None:
+            cells["fldCountry"] = country_ids
+        rows.append(
+            {
+                "id": f"rec{index:05}",
+                "createdTime": rng.choice(created_times),
+                "cellValuesByColumnId": cells,
+            }
+        )
+    return {"data": {"table": {"columns": COLUMNS, "rows": rows}}}
+
+
+def jobs_row_by_row(data, config=None) -> list[JobPosting]:
+    """How ClimateTechListPage filtered the rows before they were filtered a column at a time"""
+    columns = data["data"]["table"]["columns"]
+    relevant_column_names = [
+        "Position Title",
+        "Company",
+        "Country",
+        "Job Location",
+        "Date first listed",
+        "Remote",
+    ]
+    column_order_for_other_locations = ["Job Location"] + [
+        x for x in relevant_column_names if x != "Job Location"
+    ]
+    relevant_column_ids = {
+        name: next(col["id"] for col in columns if col["name"].lower() == name.lower())
+        for name in relevant_column_names
+    }
+    country_choices = next(
+        col["typeOptions"]["choices"] for col in columns if col["name"] == "Country"
+    )
+    id_to_country = {key: value["name"] for key, value in country_choices.items()}
+    rows = data["data"]["table"]["rows"]
+    time_cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(
+        days=10
+    )
+
+    def has_relevant_title(row):
+        title = row["cellValuesByColumnId"][relevant_column_ids["Position Title"]]
+        return not is_excluded(config, title)
+
+    def has_relevant_location(row):
+        location = row["cellValuesByColumnId"][relevant_column_ids["Job Location"]]
+        if (
+            config
+            and "excluded_locations" in config
+            and any(term in location for term in set(config["excluded_locations"]))
+        ):
+            return False
+        if location.strip() == "":
+            return True
+        if (
+            config
+            and "local_locations" in config
+            and any(term in location for term in set(config["local_locations"]))
+        ):
+            return True
+        if config and "countries" in config:
+            if relevant_column_ids["Country"] not in row["cellValuesByColumnId"]:
+                return True
+            return (
+                len(
+                    {
+                        id_to_country[country]
+                        for country in row["cellValuesByColumnId"][
+                            relevant_column_ids["Country"]
+                        ]
+                    }.intersection(set(config["countries"]))
+                )
+                > 0
+            )
+        return True
+
+    def should_exclude_company(row):
+        if config and "excluded_companies" in config:
+            return row["cellValuesByColumnId"][relevant_column_ids["Company"]] in set(
+                config["excluded_companies"]
+            )
+
+    def is_relevant(row):
+        return (
+            datetime.datetime.fromisoformat(row["createdTime"]) >= time_cutoff
+            and has_relevant_location(row)
+            and has_relevant_title(row)
+            and not should_exclude_company(row)
+        )
+
+    def format_title(row, column_names):
+        cols = []
+        for name in column_names:
+            if (
+                name == "Country"
+                and relevant_column_ids["Country"] in row["cellValuesByColumnId"]
+            ):
+                cols.append(
+                    ", ".join(
+                        id_to_country[country_id]
+                        for country_id in row["cellValuesByColumnId"][
+                            relevant_column_ids["Country"]
+                        ]
+                    )
+                )
+            else:
+                cols.append(
+                    row["cellValuesByColumnId"].get(relevant_column_ids[name], "")
+                )
+        return ". ".join(cols)
+
+    local_jobs = []
+    remote_jobs = []
+    _other_jobs = []
+    for row in rows:
+        if is_relevant(row):
+            job = JobPosting(title=None, id=row["id"])
+            location = row["cellValuesByColumnId"][relevant_column_ids["Job Location"]]
+            if (
+                config
+                and "local_locations" in config
+                and any(term in location for term in set(config["local_locations"]))
+            ):
+                job.title = f"🏠 {format_title(row, relevant_column_names)}"
+                local_jobs.append(job)
+            elif "Remote" in row["cellValuesByColumnId"][relevant_column_ids["Remote"]]:
+                job.title = f"💻 {format_title(row, relevant_column_names)}"
+                remote_jobs.append(job)
+            else:
+                job.title = format_title(row, column_order_for_other_locations)
+                _other_jobs.append(job)
+
+    if (
+        config
+        and "only_include_local_or_remote" in config
+        and config["only_include_local_or_remote"]
+    ):
+        return local_jobs + remote_jobs
+    return local_jobs + remote_jobs + _other_jobs
+
+
+@pytest.mark.parametrize(
+    "config",
+    [
+        None,
+        {},
+        # The example in common_scrapers.py
+        {
+            "exclude_search_terms": ["intern", "QA"],
+            "excluded_companies": ["tesla", "Tesla"],
+            "countries": ["Remote", "Multiple Locations", "Anywhere", "United States"],
+            "local_locations": ["NY", "NYC", "New York"],
+            "only_include_local_or_remote": True,
+        },
+        {
+            "exclude_search_terms": ["(m/f/d)", "intern"],
+            "excluded_locations": ["London", "Berlin"],
+            "local_locations": ["NYC"],
+            "only_include_local_or_remote": False,
+        },
+        {
+            "exclude_search_terms": [],
+            "excluded_companies": [],
+            "countries": [],
+            "local_locations": [],
+            "excluded_locations": [],
+        },
+        # An empty term is in every location
+        {"local_locations": [""], "countries": ["Germany"]},
+    ],
+)
+def test_jobs_are_the_same_and_in_the_same_order_as_filtering_row_by_row(config):
+    data = shared_view(2000)
+    jobs = jobs_from_shared_view(data, config)
+    assert [(job.id, job.title) for job in jobs] == [
+        (job.id, job.title) for job in jobs_row_by_row(data, config)
+    ]
+    # Rows that are the same but for their id keep the view's order
+    assert len({job.title for job in jobs}) < len(jobs)
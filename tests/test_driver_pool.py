@@ -0,0 +1,175 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from driver_pool import DriverPool, reset_browser
+
+# A page that leaves something in cookies, local storage and IndexedDB
+PAGE = """<!DOCTYPE html>
+<html><body>
+<script>
+document.cookie = "visited=yes; max-age=3600";
+localStorage.setItem("visited", "yes");
+indexedDB.open("visited").onupgradeneeded = (event) => event.target.result.createObjectStore("jobs");
+</script>
+</body></html>
+"""
+READ_STORAGE_JS = """
+const done = arguments[arguments.length - 1];
+indexedDB.databases().then((databases) => done({
+    cookie: document.cookie,
+    localStorage: localStorage.getItem("visited"),
+    indexedDB: databases.map((database) => database.name),
+}));
+"""
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        # /read to look at what's stored without storing anything
+        content = b"<html></html>" if self.path == "/read" else PAGE.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_server(host):
+    server = ThreadingHTTPServer((host, 0), PageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+@pytest.fixture
+def driver():
+    from selenium import webdriver
+
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless=new")
+    try:
+        driver = webdriver.Chrome(options=options)
+    except Exception as e:
+        pytest.skip(f"Chrome isn't available: {repr(e)}")
+    yield driver
+    driver.quit()
+
+
+def read_storage(driver, origin):
+    driver.get(f"{origin}/read")
+    return driver.execute_async_script(READ_STORAGE_JS)
+
+
+def test_reset_browser_clears_every_origin_visited(driver):
+    company_server, company_origin = start_server("127.0.0.1")
+    board_server, board_origin = start_server("localhost")
+    try:
+        pool = DriverPool([driver], keep_open=True)
+        # The company's origin is only in the tab's history by the time the browser is released
+        with pool.session() as session_driver:
+            session_driver.get(company_origin)
+            session_driver.get(board_origin)
+        with pool.session() as session_driver:
+            session_driver.switch_to.new_window("tab")
+            session_driver.get(f"{company_origin}/tab")
+        (driver,) = pool.close()
+        assert read_storage(driver, company_origin) == {
+            "cookie": "visited=yes",
+            "localStorage": "yes",
+            "indexedDB": ["visited"],
+        }
+
+        reset_browser(driver)
+
+        assert len(driver.window_handles) == 1
+        for origin in [company_origin, board_origin]:
+            assert read_storage(driver, origin) == {
+                "cookie": "",
+                "localStorage": None,
+                "indexedDB": [],
+            }
+    finally:
+        company_server.shutdown()
+        board_server.shutdown()
+
+
+class FakeDriver:
+    def __init__(self):
+        self.quit_called = False
+
+    def execute_cdp_cmd(self, command, params):
+        # What remember_origins reads, for a browser kept open
+        if command == "Page.getNavigationHistory":
+            return {"entries": [{"url": "https://acme.com/careers"}]}
+        return {"frameTree": {"frame": {"securityOrigin": "https://acme.com"}}}
+
+    def get_log(self, log_type):
+        return []
+
+    def quit(self):
+        self.quit_called = True
+
+
+def test_idle_browser_of_the_other_kind_is_replaced_at_max_browsers():
+    launched = []
+
+    def driver_factory(performance_log):
+        launched.append(FakeDriver())
+        return launched[-1]
+
+    pool = DriverPool(driver_factory=driver_factory, max_browsers=2)
+    with pool.session(performance_log=False), pool.session(performance_log=False):
+        pass
+    # Both idle browsers are without the performance log, so one is quit for the browser that needs it
+    with pool.session(performance_log=True) as driver:
+        assert driver is launched[2]
+    assert [driver.quit_called for driver in launched] == [False, True, False]
+    with pool.session(performance_log=True) as driver:
+        assert driver is launched[2]
+    assert len(launched) == 3
+
+
+def test_alternating_kinds_of_browser_launch_each_kind_once():
+    launched = []
+
+    def driver_factory(performance_log):
+        launched.append(FakeDriver())
+        return launched[-1]
+
+    pool = DriverPool(driver_factory=driver_factory, max_browsers=1)
+    # One worker scraping companies in config order, e.g. Workday, Greenhouse, Climate Tech List, Lever
+    for performance_log in [True, False, True, False, True, False]:
+        with pool.session(performance_log) as driver:
+            assert driver.performance_log == performance_log
+    assert len(launched) == 2
+    assert not any(driver.quit_called for driver in launched)
+
+
+def test_warm_browsers_are_reused_across_invocations_with_both_kinds(monkeypatch):
+    import lambda_function
+
+    launched = []
+
+    def create_driver(local=False, performance_log=False):
+        launched.append(FakeDriver())
+        return launched[-1]
+
+    monkeypatch.setattr(lambda_function, "create_driver", create_driver)
+    monkeypatch.setattr(lambda_function, "reset_browser", lambda driver: None)
+    monkeypatch.setattr(lambda_function, "warm_drivers", [])
+
+    for _ in range(3):
+        pool = lambda_function.open_driver_pool(False, workers=1)
+        for performance_log in [True, False, True, False]:
+            with pool.session(performance_log) as driver:
+                assert driver.performance_log == performance_log
+        lambda_function.warm_drivers.extend(pool.close())
+
+    # Launched in the first invocation only, and kept since
+    assert len(launched) == 2
+    assert lambda_function.warm_drivers == launched
+    assert not any(driver.quit_called for driver in launched)
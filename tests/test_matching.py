@@ -0,0 +1,81 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"
+    ),
+)
+
+from models import *
+from job_scrape import title_is_relevant
+from bench_matching import uncompiled_is_excluded, uncompiled_title_is_relevant
+
+TITLES = [
+    "Software Engineer",
+    "Senior Software Engineering Manager",
+    "Engineer",
+    "ENGINEERING",
+    "Backend Engineer (m/f/d)",
+    "Backend Engineer (M/F/D) - Berlin",
+    "Frontend Engineer m/f/d",
+    "C++ Developer",
+    "C Developer",
+    ".NET Developer",
+    "Dot Net Developer",
+    "Software Engineering Intern",
+    "Internal Tools Engineer",
+    "Intern, Summer 2025",
+    "intern",
+    "QA Engineer [Remote]",
+    "Data Scientist | ML",
+    "Ingénieur Logiciel",
+    "Staff Engineer, Infra",
+    "  Product   Designer  ",
+    "",
+]
+
+TERM_LISTS = [
+    [],
+    [""],
+    ["engineer"],
+    ["engineer", "engineering"],
+    ["engineering", "engineer", "eng"],
+    ["Software Engineer", "Software"],
+    ["(m/f/d)", "m/f/d"],
+    ["C++", ".net", "[remote]", "data scientist | ml", "a.b", "\\d"],
+    ["intern", "INTERN", "intern,"],
+    ["ingénieur", "Staff Engineer, Infra"],
+]
+
+
+@pytest.mark.parametrize("terms", TERM_LISTS)
+def test_search_terms_match_the_titles_each_term_matched(terms):
+    company = Company(name="Example")
+    for title in TITLES:
+        assert title_is_relevant(company, title, terms) == (
+            uncompiled_title_is_relevant(company, title, terms)
+        ), title
+        assert TermMatcher.of(terms).contains_any(title.lower()) == any(
+            term.lower() in title.lower() for term in terms
+        ), title
+
+
+@pytest.mark.parametrize("terms", TERM_LISTS)
+def test_exclude_terms_exclude_the_titles_each_term_excluded(terms):
+    config = {"exclude_search_terms": terms}
+    for title in TITLES:
+        assert is_excluded(config, title) == uncompiled_is_excluded(
+            config, title
+        ), title
+
+
+def test_a_company_s_own_search_terms_are_matched_instead():
+    company = Company(name="Example", relevant_search_terms=["(m/f/d)", "c++"])
+    for title in TITLES:
+        assert title_is_relevant(company, title, ["engineer"]) == (
+            uncompiled_title_is_relevant(company, title, ["engineer"])
+        ), title
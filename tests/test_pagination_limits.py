@@ -0,0 +1,54 @@
+import pytest
+
+import http_scrapers
+from models import *
+from job_scrape import record_results
+
+
+@pytest.mark.parametrize(
+    "total, pages, stopped_at_limit", [(50, 3, False), (200, 3, True)]
+)
+def test_workday_reports_reaching_its_page_limit(
+    monkeypatch, workday_server, total, pages, stopped_at_limit
+):
+    monkeypatch.setattr(http_scrapers, "WORKDAY_MAX_PAGES", 3)
+    workday_server.total = total
+    known_jobs = KnownJobs(frozenset())
+
+    read = list(
+        http_scrapers.iter_workday_job_pages(
+            workday_server.jobs_url, known_jobs=known_jobs
+        )
+    )
+
+    assert len(read) == pages
+    assert known_jobs.stopped_at_limit == stopped_at_limit
+
+
+def test_jobs_past_the_page_limit_are_not_forgotten():
+    company = Company(name="Example", jobs_page="https://example.com/jobs")
+    run_record = RunRecord(
+        existing_jobs={"Example": ["new", "old"]},
+        errors=[],
+        job_history={
+            "Example": {
+                "new": ["2000-01-01", "2000-01-01"],
+                "old": ["2000-01-01", "2000-01-01"],
+            }
+        },
+    )
+    result = CompanyResult(
+        company=company,
+        relevant_jobs=[JobPosting(title="Engineer", id="new")],
+        jobs_page_status=JobsPageStatus.SOME_JOB_FOUND,
+        stopped_at_limit=True,
+        metrics=CompanyMetrics(company_name=company.name),
+    )
+    assert not result.read_all_jobs()
+
+    record_results(run_record, [result], retention_days=30)
+    assert run_record.job_ids("Example") == {"new", "old"}
+
+    result.stopped_at_limit = False
+    record_results(run_record, [result], retention_days=30)
+    assert run_record.job_ids("Example") == {"new"}
@@ -0,0 +1,43 @@
+from models import *
+
+
+class UndeclaredPage:
+    @staticmethod
+    def get_jobs(driver, config=None):
+        return []
+
+
+class UndeclaredJobsPage(JobsPage):
+    @staticmethod
+    def get_jobs(driver, config=None):
+        return []
+
+
+@declare_scraper()
+class DeclaredPage:
+    @staticmethod
+    def get_jobs(driver, config=None):
+        return []
+
+
+@declare_scraper(needs_performance_log=True)
+class PerformanceLogPage:
+    @staticmethod
+    def get_jobs(driver, config=None):
+        return []
+
+
+def company(jobs_page_class):
+    return Company(
+        name="Acme",
+        jobs_page="https://acme.com/jobs",
+        jobs_page_class=jobs_page_class,
+        jobs_page_class_name=jobs_page_class.__name__,
+    )
+
+
+def test_only_scrapers_declaring_they_dont_read_the_performance_log_go_without():
+    assert needs_performance_log(company(UndeclaredPage))
+    assert needs_performance_log(company(UndeclaredJobsPage))
+    assert not needs_performance_log(company(DeclaredPage))
+    assert needs_performance_log(company(PerformanceLogPage))
@@ -0,0 +1,249 @@
+from models import *
+from job_scrape import get_new_relevant_jobs, record_results
+from run_record_store import open_run_record, save_run_record
+
+
+def result(company, jobs):
+    return CompanyResult(
+        company=company,
+        relevant_jobs=jobs,
+        jobs_page_status=JobsPageStatus.SOME_JOB_FOUND,
+        metrics=CompanyMetrics(company_name=company.name),
+    )
+
+
+def new_job_ids(new_relevant_jobs):
+    return {
+        company_name: [job.id for job in info["jobs"]]
+        for company_name, info in new_relevant_jobs.items()
+    }
+
+
+def test_same_posting_on_board_is_reported_once(run_record_path):
+    acme = Company(name="Acme", jobs_page="https://job-boards.greenhouse.io/acme")
+    board = Company(name="Bits in Bio", jobs_page="https://bitsinbio.org/jobs")
+    acme_link = "https://job-boards.greenhouse.io/acme/jobs/1"
+    board_link = "https://boards.greenhouse.io/acme/jobs/1?gh_src=bitsinbio"
+
+    run_record = open_run_record(run_record_path)
+    new_relevant_jobs, _, _, metrics = record_results(
+        run_record,
+        [
+            result(acme, [JobPosting(title="Engineer", id=acme_link, link=acme_link)]),
+            result(board, [JobPosting(title="Engineer\nAcme", id=board_link)]),
+        ],
+    )
+    save_run_record(run_record, run_record_path)
+
+    assert new_job_ids(new_relevant_jobs) == {"Acme": [acme_link]}
+    assert [m.jobs_duplicate for m in metrics] == [0, 1]
+
+
+def test_climate_tech_list_posting_is_reported_once_by_its_link(run_record_path):
+    acme = Company(name="Acme", jobs_page="https://job-boards.greenhouse.io/acme")
+    board = Company(name="Climate Tech List", jobs_page="https://climatetechlist.com")
+    acme_link = "https://job-boards.greenhouse.io/acme/jobs/1"
+
+    run_record = open_run_record(run_record_path)
+    new_relevant_jobs, _, _, metrics = record_results(
+        run_record,
+        [
+            result(acme, [JobPosting(title="Engineer", id=acme_link, link=acme_link)]),
+            # Airtable record ids, linking to the view's apply column
+            result(
+                board,
+                [
+                    JobPosting(title="Engineer. Acme", id="rec1", link=acme_link),
+                    JobPosting(title="Chemist. Acme", id="rec2"),
+                ],
+            ),
+        ],
+    )
+
+    assert new_job_ids(new_relevant_jobs) == {
+        "Acme": [acme_link],
+        "Climate Tech List": ["rec2"],
+    }
+    assert [m.jobs_duplicate for m in metrics] == [0, 1]
+
+
+def test_different_postings_with_the_same_title_are_both_reported(run_record_path):
+    acme = Company(name="Acme", jobs_page="https://jobs.lever.co/acme")
+    board = Company(name="Climate Tech List", jobs_page="https://climatetechlist.com")
+    first_link = "https://jobs.lever.co/acme/1"
+    second_link = "https://jobs.lever.co/acme/2"
+
+    run_record = open_run_record(run_record_path)
+    record_results(
+        run_record,
+        [result(acme, [JobPosting(title="Engineer\nNew York", id=first_link)])],
+    )
+    save_run_record(run_record, run_record_path)
+
+    # A later run finds a second Engineer posting at Acme, on the board and then on Acme's own page
+    run_record = open_run_record(run_record_path)
+    new_relevant_jobs, _, _, metrics = record_results(
+        run_record,
+        [
+            result(board, [JobPosting(title="Engineer\nAcme\nBoston", id=second_link)]),
+            result(
+                acme,
+                [
+                    JobPosting(title="Engineer\nNew York", id=first_link),
+                    JobPosting(title="Engineer\nBoston", id=second_link),
+                ],
+            ),
+        ],
+    )
+
+    assert new_job_ids(new_relevant_jobs) == {"Climate Tech List": [second_link]}
+    assert [m.jobs_duplicate for m in metrics] == [0, 1]
+
+    # Two postings with the same title and no link to compare are always both new
+    run_record = open_run_record(run_record_path)
+    new_relevant_jobs, _, _, _ = record_results(
+        run_record,
+        [
+            result(board, [JobPosting(title="Chemist\nAcme", id="rec1")]),
+            result(acme, [JobPosting(title="Chemist", id="rec2")]),
+        ],
+    )
+    assert new_job_ids(new_relevant_jobs) == {
+        "Climate Tech List": ["rec1"],
+        "Acme": ["rec2"],
+    }
+
+
+def test_postings_that_differ_only_in_ref_are_both_reported(run_record_path):
+    acme = Company(name="Acme", jobs_page="https://acme.com/careers")
+    board = Company(name="Climate Tech List", jobs_page="https://climatetechlist.com")
+    # Some job sites say which job it is in a parameter that's usually for tracking
+    first_link = "https://acme.com/careers/job?ref=JR1"
+    second_link = "https://acme.com/careers/job?ref=JR2"
+
+    run_record = open_run_record(run_record_path)
+    record_results(
+        run_record,
+        [result(acme, [JobPosting(title="Engineer", id=first_link, link=first_link)])],
+    )
+    save_run_record(run_record, run_record_path)
+
+    run_record = open_run_record(run_record_path)
+    new_relevant_jobs, _, _, metrics = record_results(
+        run_record,
+        [
+            result(board, [JobPosting(title="Chemist\nAcme", id=second_link)]),
+            result(
+                acme,
+                [
+                    JobPosting(title="Engineer", id=first_link, link=first_link),
+                    JobPosting(title="Chemist", id=second_link, link=second_link),
+                ],
+            ),
+        ],
+    )
+
+    assert new_job_ids(new_relevant_jobs) == {"Climate Tech List": [second_link]}
+    assert [m.jobs_duplicate for m in metrics] == [0, 1]
+
+    run_record = open_run_record(run_record_path)
+    new_relevant_jobs, _, _, _ = record_results(
+        run_record,
+        [
+            result(
+                acme,
+                [
+                    JobPosting(title="Engineer", id=first_link, link=first_link),
+                    JobPosting(
+                        title="Engineer",
+                        id="https://acme.com/careers/job?ref=JR3",
+                        link="https://acme.com/careers/job?ref=JR3",
+                    ),
+                ],
+            )
+        ],
+    )
+    assert new_job_ids(new_relevant_jobs) == {
+        "Acme": ["https://acme.com/careers/job?ref=JR3"]
+    }
+
+
+def test_postings_that_differ_only_in_their_route_fragment_are_both_reported(
+    run_record_path,
+):
+    acme = Company(name="Acme", jobs_page="https://acme.com/careers")
+    board = Company(name="Bits in Bio", jobs_page="https://bitsinbio.org/jobs")
+    # A single page job board showing each posting at its own route
+    first_link = "https://acme.com/careers#/job/5"
+    second_link = "https://acme.com/careers#/job/7"
+
+    run_record = open_run_record(run_record_path)
+    new_relevant_jobs, _, _, metrics = record_results(
+        run_record,
+        [
+            result(
+                acme, [JobPosting(title="Engineer", id=first_link, link=first_link)]
+            ),
+            result(board, [JobPosting(title="Chemist\nAcme", id=second_link)]),
+        ],
+    )
+
+    assert new_job_ids(new_relevant_jobs) == {
+        "Acme": [first_link],
+        "Bits in Bio": [second_link],
+    }
+    assert [m.jobs_duplicate for m in metrics] == [0, 0]
+
+
+def test_canonical_url():
+    assert (
+        canonical_url("https://boards.greenhouse.io/acme/jobs/1?gh_src=x&utm_source=y")
+        == canonical_url("http://www.job-boards.greenhouse.io/acme/jobs/1/")
+        == "job-boards.greenhouse.io/acme/jobs/1"
+    )
+    assert canonical_url("https://jobs.lever.co/acme/1/apply?b=2&a=1") == (
+        "jobs.lever.co/acme/1?a=1&b=2"
+    )
+    assert canonical_url("https://jobs.lever.co/acme/1") != canonical_url(
+        "https://jobs.lever.co/acme/2"
+    )
+    assert canonical_url("https://x.com/job?ref=JR1") != canonical_url(
+        "https://x.com/job?ref=JR2"
+    )
+    assert canonical_url("https://x.com/jobs/1#apply") == "x.com/jobs/1"
+    assert canonical_url("https://x.com/jobs?a=1#!/job/5") == "x.com/jobs?a=1#!/job/5"
+
+
+@declare_scraper(page_cache=True)
+class OneJobPage(HttpJobsPage):
+    @staticmethod
+    def fetch_jobs(jobs_page, config=None, page_cache: PageCache = None):
+        return [JobPosting(title="Engineer", id=f"{jobs_page}/1")]
+
+
+class UnreachableRunRecord(RunRecord):
+    """A run record that can't be read for one company, like an S3 or SQLite error"""
+
+    def page_fingerprint(self, company_name):
+        if company_name == "Acme":
+            raise Exception("Couldn't read the run record")
+        return super().page_fingerprint(company_name)
+
+
+def test_failing_to_read_the_run_record_is_the_companys_error():
+    companies = [
+        Company(
+            name=name,
+            jobs_page=f"https://{name.lower()}.com/careers",
+            jobs_page_class=OneJobPage,
+            jobs_page_class_name="OneJobPage",
+        )
+        for name in ["Acme", "Globex"]
+    ]
+    new_relevant_jobs, _, _, errors_message, _ = get_new_relevant_jobs(
+        None, UnreachableRunRecord(existing_jobs={}, errors=[]), companies, [], None
+    )
+    assert new_job_ids(new_relevant_jobs) == {
+        "Globex": ["https://globex.com/careers/1"]
+    }
+    assert "Acme" in errors_message and "Couldn't read the run record" in errors_message
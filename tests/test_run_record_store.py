@@ -0,0 +1,126 @@
+import os
+import sys
+import json
+import subprocess
+from dataclasses import asdict
+
+from models import *
+from run_record_store import open_run_record, save_run_record
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TODAY = "2026-03-01"
+SEEN_BEFORE = "2026-01-01"
+
+RUN_RECORD = {
+    "existing_jobs": {
+        "Acme": ["acme-1", "acme-2", "acme-3"],
+        "Globex": ["globex-1", "globex-2"],
+    },
+    "errors": [
+        asdict(
+            ScrapeError(
+                company_name="Initech",
+                jobs_page="https://initech.example.com/jobs",
+                message="Timed out",
+                is_new_this_run=True,
+            )
+        )
+    ],
+    "job_history": {
+        # acme-3 is from before history was kept
+        "Acme": {
+            "acme-1": ["2025-06-01", "2025-10-01"],
+            "acme-2": ["2025-06-01", "2026-02-01"],
+        },
+        "Globex": {
+            "globex-1": ["2025-01-01", "2025-02-01"],
+            "globex-2": ["2025-01-01", "2026-01-15"],
+        },
+    },
+    "page_fingerprints": {
+        "Acme": asdict(
+            PageFingerprint(
+                fingerprint="3f7a",
+                config_key="9c1e",
+                etag='W/"abc"',
+                last_modified=None,
+            )
+        ),
+    },
+    "saved_requests": {
+        "Globex": {
+            "url": "https://airtable.com/v0.3/view/viwX/readSharedViewData?requestId=req1",
+            "headers": {"x-time-zone": "America/New_York"},
+        }
+    },
+    "posting_keys": {
+        "https://boards.example.com/1": ["Acme", "acme-1"],
+        "https://boards.example.com/2": ["Acme", "acme-2"],
+        "https://boards.example.com/g1": ["Globex", "globex-1"],
+        "https://boards.example.com/g2": ["Globex", "globex-2"],
+    },
+}
+
+
+def open_copy(directory, extension):
+    directory.mkdir()
+    path = str(directory / "run_record.json")
+    with open(path, "w") as f:
+        json.dump(RUN_RECORD, f)
+    if extension == ".json":
+        return open_run_record(path), path
+    db_path = str(directory / f"run_record{extension}")
+    save_run_record(open_run_record(path), db_path)
+    return open_run_record(db_path), db_path
+
+
+def compact_a_run(run_record) -> list[int]:
+    """Compacts both companies around seeing and adding jobs, returning how many jobs each compact removed"""
+    removed = [run_record.compact("Globex", SEEN_BEFORE, TODAY)]
+    run_record.mark_seen("Acme", "acme-1", TODAY)  # seen again, so not stale
+    run_record.add_job("Acme", "acme-4")
+    run_record.mark_seen("Acme", "acme-4", TODAY)
+    run_record.add_posting_key("Acme", "acme-4", "https://boards.example.com/4")
+    # Globex's old job is forgotten, so its key is free for Acme's
+    run_record.add_posting_key("Acme", "acme-4", "https://boards.example.com/g1")
+    removed.append(run_record.compact("Acme", SEEN_BEFORE, TODAY))
+    return removed
+
+
+def test_compact_leaves_the_same_history_and_posting_keys_as_json_and_sqlite(
+    tmp_path,
+):
+    json_run_record, json_path = open_copy(tmp_path / "json", ".json")
+    sqlite_run_record, db_path = open_copy(tmp_path / "db", ".db")
+
+    assert compact_a_run(json_run_record) == compact_a_run(sqlite_run_record) == [1, 0]
+    assert sqlite_run_record.to_dict() == json_run_record.to_dict()
+    assert json_run_record.to_dict()["job_history"]["Acme"]["acme-3"] == [TODAY, TODAY]
+    assert "globex-1" not in json_run_record.to_dict()["job_history"]["Globex"]
+
+    save_run_record(json_run_record, json_path)
+    save_run_record(sqlite_run_record, db_path)
+    sqlite_run_record.close()
+    reopened = open_run_record(db_path)
+    assert reopened.to_dict() == open_run_record(json_path).to_dict()
+    assert not reopened.has_job("Globex", "globex-1")
+    assert reopened.duplicate_of("Globex", "https://boards.example.com/g1") == (
+        "Acme",
+        "acme-4",
+    )
+    reopened.close()
+
+
+def test_converting_to_sqlite_and_back_keeps_everything(tmp_path):
+    json_path = tmp_path / "run_record.json"
+    json_path.write_text(json.dumps(RUN_RECORD))
+    db_path = tmp_path / "run_record.db"
+    back_path = tmp_path / "run_record_back.json"
+    for source, destination in [(json_path, db_path), (db_path, back_path)]:
+        subprocess.run(
+            [sys.executable, "run_record_store.py", str(source), str(destination)],
+            check=True,
+            capture_output=True,
+            cwd=REPO_DIR,
+        )
+    assert json.loads(back_path.read_text()) == RUN_RECORD
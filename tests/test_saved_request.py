@@ -0,0 +1,156 @@
+import json
+
+import pytest
+
+from models import *
+from job_scrape import get_new_relevant_jobs
+from run_record_store import open_run_record, save_run_record
+
+# What the page makes its request with now, and whether loading the page works at all
+page = {"request": {"url": "https://example.com/jobs?v=1"}, "loads": True}
+
+
+class FakeDriver:
+    """Just enough of a WebDriver for a page whose body is the text "jobs" """
+
+    performance_log = True
+    window_handles = ["main"]
+
+    def get(self, url):
+        if not page["loads"]:
+            raise Exception("Page didn't load")
+
+    def execute_cdp_cmd(self, command, params):
+        return {}
+
+    def execute_script(self, script, *args):
+        return "jobs"
+
+    def find_element(self, by, value):
+        class Body:
+            text = "jobs"
+
+        return Body()
+
+    def quit(self):
+        pass
+
+
+@declare_scraper(saves_request=True)
+class SavedRequestPage(JobsPage):
+    @staticmethod
+    def get_jobs(driver, config=None, saved_request: SavedRequest = None):
+        saved_request.found = page["request"]
+        return [JobPosting(title="Engineer", id="1")]
+
+    @staticmethod
+    def fetch_jobs(jobs_page, config=None, saved_request: SavedRequest = None):
+        if saved_request.saved != page["request"]:
+            raise Exception("401 Unauthorized")
+        return [JobPosting(title="Engineer", id="1")]
+
+
+def run(run_record_path):
+    company = Company(
+        name="Example",
+        jobs_page="https://example.com/careers",
+        jobs_page_class=SavedRequestPage,
+        jobs_page_class_name="SavedRequestPage",
+        fixed_sleep=True,
+    )
+    launched = []
+
+    def driver_factory(performance_log=False):
+        launched.append(FakeDriver())
+        return launched[-1]
+
+    run_record = open_run_record(run_record_path)
+    _, run_record, _, errors_message, _ = get_new_relevant_jobs(
+        None,
+        run_record,
+        [company],
+        [],
+        None,
+        default_sleep=0,
+        driver_factory=driver_factory,
+    )
+    save_run_record(run_record, run_record_path)
+    return len(launched), errors_message
+
+
+def test_stale_saved_request_is_replaced_in_the_same_run(run_record_path):
+    page["request"], page["loads"] = {"url": "https://example.com/jobs?v=1"}, True
+    assert run(run_record_path) == (1, None)
+    assert open_run_record(run_record_path).saved_request("Example") == page["request"]
+
+    # Made again without the browser
+    assert run(run_record_path) == (0, None)
+
+    # The page now makes a different request, so the saved one fails and the page is loaded instead
+    page["request"] = {"url": "https://example.com/jobs?v=2"}
+    assert run(run_record_path) == (1, None)
+    assert open_run_record(run_record_path).saved_request("Example") == page["request"]
+    assert run(run_record_path) == (0, None)
+
+
+def test_stale_saved_request_is_cleared_when_the_page_fails_too(run_record_path):
+    page["request"], page["loads"] = {"url": "https://example.com/jobs?v=1"}, True
+    run(run_record_path)
+
+    page["request"], page["loads"] = {"url": "https://example.com/jobs?v=2"}, False
+    launched, errors_message = run(run_record_path)
+    assert launched == 1
+    assert "Example" in errors_message
+    assert open_run_record(run_record_path).saved_request("Example") is None
+
+
+class FakeResponse:
+    def __init__(self, content, content_type):
+        self.content = content
+        self.headers = {"Content-Type": content_type}
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return json.loads(self.content)
+
+
+def test_climate_tech_list_prefers_and_reads_the_msgpack_response(monkeypatch):
+    msgpack = pytest.importorskip("msgpack")
+    import common_scrapers
+
+    data = {"data": {"table": {"columns": [], "rows": []}}}
+    url = "https://airtable.com/v0.3/view/viw1/readSharedViewData"
+
+    def request_log(request_url):
+        message = {
+            "method": "Network.requestWillBeSent",
+            "params": {"request": {"url": request_url, "headers": {}}},
+        }
+        return {"message": json.dumps({"message": message})}
+
+    class LogDriver:
+        def get_log(self, log_type):
+            return [
+                request_log(f"{url}?stringifiedObjectParams=%7B%7D"),
+                request_log(f"{url}?allowMsgpackOfResult=true"),
+            ]
+
+        def execute_script(self, script, *args):
+            pass
+
+    requests_found = common_scrapers.find_shared_view_requests(LogDriver())
+    assert [request["url"] for request in requests_found] == [
+        f"{url}?allowMsgpackOfResult=true",
+        f"{url}?stringifiedObjectParams=%7B%7D",
+    ]
+
+    monkeypatch.setattr(
+        common_scrapers.requests,
+        "get",
+        lambda *args, **kwargs: FakeResponse(
+            msgpack.packb(data), "application/msgpack"
+        ),
+    )
+    assert common_scrapers.fetch_shared_view(requests_found[0]) == data
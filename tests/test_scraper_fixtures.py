@@ -0,0 +1,193 @@
+import os
+import sys
+import json
+import threading
+from urllib.parse import quote
+
+import pytest
+from selenium.webdriver.common.by import By
+
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"
+    ),
+)
+
+import http_scrapers
+from bench_scrapers import (
+    FIXTURES_DIR,
+    browser_scraper,
+    create_driver,
+    expected_jobs,
+    fill_in,
+    load_fixtures,
+    run_scraper,
+    serve_board_apis,
+    start_fixture_server,
+)
+from scraper_registry import get_scraper
+from waits import wait_for
+
+FIXTURES = load_fixtures()
+
+
+def needs_browser(scraper_name) -> bool:
+    return getattr(get_scraper(scraper_name), "needs_browser", True)
+
+
+# The scrapers in http_scrapers.py find the same jobs as the browser scrapers they stand in for, from the same fixture
+HTTP_SCRAPERS = [
+    (name, scraper_name)
+    for name, fixture in FIXTURES.items()
+    for scraper_name in fixture["scrapers"]
+    if not needs_browser(scraper_name)
+]
+
+
+@pytest.fixture(scope="module")
+def server():
+    api_urls = (
+        http_scrapers.GREENHOUSE_API_URL,
+        http_scrapers.ASHBY_API_URL,
+        dict(http_scrapers.LEVER_API_URLS),
+    )
+    server = start_fixture_server()
+    serve_board_apis(server.base_url)
+    yield server
+    server.shutdown()
+    (
+        http_scrapers.GREENHOUSE_API_URL,
+        http_scrapers.ASHBY_API_URL,
+        http_scrapers.LEVER_API_URLS,
+    ) = api_urls
+
+
+@pytest.fixture(scope="module")
+def driver():
+    try:
+        driver = create_driver()
+    except Exception as e:
+        pytest.skip(f"Chrome isn't available: {repr(e)}")
+    yield driver
+    driver.quit()
+
+
+def test_each_thread_fetches_with_its_own_session():
+    sessions = []
+    threads = [
+        threading.Thread(target=lambda: sessions.append(http_scrapers.session()))
+        for _ in range(2)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sessions[0] is not sessions[1]
+    assert http_scrapers.session() is http_scrapers.session()
+
+
+@pytest.mark.parametrize("name,scraper_name", HTTP_SCRAPERS)
+def test_http_scraper_finds_the_expected_jobs(server, name, scraper_name):
+    fixture = FIXTURES[name]
+    jobs, _ = run_scraper(None, server.base_url, name, fixture, scraper_name, 1)
+    assert jobs == expected_jobs(fixture, server.base_url)
+
+
+@pytest.mark.parametrize("name", sorted({name for name, _ in HTTP_SCRAPERS}))
+def test_browser_scraper_finds_the_same_jobs(server, driver, name):
+    fixture = FIXTURES[name]
+    jobs, _ = run_scraper(
+        driver, server.base_url, name, fixture, browser_scraper(fixture), 1
+    )
+    assert jobs == expected_jobs(fixture, server.base_url)
+
+
+# Each fixture's job rows, as the scrapers select them
+ROW_SELECTORS = [
+    ("applytojob", ".jobs-list li.list-group-item"),
+    ("ashby", "#root .ashby-job-posting-brief-list a"),
+    ("avature", ".section--search-jobs .article__header__text"),
+    ("bamboo", "main li"),
+    ("bitsinbio", ".job-list .job-item"),
+    ("greenhouse", ".job-post"),
+    ("greenhouse_embedded_standalone", ".opening"),
+    ("lever", ".posting"),
+    ("smartrecruiters", ".openings-body li.opening-job"),
+    ("workable", '#jobs li[data-ui="job"]'),
+]
+
+ROWS_PAGE = """
+<table><tr class="row"><td>Software Engineer</td>
+    <td>New York,&nbsp;NY</td></tr></table>
+<div class="row">
+    Senior   Backend Engineer <span style="display: none">(closed)</span><span style="visibility: hidden">Hidden</span>
+    <div>Remote</div><span style="opacity: 0">Faded</span>
+    <pre>Full   time</pre><span style="text-transform: uppercase">new</span><br>Apply
+</div>
+"""
+
+
+def web_element_texts(driver, row_selector) -> list[str]:
+    """How the scrapers read rows before extract_rows, one WebDriver command per row"""
+    return [
+        element.text for element in driver.find_elements(By.CSS_SELECTOR, row_selector)
+    ]
+
+
+@pytest.mark.parametrize("name,row_selector", ROW_SELECTORS)
+def test_extract_rows_reads_the_same_text_as_web_elements(
+    server, driver, name, row_selector
+):
+    from common_scrapers import extract_rows
+
+    driver.get(f"{server.base_url}/{name}/{FIXTURES[name]['page']}")
+    assert wait_for(driver, lambda d: web_element_texts(d, row_selector), 5)
+    assert [
+        row["text"] for row in extract_rows(driver, row_selector)
+    ] == web_element_texts(driver, row_selector)
+
+
+def test_extract_rows_reads_table_cells_and_hidden_text_like_web_elements(driver):
+    from common_scrapers import extract_rows
+
+    driver.get("data:text/html;charset=utf-8," + quote(ROWS_PAGE))
+    texts = [row["text"] for row in extract_rows(driver, ".row")]
+    assert texts == web_element_texts(driver, ".row")
+    assert texts[0] == "Software Engineer New York, NY"
+    assert "Hidden" not in texts[1] and "Faded" not in texts[1]
+
+
+def test_climate_tech_list_jobs_link_to_their_apply_column():
+    from common_scrapers import jobs_from_shared_view
+
+    fixture = FIXTURES["climatetechlist"]
+    with open(
+        os.path.join(FIXTURES_DIR, "climatetechlist", "readSharedViewData.json")
+    ) as f:
+        data = json.loads(fill_in(f.read(), ""))
+    assert jobs_from_shared_view(data, fixture["config"]) == expected_jobs(fixture, "")
+
+
+def test_climate_tech_list_jobs_link_to_the_apply_column_not_the_company_website():
+    from common_scrapers import apply_link_column_id, jobs_from_shared_view
+
+    fixture = FIXTURES["climatetechlist"]
+    with open(
+        os.path.join(FIXTURES_DIR, "climatetechlist", "readSharedViewData.json")
+    ) as f:
+        data = json.loads(fill_in(f.read(), ""))
+    table = data["data"]["table"]
+    website_column = {"id": "fldWebsite", "name": "Company website", "type": "url"}
+    table["columns"].insert(0, website_column)
+    for row in table["rows"]:
+        row["cellValuesByColumnId"]["fldWebsite"] = "https://acme.com"
+
+    assert apply_link_column_id(table["columns"]) == "fldApply"
+    assert jobs_from_shared_view(data, fixture["config"]) == expected_jobs(fixture, "")
+
+    # Without an apply column, the website isn't taken for it
+    table["columns"] = [
+        column for column in table["columns"] if column["id"] != "fldApply"
+    ]
+    assert apply_link_column_id(table["columns"]) is None
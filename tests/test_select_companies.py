@@ -0,0 +1,62 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from models import Company
+from job_scrape import select_companies
+from scraper_registry import get_scraper
+
+
+def company(name, **fields):
+    return Company(
+        name=name,
+        jobs_page=f"https://job-boards.greenhouse.io/{name}",
+        jobs_page_class=get_scraper("GreenhousePage"),
+        jobs_page_class_name="GreenhousePage",
+        **fields,
+    )
+
+
+@pytest.mark.parametrize(
+    "fields, use_http_alternatives, scraper",
+    [
+        ({}, False, "GreenhousePage"),
+        ({"use_http": True}, False, "GreenhouseApiPage"),
+        ({}, True, "GreenhouseApiPage"),
+        ({"use_browser": True}, True, "GreenhousePage"),
+    ],
+)
+def test_http_alternatives_are_opt_in(fields, use_http_alternatives, scraper):
+    [selected] = select_companies(
+        [company("acme", **fields)], use_http_alternatives=use_http_alternatives
+    )
+    assert selected.jobs_page_class_name == scraper
+    assert selected.jobs_page_class is get_scraper(scraper)
+
+
+def test_company_switched_to_http_does_not_import_the_browser_scraper():
+    script = """
+import sys
+from job_scrape import get_companies
+
+[company] = get_companies(
+    [
+        {
+            "name": "acme",
+            "jobs_page": "https://job-boards.greenhouse.io/acme",
+            "jobs_page_class_name": "GreenhousePage",
+            "use_http": True,
+        }
+    ]
+)
+assert company.jobs_page_class_name == "GreenhouseApiPage", company
+assert "common_scrapers" not in sys.modules
+assert "selenium" not in sys.modules
+"""
+    subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        check=True,
+    )
@@ -0,0 +1,152 @@
+import json
+
+from models import *
+from job_scrape import get_new_relevant_jobs, get_relevant_jobs
+from run_record_store import open_run_record
+from shards import get_new_relevant_jobs_in_shards, shard_result_dicts
+from shards import split_into_shards
+
+BOARD_LINK = "https://job-boards.greenhouse.io/acme/jobs/1"
+# Each company's jobs, or the error its page gives
+PAGES = {
+    "Acme": [JobPosting(title="Engineer", id=BOARD_LINK, link=BOARD_LINK)],
+    "Globex": [
+        JobPosting(title="Engineer", id="https://globex.com/jobs/1"),
+        JobPosting(title="Senior Engineer", id="https://globex.com/jobs/2"),
+        JobPosting(title="Accountant", id="https://globex.com/jobs/3"),
+    ],
+    "Initech": Exception("Page didn't load"),
+    "Umbrella": [],
+    # Lists Acme's posting too, which is only reported once whichever shard each is in
+    "Bits in Bio": [
+        JobPosting(title="Engineer\nAcme", id=BOARD_LINK + "?gh_src=bitsinbio"),
+        JobPosting(title="Engineer\nHooli", id="https://hooli.com/jobs/1"),
+    ],
+}
+
+
+@declare_scraper()
+class StaticPage(HttpJobsPage):
+    @staticmethod
+    def fetch_jobs(jobs_page, config=None, page_cache: PageCache = None):
+        page = PAGES[jobs_page]
+        if isinstance(page, Exception):
+            raise page
+        return page
+
+
+COMPANIES = [
+    Company(
+        name=name,
+        jobs_page=name,
+        jobs_page_class=StaticPage,
+        jobs_page_class_name="StaticPage",
+    )
+    for name in PAGES
+]
+SEARCH_TERMS = ["Engineer"]
+
+
+def open_previous_run_record(tmp_path):
+    path = tmp_path / "run_record.json"
+    if not path.exists():
+        path.write_text(
+            json.dumps(
+                {
+                    "existing_jobs": {"Globex": ["https://globex.com/jobs/1"]},
+                    "errors": [],
+                }
+            )
+        )
+    return open_run_record(str(path))
+
+
+def in_process_shard(tmp_path, failing_shard=None):
+    """Stands in for lambda_function.invoke_shard: a worker with its own copy of the run record"""
+
+    def invoke_shard(shard_index, company_names):
+        if shard_index == failing_shard:
+            raise Exception("Task timed out after 900.00 seconds")
+        results = get_relevant_jobs(
+            None,
+            None,
+            None,
+            0,
+            [company for company in COMPANIES if company.name in company_names],
+            SEARCH_TERMS,
+            None,
+            run_record=open_previous_run_record(tmp_path),
+        )
+        return shard_result_dicts(results)
+
+    return invoke_shard
+
+
+def summary(run_record, new_relevant_jobs, verify_no_jobs):
+    # Errors are compared by their run record entries, as the tracebacks in the message differ
+    return {
+        "new_jobs": {
+            company_name: [job.id for job in info["jobs"]]
+            for company_name, info in new_relevant_jobs.items()
+        },
+        "verify_no_jobs": [company.name for company in verify_no_jobs],
+        "run_record": run_record.to_dict(),
+    }
+
+
+def run_unsharded(tmp_path):
+    run_record = open_previous_run_record(tmp_path)
+    new_relevant_jobs, _, verify_no_jobs, _, _ = get_new_relevant_jobs(
+        None, run_record, COMPANIES, SEARCH_TERMS, None, default_sleep=0
+    )
+    return summary(run_record, new_relevant_jobs, verify_no_jobs)
+
+
+def run_sharded(tmp_path, failing_shard=None):
+    run_record = open_previous_run_record(tmp_path)
+    new_relevant_jobs, verify_no_jobs, _, _ = get_new_relevant_jobs_in_shards(
+        run_record, COMPANIES, 2, in_process_shard(tmp_path, failing_shard)
+    )
+    return summary(run_record, new_relevant_jobs, verify_no_jobs)
+
+
+def test_sharded_run_records_the_same_as_an_unsharded_one(tmp_path):
+    unsharded = run_unsharded(tmp_path)
+    assert unsharded["new_jobs"] == {
+        "Acme": [BOARD_LINK],
+        "Globex": ["https://globex.com/jobs/2"],
+        "Bits in Bio": ["https://hooli.com/jobs/1"],
+    }
+
+    assert run_sharded(tmp_path) == unsharded
+
+
+def test_failed_shard_leaves_the_other_shards_results(tmp_path):
+    unsharded = run_unsharded(tmp_path)
+    failed_names = [company.name for company in split_into_shards(COMPANIES, 2)[1]]
+    assert 0 < len(failed_names) < len(COMPANIES)
+
+    sharded = run_sharded(tmp_path, failing_shard=1)
+
+    assert sharded["new_jobs"] == {
+        company_name: job_ids
+        for company_name, job_ids in unsharded["new_jobs"].items()
+        if company_name not in failed_names
+    }
+    shard_errors = {
+        error["company_name"]: error["message"]
+        for error in sharded["run_record"]["errors"]
+    }
+    for company_name in failed_names:
+        assert shard_errors[company_name] == "Task timed out after 900.00 seconds"
+        # Nothing recorded for it, nor forgotten
+        assert sharded["run_record"]["existing_jobs"].get(company_name) == (
+            json.loads((tmp_path / "run_record.json").read_text())["existing_jobs"].get(
+                company_name
+            )
+        )
+    for company_name in PAGES:
+        if company_name not in failed_names:
+            assert sharded["run_record"]["existing_jobs"].get(company_name) == (
+                unsharded["run_record"]["existing_jobs"].get(company_name)
+            )
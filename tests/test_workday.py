@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+import http_scrapers
+from models import *
+from common_scrapers import WorkdayDirectPage
+
+PAGE_URL = "https://tenant.wd1.myworkdayjobs.com/en-US/External"
+
+
+class WorkdayDriver:
+    """Just enough of a WebDriver for a Workday page that requested its first page of jobs from jobs_url"""
+
+    current_url = PAGE_URL + "?q=engineer"
+
+    def __init__(self, jobs_url):
+        self.jobs_url = jobs_url
+
+    def get_cookies(self):
+        return [{"name": "CALYPSO_CSRF_TOKEN", "value": "token"}]
+
+    def get_log(self, log_type):
+        request = {
+            "url": self.jobs_url,
+            "method": "POST",
+            "postData": json.dumps(
+                {"appliedFacets": {}, "limit": 20, "offset": 0, "searchText": ""}
+            ),
+        }
+        message = {
+            "method": "Network.requestWillBeSent",
+            "params": {"request": request},
+        }
+        return [{"message": json.dumps({"message": message})}]
+
+
+def job_id(i):
+    return f"{PAGE_URL}/job/{i}"
+
+
+@pytest.mark.parametrize("omits_total", [False, True])
+def test_workday_pages_through_the_jobs_endpoint(workday_server, omits_total):
+    workday_server.total = 50
+    # Without a total, paging stops at the first page with fewer than a page's worth of jobs
+    workday_server.omits_total = omits_total
+
+    jobs = WorkdayDirectPage.get_jobs(WorkdayDriver(workday_server.jobs_url))
+
+    # Same ids as WorkdayPage: the page's URL and the posting's externalPath
+    assert jobs == [
+        JobPosting(title=f"Job {i}", id=job_id(i), link=job_id(i)) for i in range(50)
+    ]
+    assert workday_server.offsets == [0, 20, 40]
+
+
+def test_workday_stops_at_a_page_of_known_jobs(workday_server):
+    workday_server.total = 100
+    # Newest first, so every job after the first page has been seen before
+    known_jobs = KnownJobs({job_id(i) for i in range(20, 100)})
+
+    jobs = WorkdayDirectPage.get_jobs(
+        WorkdayDriver(workday_server.jobs_url), known_jobs=known_jobs
+    )
+
+    assert len(jobs) == 40
+    assert workday_server.offsets == [0, 20]
+    assert known_jobs.stopped_early
+    assert not known_jobs.stopped_at_limit
+
+
+def test_workday_without_a_total_pages_to_an_empty_page(monkeypatch, workday_server):
+    monkeypatch.setattr(http_scrapers, "WORKDAY_MAX_PAGES", 5)
+    workday_server.omits_total = True
+    known_jobs = KnownJobs(frozenset())
+
+    workday_server.total = 40
+    jobs = WorkdayDirectPage.get_jobs(
+        WorkdayDriver(workday_server.jobs_url), known_jobs=known_jobs
+    )
+    assert len(jobs) == 40
+    assert workday_server.offsets == [0, 20, 40]
+    assert not known_jobs.stopped_at_limit
+
+    # More pages than it reads: the jobs past them aren't taken to be gone
+    workday_server.total = 200
+    workday_server.offsets = []
+    jobs = WorkdayDirectPage.get_jobs(
+        WorkdayDriver(workday_server.jobs_url), known_jobs=known_jobs
+    )
+    assert len(jobs) == 100
+    assert known_jobs.stopped_at_limit
@@ -0,0 +1,99 @@
+import time
+
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
+
+from models import ReadyCondition
+
+POLL_SECONDS = 0.1
+
+
+def wait_for(driver, condition, timeout) -> bool:
+    """Like WebDriverWait.until, but returns False on timeout instead of raising"""
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=POLL_SECONDS).until(condition)
+        return True
+    except TimeoutException:
+        return False
+
+
+def wait_until_ready(driver, ready_condition: ReadyCondition, timeout) -> bool:
+    deadline = time.monotonic() + timeout
+
+    def remaining():
+        return max(deadline - time.monotonic(), 0)
+
+    is_ready = wait_for(driver, document_is_complete, timeout)
+    if ready_condition.locator:
+        if ready_condition.count_stable_ms:
+            is_ready = is_ready and wait_for(
+                driver,
+                element_count_is_stable(
+                    ready_condition.locator, ready_condition.count_stable_ms
+                ),
+                remaining(),
+            )
+        else:
+            is_ready = is_ready and wait_for(
+                driver,
+                EC.presence_of_element_located(ready_condition.locator),
+                remaining(),
+            )
+    if ready_condition.network_idle_ms:
+        is_ready = is_ready and wait_for(
+            driver, network_is_idle(ready_condition.network_idle_ms), remaining()
+        )
+    return is_ready
+
+
+def document_is_complete(driver) -> bool:
+    return driver.execute_script("return document.readyState;") == "complete"
+
+
+class element_count_is_stable:
+    """At least one element matches locator, and the number of matches hasn't changed for stable_ms"""
+
+    def __init__(self, locator, stable_ms):
+        self.locator = locator
+        self.stable_seconds = stable_ms / 1000
+        self.count = None
+        self.count_since = None
+
+    def __call__(self, driver):
+        count = len(driver.find_elements(*self.locator))
+        now = time.monotonic()
+        if count != self.count:
+            self.count = count
+            self.count_since = now
+            return False
+        return count > 0 and now - self.count_since >= self.stable_seconds
+
+
+class network_is_idle:
+    """No new resources (fetches, scripts, etc) have finished loading for idle_ms"""
+
+    def __init__(self, idle_ms):
+        self.idle_seconds = idle_ms / 1000
+        self.resource_count = None
+        self.count_since = None
+
+    def __call__(self, driver):
+        resource_count = driver.execute_script(
+            "return performance.getEntriesByType('resource').length;"
+        )
+        now = time.monotonic()
+        if resource_count != self.resource_count:
+            self.resource_count = resource_count
+            self.count_since = now
+            return False
+        return now - self.count_since >= self.idle_seconds
+
+
+class element_count_is_greater_than:
+    def __init__(self, locator, count):
+        self.locator = locator
+        self.count = count
+
+    def __call__(self, driver):
+        return len(driver.find_elements(*self.locator)) > self.count